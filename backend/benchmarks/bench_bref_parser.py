@@ -0,0 +1,68 @@
+"""
+Compara el parser per_game actual (lxml, una pasada) con el anterior (BeautifulSoup + find por celda).
+
+Por defecto usa el fixture de tests, que es una página SINTÉTICA (misma estructura y tamaño que una
+página de carrera, con relleno y estadísticas inventadas): la mejora medida con él es orientativa.
+Para una cifra representativa, pasa páginas reales guardadas como argumento.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_bref_parser [--repeat 20] [fichero.html ...]
+"""
+import argparse
+import glob
+import os
+import time
+from bs4 import BeautifulSoup
+from modules.bref_parser import parse_per_game_stats
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "basketball_reference", "*.html")
+
+def legacy_parse(page_html):
+    # Copia del parser original de basketball_reference.get_historical_stats
+    player_soup = BeautifulSoup(page_html, "html.parser")
+    per_game_table = None
+    for table_id in ["per_game", "per_game_stats", "per_game_stats_post"]:
+        per_game_table = player_soup.find("table", {"id": table_id})
+        if per_game_table:
+            break
+    if not per_game_table:
+        return []
+    stats = []
+    for row in per_game_table.find("tbody").find_all("tr"):
+        try:
+            stats.append({
+                "season": row.find("th").text.strip(),
+                "team": row.find("td", {"data-stat": "team_name_abbr"}).text.strip() if row.find("td", {"data-stat": "team_name_abbr"}) else "N/A",
+                "points_per_game": row.find("td", {"data-stat": "pts_per_g"}).text.strip() if row.find("td", {"data-stat": "pts_per_g"}) else "0",
+                "rebounds_per_game": row.find("td", {"data-stat": "trb_per_g"}).text.strip() if row.find("td", {"data-stat": "trb_per_g"}) else "0",
+                "assists_per_game": row.find("td", {"data-stat": "ast_per_g"}).text.strip() if row.find("td", {"data-stat": "ast_per_g"}) else "0",
+            })
+        except AttributeError:
+            pass
+    return stats
+
+def _best_of(func, page_html, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(page_html)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Páginas HTML guardadas (por defecto, el fixture sintético de tests)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for path in args.pages or sorted(glob.glob(FIXTURES)):
+        with open(path, encoding="utf-8") as f:
+            page_html = f.read()
+        label = os.path.basename(path) + ("" if args.pages else ", sintética")
+        legacy = _best_of(legacy_parse, page_html, args.repeat)
+        current = _best_of(lambda text: parse_per_game_stats(text), page_html, args.repeat)
+        print(f"{label} ({len(page_html) / 1024:.0f} KB): "
+              f"BeautifulSoup {legacy * 1000:.1f} ms | lxml {current * 1000:.2f} ms | x{legacy / current:.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Coste de volver a consultar la página de carrera de un jugador en Basketball Reference:
+descarga y parseo completos, revalidación con ETag (304) y comparación por hash.
+La página es el fixture sintético de tests (ver su cabecera), no una descargada.
+
+Uso (desde backend/):
+    PYTHONPATH=.:root_files python -m benchmarks.bench_conditional_fetch [--repeat 50]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# Validadores, temporadas e índice en un directorio temporal: la prueba no toca los datos locales
+_tmp_dir = tempfile.mkdtemp(prefix="bench_conditional_")
+for _name in ("PAGE_VALIDATORS_DB_PATH", "SEASON_STORE_DB_PATH", "PLAYER_INDEX_DB_PATH", "CACHE_DB_PATH",
+              "SNAPSHOT_DB_PATH"):
+    os.environ[_name] = os.path.join(_tmp_dir, f"{_name.lower()}.sqlite3")
+
+from config import Config
+from modules.basketball_reference import get_historical_stats
+from modules.conditional_fetch import page_validators
+from tests.replay_server import ReplayServer
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "basketball_reference", "kevin_durant.html")
+
+def _measure(label, repeat, before_each=None):
+    timings = []
+    for _ in range(repeat):
+        if before_each:
+            before_each()
+        started = time.perf_counter()
+        get_historical_stats.uncached("Kevin Durant")
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{label:<32} mediana {timings[len(timings) // 2] * 1000:6.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    Config.HTTP_RATE_LIMITS["127.0.0.1"] = (1_000_000, 1_000_000)
+    print(f"Página de carrera: {os.path.getsize(FIXTURE) / 1024:.0f} KB (un 304 no trae cuerpo)")
+
+    for etags in (True, False):
+        replay = ReplayServer(etags=etags).start()
+        Config.BASKETBALL_REFERENCE_URL = replay.base_urls["basketball_reference"]
+        page_validators.clear()
+        get_historical_stats.uncached("Kevin Durant")   # resuelve el jugador (búsqueda) una vez
+
+        if etags:
+            _measure("descarga y parseo completos", args.repeat, before_each=page_validators.clear)
+            _measure("revalidación ETag (304)", args.repeat)
+        else:
+            _measure("sin ETag, mismo hash", args.repeat)
+        replay.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Benchmark del pipeline completo de consulta contra las fuentes grabadas (tests.replay_server), sin red.
+
+Escenarios:
+    single_cold         consultas de una en una, jugadores distintos (nada en caché, con análisis de IA)
+    single_warm         las mismas consultas repetidas (todo desde caché)
+    single_cold_async   como single_cold, con el pipeline asíncrono (modo ASGI)
+    batch_cold          un lote de jugadores distintos con merge_players_data
+
+De cada escenario se mide la latencia de extremo a extremo (p50/p95), el rendimiento
+(consultas/s), el pico de memoria (tracemalloc, en una segunda pasada con otros jugadores para
+no sumar su coste a los tiempos) y la latencia por etapa (p50/p95 de cada fuente, del LLM...).
+
+Las latencias de las fuentes son fijas (`LATENCY_PROFILE` x `--latency-scale`), así los
+resultados son comparables entre ejecuciones. Con `--latency-scale 0` solo se mide el coste
+propio del pipeline (parseo, caché, serialización...).
+
+Uso (desde backend/):
+    PYTHONPATH=.:root_files python -m benchmarks.bench_pipeline [--queries 20] [--batch 24]
+        [--latency-scale 1.0] [--output resultados.json] [--baseline base.json] [--tolerance 0.1]
+
+Con `--baseline` se compara con un resultado anterior (guardado con `--output`) y el proceso
+termina con código 1 si alguna métrica empeora más de `--tolerance`.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# Caché, índice y almacenes en un directorio temporal: el benchmark no toca los datos locales
+_tmp_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+for _name in ("CACHE_DB_PATH", "PLAYER_INDEX_DB_PATH", "SEASON_STORE_DB_PATH", "PAGE_VALIDATORS_DB_PATH",
+              "SNAPSHOT_DB_PATH"):
+    os.environ[_name] = os.path.join(_tmp_dir, f"{_name.lower()}.sqlite3")
+os.environ.setdefault("HTTP_POOL_SIZE", "64")
+
+from config import Config
+from modules.async_http_client import async_http_client
+from modules.data_merger import merge_player_data, merge_player_data_async, merge_players_data
+from modules.metrics import start_trace, end_trace
+from tests.replay_server import ReplayServer, config_overrides
+
+# Segundos por petición de cada fuente (del orden de lo que tardan las reales)
+LATENCY_PROFILE = {
+    "balldontlie": 0.08,
+    "nba_stats": 0.1,
+    "basketball_reference": 0.25,
+    "spotrac": 0.2,
+    "mistral": 0.8,
+}
+
+# Métrica -> True si un valor mayor es mejor
+COMPARED_METRICS = {"p50_ms": False, "p95_ms": False, "throughput": True, "peak_memory_kb": False}
+
+def _serve_replay(latency, ready):
+    # En otro proceso: los hilos del servidor no compiten por el GIL con el pipeline medido
+    replay = ReplayServer(latency=latency).start()
+    ready.put(replay.base_urls)
+    threading.Event().wait()
+
+def _point_sources_to(base_urls):
+    for name, value in config_overrides(base_urls).items():
+        setattr(Config, name, value)
+    # Sin límite de peticiones contra el servidor local
+    Config.HTTP_RATE_LIMITS["127.0.0.1"] = (1_000_000, 1_000_000)
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+class _PeakMemory:
+    """
+    Pico de memoria reservada por Python (tracemalloc) dentro del bloque, en KB.
+    """
+
+    def __enter__(self):
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+        return False
+
+# --- Escenarios: reciben los jugadores y el bloque de medida, devuelven (segundos, latencias, trazas) ---
+
+def _sequential(player_names):
+    latencies, traces = [], []
+    started = time.perf_counter()
+    for player_name in player_names:
+        token = start_trace()
+        query_started = time.perf_counter()
+        merge_player_data(player_name)
+        latencies.append(time.perf_counter() - query_started)
+        traces.append(end_trace(token))
+    return time.perf_counter() - started, latencies, traces
+
+def single_cold(player_names, measure):
+    with measure:
+        return _sequential(player_names)
+
+def single_warm(player_names, measure):
+    _sequential(player_names)
+    with measure:
+        return _sequential(player_names)
+
+def single_cold_async(player_names, measure):
+    async def run():
+        latencies, traces = [], []
+        started = time.perf_counter()
+        try:
+            for player_name in player_names:
+                token = start_trace()
+                query_started = time.perf_counter()
+                await merge_player_data_async(player_name)
+                latencies.append(time.perf_counter() - query_started)
+                traces.append(end_trace(token))
+        finally:
+            await async_http_client.aclose()
+        return time.perf_counter() - started, latencies, traces
+
+    with measure:
+        return asyncio.run(run())
+
+def batch_cold(player_names, measure):
+    # Latencia de cada jugador = desde el inicio del lote hasta que llega su resultado
+    with measure:
+        started = time.perf_counter()
+        latencies = [time.perf_counter() - started for _ in merge_players_data(player_names)]
+        return time.perf_counter() - started, latencies, []
+
+SCENARIOS = {
+    "single_cold": single_cold,
+    "single_warm": single_warm,
+    "single_cold_async": single_cold_async,
+    "batch_cold": batch_cold,
+}
+
+def _stage_summary(traces):
+    stages = {}
+    for trace in traces:
+        for stage, seconds in trace:
+            # Las peticiones HTTP se ven en la etapa de cada fuente; aquí todas serían "127.0.0.1"
+            if not stage.startswith("http_"):
+                stages.setdefault(stage, []).append(seconds)
+    return {stage: {"p50_ms": round(_percentile(values, 0.5) * 1000, 2),
+                    "p95_ms": round(_percentile(values, 0.95) * 1000, 2)}
+            for stage, values in sorted(stages.items())}
+
+def run_scenario(name, count):
+    scenario = SCENARIOS[name]
+    label = name.replace("_", " ").title().replace(" ", "")
+    elapsed, latencies, traces = scenario([f"{label} Timing {i}" for i in range(count)], contextlib.nullcontext())
+    memory = _PeakMemory()
+    scenario([f"{label} Memory {i}" for i in range(count)], memory)
+    return {
+        "queries": len(latencies),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "throughput": round(len(latencies) / elapsed, 2),
+        "peak_memory_kb": round(memory.peak_kb, 1),
+        "stages": _stage_summary(traces),
+    }
+
+def _report(results):
+    print(f"{'escenario':<20} {'p50':>10} {'p95':>10} {'consultas/s':>12} {'memoria pico':>14}")
+    for name, result in results["scenarios"].items():
+        print(f"{name:<20} {result['p50_ms']:>7.1f} ms {result['p95_ms']:>7.1f} ms "
+              f"{result['throughput']:>12.2f} {result['peak_memory_kb']:>11.0f} KB")
+    for name, result in results["scenarios"].items():
+        if result["stages"]:
+            print(f"\n{name}: etapas (p50 / p95)")
+            for stage, timing in result["stages"].items():
+                print(f"  {stage:<24} {timing['p50_ms']:>8.1f} / {timing['p95_ms']:>8.1f} ms")
+
+def compare(results, baseline, tolerance):
+    """
+    Imprime la variación de cada métrica respecto a `baseline` y devuelve las que empeoran más de `tolerance`.
+    """
+    if results["meta"]["latency_scale"] != baseline["meta"].get("latency_scale"):
+        print("⚠️ La línea base se midió con otra escala de latencia: la comparación no es fiable")
+
+    regressions = []
+    print(f"\n{'escenario':<20} {'métrica':<16} {'base':>10} {'actual':>10} {'cambio':>8}")
+    for name, result in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = previous.get(metric), result[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            mark = "❌" if worse > tolerance else ("✅" if worse < -tolerance else "")
+            print(f"{name:<20} {metric:<16} {before:>10.1f} {after:>10.1f} {change:>+7.0%} {mark}")
+            if worse > tolerance:
+                regressions.append((name, metric, before, after))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20, help="Consultas por escenario individual")
+    parser.add_argument("--batch", type=int, default=24, help="Jugadores del lote")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplica LATENCY_PROFILE (0 = sin latencia)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Guarda los resultados en JSON (sirve como línea base)")
+    parser.add_argument("--baseline", help="Resultados anteriores con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Empeoramiento máximo admitido (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    latency = {source: seconds * args.latency_scale for source, seconds in LATENCY_PROFILE.items()}
+    ready = multiprocessing.Queue()
+    replay = multiprocessing.Process(target=_serve_replay, args=(latency, ready), daemon=True)
+    replay.start()
+    _point_sources_to(ready.get(timeout=30))
+
+    results = {
+        "meta": {
+            "latency_scale": args.latency_scale,
+            "queries": args.queries,
+            "batch": args.batch,
+            "python": platform.python_version(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        results["scenarios"][name] = run_scenario(name, args.batch if name == "batch_cold" else args.queries)
+    replay.terminate()
+
+    _report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} métricas empeoran más de un {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Prueba de carga del pipeline de consulta contra las fuentes grabadas (tests.replay_server).
+
+Compara el modo síncrono (un hilo por consulta, como Flask) con el modo asíncrono (ASGI, una
+tarea por consulta) para las mismas fuentes con la misma latencia. Cada consulta usa un jugador
+distinto para que ninguna se sirva desde caché, y no se llama al LLM.
+
+Uso (desde backend/):
+    PYTHONPATH=.:root_files python -m benchmarks.load_test [--requests 200] [--latency 0.2]
+        [--workers 8] [--concurrency 200]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Caché e índice en un directorio temporal: la prueba no toca los datos locales
+_tmp_dir = tempfile.mkdtemp(prefix="load_test_")
+os.environ["CACHE_DB_PATH"] = os.path.join(_tmp_dir, "cache.sqlite3")
+os.environ["PLAYER_INDEX_DB_PATH"] = os.path.join(_tmp_dir, "index.sqlite3")
+os.environ["SNAPSHOT_DB_PATH"] = os.path.join(_tmp_dir, "snapshots.sqlite3")
+os.environ.setdefault("HTTP_POOL_SIZE", "256")
+
+from config import Config
+from modules.data_merger import merge_player_data, merge_player_data_async
+from tests.replay_server import ReplayServer, config_overrides
+
+def _serve_replay(latency, ready):
+    # En otro proceso: los hilos del servidor no compiten por el GIL con el cliente medido
+    replay = ReplayServer(latency=latency).start()
+    ready.put(replay.base_urls)
+    threading.Event().wait()
+
+def _point_sources_to(base_urls):
+    for name, value in config_overrides(base_urls).items():
+        setattr(Config, name, value)
+    # Sin límite de peticiones contra el servidor local
+    Config.HTTP_RATE_LIMITS["127.0.0.1"] = (1_000_000, 1_000_000)
+
+def _timed_call(func, *args):
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+def run_sync(player_names, workers):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(lambda name: _timed_call(merge_player_data, name, False), player_names))
+    return time.perf_counter() - started, latencies
+
+async def run_async(player_names, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(player_name):
+        async with semaphore:
+            started = time.perf_counter()
+            await merge_player_data_async(player_name, include_analysis=False)
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(player_name) for player_name in player_names))
+    return time.perf_counter() - started, latencies
+
+def _report(label, elapsed, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<28} {len(latencies) / elapsed:8.1f} consultas/s | "
+          f"p50 {statistics.median(latencies) * 1000:7.0f} ms | p95 {p95 * 1000:7.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia simulada por petición externa (s)")
+    parser.add_argument("--workers", type=int, default=8, help="Hilos del modo síncrono")
+    parser.add_argument("--concurrency", type=int, default=200, help="Consultas simultáneas del modo asíncrono")
+    args = parser.parse_args()
+
+    ready = multiprocessing.Queue()
+    replay = multiprocessing.Process(target=_serve_replay, args=(args.latency, ready), daemon=True)
+    replay.start()
+    _point_sources_to(ready.get(timeout=30))
+    print(f"{args.requests} consultas, latencia por fuente {args.latency * 1000:.0f} ms")
+
+    _report(f"síncrono ({args.workers} hilos)", *run_sync(
+        [f"Sync Player {i}" for i in range(args.requests)], args.workers))
+    _report(f"asíncrono ({args.concurrency} tareas)", *asyncio.run(run_async(
+        [f"Async Player {i}" for i in range(args.requests)], args.concurrency)))
+    replay.terminate()
+
+if __name__ == "__main__":
+    main()
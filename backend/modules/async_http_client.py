@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+import httpx
+from config import Config
+from modules.http_client import RETRY_STATUSES, check_upstream, http_client, remaining_time, retry_delay
+from modules.resilience import ThrottledError, UpstreamError
+from modules.snapshot_store import record_response
+from modules.metrics import upstream_duration, source_errors, add_to_trace
+
+#Objetivo: Equivalente asíncrono de http_client para el modo ASGI: un httpx.AsyncClient con
+# keep-alive por host, mismos reintentos y el mismo presupuesto de peticiones por host.
+
+class AsyncHttpClient:
+    """
+    Clientes `httpx.AsyncClient` por host. Se crean en el event loop en el que se usan.
+    """
+
+    def __init__(self, max_retries=None, backoff_base=None):
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.HTTP_BACKOFF_BASE if backoff_base is None else backoff_base
+        self._clients = {}
+        self._loop = None
+
+    def _client(self, origin):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Un AsyncClient no puede cambiar de event loop: se empieza de cero en el nuevo
+            self._clients = {}
+            self._loop = loop
+        entry = self._clients.get(origin)
+        if entry is None:
+            limits = httpx.Limits(max_connections=Config.ASYNC_HTTP_MAX_CONNECTIONS,
+                                  max_keepalive_connections=Config.ASYNC_HTTP_MAX_CONNECTIONS)
+            client = httpx.AsyncClient(base_url=origin, limits=limits,
+                                       headers={"User-Agent": Config.HTTP_USER_AGENT})
+            # httpx recorre toda su cola de espera en cada petición que termina: con cientos de
+            # peticiones encoladas el event loop se satura, así que la espera se hace aquí
+            entry = self._clients[origin] = (client, asyncio.Semaphore(Config.ASYNC_HTTP_MAX_CONNECTIONS))
+        return entry
+
+    async def get(self, url, headers=None, params=None, timeout=None):
+        """
+        GET asíncrono con timeout obligatorio y los mismos reintentos que `HttpClient.get`.
+        """
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client, slots = self._client(origin)
+        bucket = http_client.bucket(url)
+        timeout = timeout or Config.REQUEST_TIMEOUT
+
+        for attempt in range(self.max_retries + 1):
+            wait = bucket.reserve(remaining_time())
+            if wait is None:
+                source_errors.inc(source=origin, reason="throttled")
+                raise ThrottledError(f"{parts.hostname}: sin hueco en el límite de peticiones antes del plazo")
+            if wait:
+                await asyncio.sleep(wait)
+            started = time.perf_counter()
+            try:
+                async with slots:
+                    response = await client.get(url, headers=headers, params=params, timeout=timeout)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                elapsed = time.perf_counter() - started
+                upstream_duration.observe(elapsed, host=origin, status="error")
+                source_errors.inc(source=origin, reason=type(e).__name__)
+                add_to_trace(f"http_{parts.hostname}", elapsed)
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_delay(attempt, self.backoff_base)
+                logging.warning(f"🔁 Error de conexión con {origin} ({str(e)}), reintento en {delay:.2f}s")
+            else:
+                elapsed = time.perf_counter() - started
+                upstream_duration.observe(elapsed, host=origin, status=response.status_code)
+                add_to_trace(f"http_{parts.hostname}", elapsed)
+                if response.status_code >= 400:
+                    source_errors.inc(source=origin, reason=f"http_{response.status_code}")
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                delay = retry_delay(attempt, self.backoff_base, response)
+                logging.warning(f"🔁 {origin} respondió {response.status_code}, reintento en {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client, _ in clients:
+            await client.aclose()
+
+async_http_client = AsyncHttpClient()
+
+async def async_http_get(url, headers=None, params=None, timeout=None):
+    return await async_http_client.get(url, headers=headers, params=params, timeout=timeout)
+
+async def run_steps_async(steps):
+    """
+    Versión asíncrona de `http_client.run_steps`: mismos generadores de pasos, peticiones con httpx.
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                response = await async_http_get(request.url, headers=request.headers, params=request.params)
+            except httpx.HTTPError as e:
+                raise UpstreamError(f"{urlsplit(request.url).hostname}: {str(e)}") from e
+            record_response(request, response)
+            request = steps.send(check_upstream(request, response))
+    except StopIteration as stop:
+        return stop.value
@@ -1,47 +1,151 @@
-import requests
 import logging
+from modules.cache import cached, player_cache, MISSING
+from modules.http_client import http_get, run_steps, HttpRequest
+from modules.async_http_client import run_steps_async
+from modules.resilience import UpstreamError
+from modules.player_index import player_index
 from config import Config
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+def _format_player(player):
+    return {
+        "id": player.get("id"),
+        "name": f"{player.get('first_name', '')} {player.get('last_name', '')}",
+        "position": player.get("position", "Desconocida"),
+        "height": f"{player.get('height_feet', 'N/A')} ft {player.get('height_inches', 'N/A')} in",
+        "weight": f"{player.get('weight_pounds', 'N/A')} lbs",
+        "team": {
+            "name": player["team"]["full_name"],
+            "abbreviation": player["team"]["abbreviation"],
+            "conference": player["team"]["conference"],
+            "division": player["team"]["division"]
+        }
+    }
 
+def _player_data_steps(player_name):
+    """
+    Pasos HTTP para obtener la ficha del jugador (compartidos por la versión síncrona y la asíncrona).
+    """
+    headers = {"Authorization": f"Bearer {Config.BALLDONTLIE_API_KEY}"}
+
+    # Si el jugador ya se resolvió alguna vez, ir directamente a su ficha
+    player_id = player_index.resolve("balldontlie", player_name)
+    if player_id:
+        url = f"{Config.BALLDONTLIE_API_URL}players/{player_id}"
+    else:
+        url = f"{Config.BALLDONTLIE_API_URL}players?search={player_name.replace(' ', '%20')}"
+
+    logging.info(f"🔎 Llamando a balldontlie.io: {url}")
+
+    response = yield HttpRequest(url, headers=headers)
+
+    if response.status_code != 200:
+        logging.warning(f"⚠️ Error en la API de balldontlie.io: {response.status_code}")
+        return None
+
+    data = response.json()
+
+    # /players/<id> devuelve un objeto, la búsqueda una lista
+    if isinstance(data.get('data'), dict):
+        return _format_player(data['data'])
+
+    if 'data' in data and len(data['data']) > 0:
+        player = _format_player(data['data'][0])
+        player_index.register("balldontlie", player_name, player["id"], player["name"].strip())
+        return player
+
+    logging.warning(f"⚠️ No se encontró información para {player_name}")
+    return None
+
+@cached("player_info")
 def get_nba_player_data(player_name):
     """
     Obtiene información de un jugador desde la API de balldontlie.io.
     """
+    try:
+        return run_steps(_player_data_steps(player_name))
+    except UpstreamError:
+        raise
+    except Exception as e:
+        logging.error(f"❌ Error en get_nba_player_data: {str(e)}")
+        return None
+
+@cached("player_info")
+async def get_nba_player_data_async(player_name):
+    """
+    Versión asíncrona de `get_nba_player_data` (modo ASGI).
+    """
+    try:
+        return await run_steps_async(_player_data_steps(player_name))
+    except UpstreamError:
+        raise
+    except Exception as e:
+        logging.error(f"❌ Error en get_nba_player_data_async: {str(e)}")
+        return None
+
+def prefetch_nba_players_data(player_names):
+    """
+    Carga en caché varios jugadores con una sola llamada `players?ids[]=...` de balldontlie.io.
+
+    Solo sirve para jugadores cuyo ID ya se conoce y que no están en caché; el resto se
+    resolverá con la búsqueda normal. Devuelve cuántos jugadores se han precargado.
+    """
+    pending = {}
+    for player_name in player_names:
+        player_id = player_index.resolve("balldontlie", player_name)
+        if player_id and player_cache.get("player_info", player_name) is MISSING:
+            pending[player_id] = player_name
+    if not pending:
+        return 0
+
     try:
         headers = {"Authorization": f"Bearer {Config.BALLDONTLIE_API_KEY}"}
-        url = f"{Config.BALLDONTLIE_API_URL}players?search={player_name.replace(' ', '%20')}"
-        
-        logging.info(f"🔎 Llamando a balldontlie.io: {url}")
-        
-        response = requests.get(url, headers=headers, timeout=Config.REQUEST_TIMEOUT)
-        
+        params = [("ids[]", player_id) for player_id in pending] + [("per_page", len(pending))]
+        logging.info(f"🔎 Llamando a balldontlie.io para {len(pending)} jugadores")
+
+        response = http_get(f"{Config.BALLDONTLIE_API_URL}players", headers=headers, params=params)
         if response.status_code != 200:
             logging.warning(f"⚠️ Error en la API de balldontlie.io: {response.status_code}")
-            return None
-        
-        data = response.json()
-        
-        if 'data' in data and len(data['data']) > 0:
-            player = data['data'][0]
-            return {
-                "id": player.get("id"),
-                "name": f"{player.get('first_name', '')} {player.get('last_name', '')}",
-                "position": player.get("position", "Desconocida"),
-                "height": f"{player.get('height_feet', 'N/A')} ft {player.get('height_inches', 'N/A')} in",
-                "weight": f"{player.get('weight_pounds', 'N/A')} lbs",
-                "team": {
-                    "name": player["team"]["full_name"],
-                    "abbreviation": player["team"]["abbreviation"],
-                    "conference": player["team"]["conference"],
-                    "division": player["team"]["division"]
-                }
-            }
-
-        logging.warning(f"⚠️ No se encontró información para {player_name}")
-        return None
+            return 0
+
+        prefetched = 0
+        for player in response.json().get("data", []):
+            player_name = pending.get(str(player.get("id")))
+            if player_name:
+                player_cache.set("player_info", player_name, _format_player(player))
+                prefetched += 1
+        return prefetched
 
     except Exception as e:
-        logging.error(f"❌ Error en get_nba_player_data: {str(e)}")
-        return None
+        logging.error(f"❌ Error en prefetch_nba_players_data: {str(e)}")
+        return 0
+
+def list_active_players(page_size=100):
+    """
+    Nombres de todos los jugadores en activo (`players/active` de balldontlie.io, paginado por cursor).
+
+    De paso guarda el ID de cada uno en el índice de jugadores, así `get_nba_player_data` va
+    directamente a su ficha sin búsqueda. Lanza `UpstreamError` si la API no responde.
+    """
+    headers = {"Authorization": f"Bearer {Config.BALLDONTLIE_API_KEY}"}
+    player_names, cursor = [], None
+    while True:
+        params = [("per_page", page_size)] + ([("cursor", cursor)] if cursor else [])
+        logging.info(f"🔎 Llamando a balldontlie.io: players/active (cursor {cursor})")
+        try:
+            response = http_get(f"{Config.BALLDONTLIE_API_URL}players/active", headers=headers, params=params)
+        except Exception as e:
+            raise UpstreamError(f"balldontlie.io no respondió al listar jugadores: {str(e)}") from e
+        if response.status_code != 200:
+            raise UpstreamError(f"balldontlie.io respondió {response.status_code} al listar jugadores",
+                                response.status_code)
+
+        data = response.json()
+        for player in data.get("data", []):
+            player_name = f"{player.get('first_name', '')} {player.get('last_name', '')}".strip()
+            if player_name:
+                player_index.register("balldontlie", player_name, player.get("id"), player_name)
+                player_names.append(player_name)
+
+        cursor = (data.get("meta") or {}).get("next_cursor")
+        if not cursor:
+            return player_names
@@ -1,22 +1,32 @@
-import requests
 from bs4 import BeautifulSoup
 import logging
-
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+import os
+from modules.cache import cached
+from modules.http_client import run_steps, HttpRequest
+from modules.async_http_client import run_steps_async
+from modules.resilience import UpstreamError
+from modules.bref_parser import parse_per_game_stats, per_game_fingerprint
+from modules.conditional_fetch import conditional_page_steps
+from modules.player_index import player_index
+from modules.season_store import season_store, changed_season_rows
+from config import Config
 
 BASKETBALL_REFERENCE_URL = "https://www.basketball-reference.com"
 
-def get_historical_stats(player_name):
+def _base_url():
+    return (Config.BASKETBALL_REFERENCE_URL or BASKETBALL_REFERENCE_URL).rstrip("/")
+
+def _historical_stats_steps(player_name):
     """
-    Obtiene estadísticas avanzadas de un jugador desde Basketball Reference.
+    Pasos HTTP para obtener el histórico por temporadas (compartidos por la versión síncrona y la asíncrona).
     """
-    try:
-        # 🔎 1️⃣ Buscar la URL del jugador
-        search_url = f"{BASKETBALL_REFERENCE_URL}/search/search.fcgi?search={player_name.replace(' ', '+')}"
+    # 🔎 1️⃣ Buscar la URL del jugador (solo si no está en el índice local)
+    player_path = player_index.resolve("basketball_reference", player_name)
+    if not player_path:
+        search_url = f"{_base_url()}/search/search.fcgi?search={player_name.replace(' ', '+')}"
         logging.info(f"📊 Buscando en Basketball Reference: {search_url}")
-        
-        response = requests.get(search_url)
+
+        response = yield HttpRequest(search_url)
         soup = BeautifulSoup(response.text, "html.parser")
 
         # Extraer la URL del jugador
@@ -24,59 +34,76 @@ def get_historical_stats(player_name):
         if not player_link:
             logging.warning(f"⚠️ No se encontró perfil para {player_name}")
             return None
-        
-        player_url = BASKETBALL_REFERENCE_URL + player_link.text.strip()
-        logging.info(f"🔗 URL del jugador: {player_url}")
-
-        # 🔎 2️⃣ Extraer estadísticas del jugador
-        player_response = requests.get(player_url)
-        player_soup = BeautifulSoup(player_response.text, "html.parser")
-
-        # Posibles IDs de las tablas
-        possible_ids = ["per_game", "per_game_stats", "per_game_stats_post"]
-
-        per_game_table = None
-        for table_id in possible_ids:
-            per_game_table = player_soup.find("table", {"id": table_id})
-            if per_game_table:
-                logging.info(f"✅ Tabla encontrada con ID: {table_id}")
-                break
-
-        if not per_game_table:
-            logging.warning(f"⚠️ No se encontraron estadísticas en la tabla per_game para {player_name}")
-            return None
 
-        stats = []
-        rows = per_game_table.find("tbody").find_all("tr")
-
-        for row in rows:
-            try:
-                season = row.find("th").text.strip()
-                team = row.find("td", {"data-stat": "team_name_abbr"}).text.strip() if row.find("td", {"data-stat": "team_name_abbr"}) else "N/A"
-                points_per_game = row.find("td", {"data-stat": "pts_per_g"}).text.strip() if row.find("td", {"data-stat": "pts_per_g"}) else "0"
-                rebounds_per_game = row.find("td", {"data-stat": "trb_per_g"}).text.strip() if row.find("td", {"data-stat": "trb_per_g"}) else "0"
-                assists_per_game = row.find("td", {"data-stat": "ast_per_g"}).text.strip() if row.find("td", {"data-stat": "ast_per_g"}) else "0"
-
-                stats.append({
-                    "season": season,
-                    "team": team,
-                    "points_per_game": points_per_game,
-                    "rebounds_per_game": rebounds_per_game,
-                    "assists_per_game": assists_per_game
-                })
-            except AttributeError:
-                logging.warning(f"⚠️ Se saltó una fila en la tabla debido a datos faltantes.")
-
-        if not stats:
-            logging.warning(f"⚠️ No se encontraron estadísticas para {player_name}")
-            return None
+        player_path = player_link.text.strip()
+        player_title = soup.select_one(".search-item-name a")
+        display_name = player_title.text.split("(")[0].strip() if player_title else None
+        player_index.register("basketball_reference", player_name, player_path, display_name)
+
+    player_url = _base_url() + player_path
+    logging.info(f"🔗 URL del jugador: {player_url}")
+
+    # 🔎 2️⃣ Extraer estadísticas del jugador (sin descargar ni parsear si la página no ha cambiado)
+    parsed, changed, previous = yield from conditional_page_steps(
+        player_url, _parse_player_page, "basketball_reference", fingerprint=per_game_fingerprint)
+    table_id, stats = parsed
+
+    if not table_id:
+        logging.warning(f"⚠️ No se encontraron estadísticas en la tabla per_game para {player_name}")
+        return None
+
+    logging.info(f"✅ Tabla encontrada con ID: {table_id}")
+
+    if not stats:
+        logging.warning(f"⚠️ No se encontraron estadísticas para {player_name}")
+        return None
 
-        return stats
+    if changed:
+        # Solo las temporadas nuevas o modificadas desde la última descarga
+        _store_seasons(player_name, player_path, changed_season_rows(previous[1] if previous else None, stats))
+    return stats
 
+def _parse_player_page(page_html):
+    # [id_tabla, filas]: se guarda como JSON junto a los validadores de la página
+    return list(parse_per_game_stats(page_html))
+
+def _store_seasons(player_name, player_path, stats):
+    if not stats:
+        return
+    # El ID de Basketball Reference ("duranke01") identifica al jugador en el almacén de temporadas
+    player_id = os.path.splitext(os.path.basename(player_path))[0]
+    display_name = player_index.display_name(player_name) or player_name.strip()
+    try:
+        season_store.ingest_player_seasons(player_id, display_name, stats)
+    except Exception as e:
+        logging.error(f"❌ Error guardando temporadas de {player_name}: {str(e)}")
+
+@cached("historical_stats")
+def get_historical_stats(player_name):
+    """
+    Obtiene estadísticas avanzadas de un jugador desde Basketball Reference.
+    """
+    try:
+        return run_steps(_historical_stats_steps(player_name))
+    except UpstreamError:
+        raise
     except Exception as e:
         logging.error(f"❌ Error en get_historical_stats: {str(e)}")
         return None
 
+@cached("historical_stats")
+async def get_historical_stats_async(player_name):
+    """
+    Versión asíncrona de `get_historical_stats` (modo ASGI).
+    """
+    try:
+        return await run_steps_async(_historical_stats_steps(player_name))
+    except UpstreamError:
+        raise
+    except Exception as e:
+        logging.error(f"❌ Error en get_historical_stats_async: {str(e)}")
+        return None
+
 # 🚀 Prueba con Kevin Durant
 if __name__ == "__main__":
     player_stats = get_historical_stats("Kevin Durant")
@@ -0,0 +1,106 @@
+import re
+from lxml import html as lxml_html
+
+#Objetivo: Extraer las tablas "per game" de Basketball Reference sin construir el árbol
+# completo de la página (que es la más grande que descargamos).
+
+# Posibles IDs de las tablas, por orden de preferencia
+PER_GAME_TABLE_IDS = ("per_game", "per_game_stats", "per_game_stats_post")
+
+# Basketball Reference oculta muchas tablas dentro de comentarios HTML; al buscar sobre el
+# texto crudo se encuentran igual que las visibles.
+_PER_GAME_TABLE = re.compile(r'<table\b[^>]*\bid="(per_game[\w]*)"[^>]*>.*?</table>', re.S)
+
+# data-stat -> campo de salida. Las páginas antiguas usan team_id / g en lugar de team_name_abbr / games.
+FIELDS = {
+    "year_id": "season",
+    "season": "season",
+    "team_name_abbr": "team",
+    "team_id": "team",
+    "pos": "position",
+    "age": "age",
+    "games": "games",
+    "g": "games",
+    "mp_per_g": "minutes_per_game",
+    "fg_pct": "fg_pct",
+    "fg3_pct": "fg3_pct",
+    "ft_pct": "ft_pct",
+    "trb_per_g": "rebounds_per_game",
+    "ast_per_g": "assists_per_game",
+    "stl_per_g": "steals_per_game",
+    "blk_per_g": "blocks_per_game",
+    "tov_per_g": "turnovers_per_game",
+    "pts_per_g": "points_per_game",
+}
+TEXT_FIELDS = {"season", "team", "position"}
+INT_FIELDS = {"age", "games"}
+
+def _empty_row():
+    # Sin dato = None, no 0: una temporada sin jugar (DNP) o una fila parcial no debe contar
+    # como una temporada de 0 puntos en el almacén, la similitud ni las predicciones
+    return {
+        "season": "", "team": "N/A", "position": None, "age": None, "games": None,
+        "minutes_per_game": None, "fg_pct": None, "fg3_pct": None, "ft_pct": None,
+        "points_per_game": None, "rebounds_per_game": None, "assists_per_game": None,
+        "steals_per_game": None, "blocks_per_game": None, "turnovers_per_game": None,
+    }
+
+def _to_number(field, text):
+    if not text:
+        return None
+    try:
+        return int(text) if field in INT_FIELDS else float(text)
+    except ValueError:
+        return None
+
+def _parse_rows(table_html):
+    table = lxml_html.fragment_fromstring(table_html)
+    rows = []
+    for row in table.iterfind("tbody/tr"):
+        # Filas separadoras de cabecera que se repiten dentro del tbody
+        if "thead" in (row.get("class") or ""):
+            continue
+        parsed = _empty_row()
+        # Una sola pasada por las celdas de la fila
+        for cell in row:
+            field = FIELDS.get(cell.get("data-stat"))
+            if field is None:
+                continue
+            text = cell.text_content().strip()
+            if field in TEXT_FIELDS:
+                if text:
+                    parsed[field] = text
+            else:
+                value = _to_number(field, text)
+                if value is not None:
+                    parsed[field] = value
+        if parsed["season"]:
+            rows.append(parsed)
+    return rows
+
+def parse_per_game_tables(page_html):
+    """
+    Devuelve {id_tabla: [filas]} para todas las tablas per_game* de la página, incluidas las comentadas.
+    """
+    return {match.group(1): _parse_rows(match.group(0)) for match in _PER_GAME_TABLE.finditer(page_html)}
+
+def per_game_fingerprint(page_html):
+    """
+    Texto de todas las tablas per_game* de la página: cambia solo si cambian las estadísticas,
+    no por anuncios u otras partes dinámicas de la página.
+    """
+    return "".join(match.group(0) for match in _PER_GAME_TABLE.finditer(page_html))
+
+def parse_per_game_stats(page_html):
+    """
+    Filas tipadas de la primera tabla per_game encontrada según `PER_GAME_TABLE_IDS`.
+
+    Devuelve (id_tabla, filas) o (None, []) si la página no tiene ninguna.
+    """
+    tables = {}
+    for match in _PER_GAME_TABLE.finditer(page_html):
+        tables.setdefault(match.group(1), match.group(0))
+    for table_id in PER_GAME_TABLE_IDS:
+        if table_id in tables:
+            return table_id, _parse_rows(tables[table_id])
+    return None, []
@@ -0,0 +1,226 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import Config
+from modules.balldontlie_api import get_nba_player_data, list_active_players
+from modules.basketball_reference import get_historical_stats
+from modules.spotrac_scraper import get_contract_info
+from modules.player_names import normalize_player_name
+from modules.resilience import CLOSED, UpstreamError, circuit_breaker
+from modules.season_store import season_store
+
+#Objetivo: Cargar de noche toda la liga (ficha, temporadas y contrato de cada jugador en activo)
+# con los mismos fetchers que las consultas, sin pasarse del límite de peticiones de cada fuente
+# y pudiendo reanudar una carga interrumpida donde se quedó.
+
+FETCHERS = {
+    "player_info": get_nba_player_data,
+    "historical_stats": get_historical_stats,
+    "contract_info": get_contract_info,
+}
+
+# Resultado de cada trabajo (fuente, jugador)
+DONE, FAILED, SKIPPED = "done", "failed", "skipped"
+
+class Checkpoint:
+    """
+    Trabajos (fuente, jugador) ya guardados, en un fichero de una línea JSON por trabajo.
+
+    Solo se añaden líneas, así que un proceso interrumpido a mitad de escritura deja como
+    mucho una línea incompleta, que se ignora al reanudar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._done = set()
+
+    def load(self):
+        self._done.clear()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._done.add((entry["source"], entry["player_key"]))
+        return len(self._done)
+
+    def __contains__(self, job):
+        source, player_name = job
+        return (source, normalize_player_name(player_name)) in self._done
+
+    def record(self, jobs):
+        if not jobs:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for source, player_name in jobs:
+                player_key = normalize_player_name(player_name)
+                f.write(json.dumps({"source": source, "player_key": player_key}) + "\n")
+                self._done.add((source, player_key))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        self._done.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class BulkIngest:
+    """
+    Carga masiva: un pool de hilos por fuente que refresca cada jugador con `fetcher.refresh`.
+
+    Los pools son por fuente para que Basketball Reference (la fuente más lenta, ~20 peticiones/min)
+    no deje sin hilos a las demás; el ritmo de cada host lo siguen marcando los token buckets del
+    cliente HTTP compartido. Las temporadas se escriben en el almacén por lotes de
+    `batch_players` jugadores y solo entonces se apuntan en el checkpoint, así lo que está en el
+    checkpoint está siempre guardado. Si una fuente sigue fallando tras los reintentos, sus
+    trabajos restantes se saltan y quedan pendientes para la siguiente ejecución.
+    """
+
+    def __init__(self, players, sources=None, checkpoint_path=None, workers=None, batch_players=None,
+                 max_attempts=None, max_minutes=None):
+        self.players = list(dict.fromkeys(p.strip() for p in players if p and p.strip()))
+        self.sources = list(sources or FETCHERS)
+        self.checkpoint = Checkpoint(checkpoint_path or Config.BULK_INGEST_CHECKPOINT_PATH)
+        self.workers = workers or Config.BULK_INGEST_WORKERS
+        self.batch_players = batch_players or Config.BULK_INGEST_BATCH_PLAYERS
+        self.max_attempts = max_attempts or Config.BULK_INGEST_MAX_ATTEMPTS
+        self.max_minutes = Config.BULK_INGEST_MAX_MINUTES if max_minutes is None else max_minutes
+        self._down = set()           # Fuentes que siguen fallando tras los reintentos
+        self._stop = threading.Event()
+        self._deadline = None
+
+    def _ingest(self, source, player_name):
+        """
+        Refresca una fuente de un jugador (en un hilo del pool de la fuente). Devuelve DONE, FAILED o SKIPPED.
+        """
+        if source in self._down or self._stop.is_set() or time.monotonic() > self._deadline:
+            return SKIPPED
+        breaker = circuit_breaker(source)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                FETCHERS[source].refresh(player_name)
+                return DONE
+            except UpstreamError as e:
+                logging.warning(f"⚠️ {source} falló para {player_name} (intento {attempt}): {str(e)}")
+                if attempt < self.max_attempts:
+                    # Con el circuito abierto, esperar a que deje pasar otra prueba
+                    pause = breaker.reset_timeout if breaker.state != CLOSED else Config.HTTP_BACKOFF_BASE * attempt
+                    if self._stop.wait(pause):
+                        return SKIPPED
+            except Exception as e:
+                logging.error(f"❌ Error cargando {source} de {player_name}: {str(e)}")
+                return FAILED
+        if source not in self._down:
+            self._down.add(source)
+            logging.error(f"❌ {source} sigue fallando: se salta el resto de sus jugadores en esta ejecución")
+        return FAILED
+
+    def _commit(self, pending):
+        # Primero las temporadas, después el checkpoint: nunca se apunta algo que no se ha guardado
+        season_store.flush()
+        self.checkpoint.record(pending)
+        pending.clear()
+
+    def run(self, restart=False):
+        """
+        Ejecuta la carga (reanudando el checkpoint salvo con `restart`). Devuelve un resumen con
+        jugadores completados, fallos por fuente y jugadores por minuto.
+        """
+        if restart:
+            self.checkpoint.clear()
+        resumed = self.checkpoint.load()
+        jobs = [(source, p) for p in self.players for source in self.sources if (source, p) not in self.checkpoint]
+        remaining = {}
+        for _, player_name in jobs:
+            remaining[player_name] = remaining.get(player_name, 0) + 1
+        if resumed:
+            logging.info(f"⏯️ Reanudando carga: {resumed} trabajos ya hechos, quedan {len(jobs)}")
+        logging.info(f"🌙 Carga masiva de {len(remaining)} jugadores ({', '.join(self.sources)})")
+
+        summary = {source: {DONE: 0, FAILED: 0, SKIPPED: 0} for source in self.sources}
+        players_done, pending = 0, []
+        started = time.monotonic()
+        self._deadline = started + self.max_minutes * 60
+        self._stop.clear()
+        pools = {source: ThreadPoolExecutor(max_workers=self.workers.get(source, 1),
+                                            thread_name_prefix=f"ingest-{source}")
+                 for source in self.sources}
+        try:
+            with season_store.batched():
+                futures = {pools[source].submit(self._ingest, source, player_name): (source, player_name)
+                           for source, player_name in jobs}
+                for future in as_completed(futures):
+                    source, player_name = futures[future]
+                    result = future.result()
+                    summary[source][result] += 1
+                    if result != DONE:
+                        continue
+                    pending.append((source, player_name))
+                    remaining[player_name] -= 1
+                    if remaining[player_name] == 0:
+                        players_done += 1
+                        if players_done % self.batch_players == 0:
+                            self._commit(pending)
+                            minutes = (time.monotonic() - started) / 60
+                            rate = players_done / minutes if minutes else 0.0
+                            eta = (len(remaining) - players_done) / rate if rate else 0.0
+                            logging.info(f"📈 {players_done}/{len(remaining)} jugadores "
+                                         f"({rate:.1f}/min, quedan ~{eta:.0f} min)")
+                self._commit(pending)
+        finally:
+            # Ctrl+C o error: los hilos dejan de empezar trabajos y lo ya guardado queda en el checkpoint
+            self._stop.set()
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            if pending:
+                self._commit(pending)
+
+        minutes = (time.monotonic() - started) / 60
+        complete = all(counts[FAILED] == 0 and counts[SKIPPED] == 0 for counts in summary.values())
+        if complete:
+            # Carga terminada: la siguiente ejecución empieza de cero
+            self.checkpoint.clear()
+        report = {
+            "players": len(self.players),
+            "players_completed": players_done,
+            "resumed_jobs": resumed,
+            "complete": complete,
+            "minutes": round(minutes, 2),
+            "players_per_minute": round(players_done / minutes, 1) if minutes else 0.0,
+            "sources": summary,
+        }
+        logging.info(f"✅ Carga masiva: {players_done} jugadores en {minutes:.1f} min "
+                     f"({report['players_per_minute']}/min)")
+        return report
+
+def _read_players(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga nocturna de toda la liga en la caché y el almacén de temporadas")
+    parser.add_argument("--players-file", help="Un jugador por línea (por defecto, todos los jugadores en activo)")
+    parser.add_argument("--sources", nargs="+", choices=list(FETCHERS), help="Fuentes a cargar (por defecto, todas)")
+    parser.add_argument("--checkpoint", default=Config.BULK_INGEST_CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="Ignora el checkpoint y empieza de cero")
+    parser.add_argument("--max-minutes", type=float, default=Config.BULK_INGEST_MAX_MINUTES,
+                        help="Al agotarse, se deja de empezar trabajos; lo pendiente se reanuda en la siguiente ejecución")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=Config.LOG_LEVEL)
+    players = _read_players(args.players_file) if args.players_file else list_active_players()
+    report = BulkIngest(players, args.sources, args.checkpoint, max_minutes=args.max_minutes).run(args.restart)
+    print(json.dumps(report, indent=2))
+
+# Uso (desde backend/): PYTHONPATH=.:root_files python -m modules.bulk_ingest [--players-file jugadores.txt]
+if __name__ == "__main__":
+    main()
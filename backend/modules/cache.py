@@ -0,0 +1,360 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from modules.player_names import normalize_player_name
+from modules.metrics import cache_lookups, stale_responses
+from modules.resilience import (CACHED, CLOSED, FRESH, STALE, UNAVAILABLE, ThrottledError, UpstreamError,
+                                circuit_breaker, freshness)
+from modules.singleflight import SingleFlight, AsyncSingleFlight
+
+#Objetivo: Evitar ir a la red para jugadores consultados recientemente.
+# Nivel 1: LRU acotado en memoria. Nivel 2: SQLite en disco compartido entre procesos.
+
+MISSING = object()
+
+class TieredCache:
+    """
+    Caché de dos niveles (LRU en memoria + SQLite) con TTL por fuente.
+
+    Las claves son (fuente, nombre normalizado), así "kevin durant" y "Kevin  Durant"
+    comparten entrada. Los valores deben ser serializables a JSON y se tratan como de solo lectura.
+    """
+
+    def __init__(self, db_path, max_entries, ttls):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    def _connection(self):
+        # Se abre al primer uso para no crear el fichero al importar el módulo
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS cache_entries (
+                       source TEXT NOT NULL,
+                       player_key TEXT NOT NULL,
+                       value TEXT NOT NULL,
+                       stored_at REAL NOT NULL,
+                       expires_at REAL NOT NULL,
+                       PRIMARY KEY (source, player_key)
+                   )"""
+            )
+        return self._db
+
+    def _remember(self, key, expires_at, stored_at, value):
+        self._memory[key] = (expires_at, stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, source, player_name):
+        """
+        Devuelve el valor vigente o `MISSING` si no está en caché o ha caducado.
+        """
+        entry = self.get_entry(source, player_name)
+        return entry if entry is MISSING else entry[0]
+
+    def get_entry(self, source, player_name):
+        """
+        Como `get`, pero devuelve (valor, guardado_en) para saber la antigüedad del valor.
+        """
+        key = (source, normalize_player_name(player_name))
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                cache_lookups.inc(source=source, result="memory_hit")
+                return entry[2], entry[1]
+            self._memory.pop(key, None)
+
+            row = self._connection().execute(
+                "SELECT value, stored_at, expires_at FROM cache_entries WHERE source = ? AND player_key = ?", key
+            ).fetchone()
+            if row and row[2] > now:
+                value = json.loads(row[0])
+                self._remember(key, row[2], row[1], value)
+                self._stats["disk_hits"] += 1
+                cache_lookups.inc(source=source, result="disk_hit")
+                return value, row[1]
+
+            self._stats["misses"] += 1
+            cache_lookups.inc(source=source, result="miss")
+            return MISSING
+
+    def get_stale(self, source, player_name):
+        """
+        Último valor guardado aunque haya caducado, como (valor, guardado_en), o `MISSING`.
+
+        Las entradas caducadas siguen en disco hasta que se sobrescriben o se invalidan.
+        """
+        key = (source, normalize_player_name(player_name))
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                return entry[2], entry[1]
+            row = self._connection().execute(
+                "SELECT value, stored_at FROM cache_entries WHERE source = ? AND player_key = ?", key
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else MISSING
+
+    def set(self, source, player_name, value, ttl=None):
+        """
+        Guarda un valor en ambos niveles con el TTL de la fuente (o el indicado).
+        """
+        key = (source, normalize_player_name(player_name))
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttls[source])
+        with self._lock:
+            self._remember(key, expires_at, now, value)
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(value), now, expires_at),
+            )
+            db.commit()
+            self._stats["writes"] += 1
+
+    def expires_in(self, source, player_name):
+        """
+        Segundos hasta que caduque la entrada (negativo si ya caducó) o None si no existe.
+        """
+        key = (source, normalize_player_name(player_name))
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                return entry[0] - time.time()
+            row = self._connection().execute(
+                "SELECT expires_at FROM cache_entries WHERE source = ? AND player_key = ?", key
+            ).fetchone()
+        return row[0] - time.time() if row else None
+
+    def invalidate(self, player_name):
+        """
+        Elimina todas las entradas (de cualquier fuente) de un jugador. Devuelve cuántas había en disco.
+        """
+        player_key = normalize_player_name(player_name)
+        with self._lock:
+            for key in [k for k in self._memory if k[1] == player_key]:
+                del self._memory[key]
+            db = self._connection()
+            deleted = db.execute("DELETE FROM cache_entries WHERE player_key = ?", (player_key,)).rowcount
+            db.commit()
+        logging.info(f"🧹 Caché invalidada para {player_key} ({deleted} entradas)")
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            db.execute("DELETE FROM cache_entries")
+            db.commit()
+
+    def get_stats(self):
+        """
+        Contadores de aciertos y fallos, más la tasa de aciertos global.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+player_cache = TieredCache(Config.CACHE_DB_PATH, Config.CACHE_MAX_ENTRIES, Config.CACHE_TTLS)
+
+# Consultas a fuentes en curso, compartidas por todos los fetchers decorados con `cached`
+_fetch_flights = SingleFlight("fetch")
+_async_fetch_flights = AsyncSingleFlight("fetch")
+# Llamadas de prueba a fuentes con el circuito semiabierto (se hacen mientras se sirve el último valor bueno)
+_probe_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="circuit-probe")
+_probe_tasks = set()
+
+def cached(source):
+    """
+    Decorador para funciones `fetch(player_name)`: sirve desde la caché y guarda cualquier resultado
+    distinto de None (también los vacíos, como `{}` o `[]`, para no repetir consultas sin datos).
+
+    Acepta funciones normales y corrutinas (modo ASGI); ambas comparten las mismas entradas.
+    Los fallos de caché simultáneos del mismo jugador se agrupan en una sola consulta a la fuente.
+
+    Las llamadas a la fuente pasan por su circuit breaker (`resilience.circuit_breaker`): si la
+    función lanza una excepción (p. ej. `UpstreamError`) o el circuito está abierto, se devuelve
+    el último valor bueno aunque haya caducado, o None si nunca lo hubo, sin esperar a la fuente.
+    Con el circuito semiabierto la llamada de prueba se hace en segundo plano mientras tanto.
+
+    `wrapper.with_meta(player_name)` devuelve (valor, frescura) (ver `resilience.freshness`).
+    La función original queda disponible en `wrapper.uncached`, y `wrapper.refresh(player_name)`
+    vuelve a consultar la fuente ignorando la caché y guarda el resultado. `refresh` no sirve
+    valores de reserva: si la fuente falla o su circuito está abierto, lanza `UpstreamError`.
+    """
+    def decorator(func):
+        breaker = circuit_breaker(source)
+
+        def flight_key(player_name):
+            return source, normalize_player_name(player_name)
+
+        def last_good(player_name, reason):
+            stale = player_cache.get_stale(source, player_name)
+            if stale is MISSING:
+                return None, freshness(UNAVAILABLE)
+            stale_responses.inc(source=source, reason=reason)
+            value, stored_at = stale
+            return value, freshness(STALE, stored_at)
+
+        def fetched(player_name, value):
+            if value is not None:
+                player_cache.set(source, player_name, value)
+            breaker.record_success()
+            return value, freshness(FRESH if value is not None else UNAVAILABLE)
+
+        def record_error(error):
+            # Sin hueco en el límite de peticiones antes del plazo: la fuente no ha fallado
+            if isinstance(error, ThrottledError):
+                breaker.record_skipped()
+            else:
+                breaker.record_failure()
+
+        def failed(player_name, error):
+            record_error(error)
+            logging.warning(f"⚠️ {source} no respondió para {player_name}: {str(error)}")
+            return last_good(player_name, "error")
+
+        def refresh_allowed():
+            if not breaker.allow():
+                raise UpstreamError(f"Circuito de {source} abierto")
+
+        if inspect.iscoroutinefunction(func):
+            # Las lecturas y escrituras de la caché tocan SQLite: se hacen en un hilo para no parar el event loop
+            async def call(player_name):
+                try:
+                    value = await func(player_name)
+                except Exception as e:
+                    return await asyncio.to_thread(failed, player_name, e)
+                return await asyncio.to_thread(fetched, player_name, value)
+
+            async def fetch(player_name):
+                if breaker.state == CLOSED:
+                    return await call(player_name)
+                value, meta = await asyncio.to_thread(last_good, player_name, "circuit_open")
+                if breaker.allow():
+                    if value is None:
+                        # Nada que servir mientras tanto: la prueba se hace en primer plano
+                        return await call(player_name)
+                    task = asyncio.ensure_future(call(player_name))
+                    _probe_tasks.add(task)
+                    task.add_done_callback(_probe_tasks.discard)
+                return value, meta
+
+            async def with_meta(player_name):
+                entry = await asyncio.to_thread(player_cache.get_entry, source, player_name)
+                if entry is not MISSING:
+                    return entry[0], freshness(CACHED, entry[1])
+                return await _async_fetch_flights.do(flight_key(player_name), fetch, player_name)
+
+            @functools.wraps(func)
+            async def wrapper(player_name):
+                return (await with_meta(player_name))[0]
+
+            async def call_strict(player_name):
+                try:
+                    value = await func(player_name)
+                except Exception as e:
+                    record_error(e)
+                    raise
+                return (await asyncio.to_thread(fetched, player_name, value))[0]
+
+            async def refresh(player_name):
+                refresh_allowed()
+                return await _async_fetch_flights.do(("refresh",) + flight_key(player_name), call_strict, player_name)
+        else:
+            def call(player_name):
+                try:
+                    value = func(player_name)
+                except Exception as e:
+                    return failed(player_name, e)
+                return fetched(player_name, value)
+
+            def fetch(player_name):
+                if breaker.state == CLOSED:
+                    return call(player_name)
+                value, meta = last_good(player_name, "circuit_open")
+                if breaker.allow():
+                    if value is None:
+                        # Nada que servir mientras tanto: la prueba se hace en primer plano
+                        return call(player_name)
+                    _probe_executor.submit(call, player_name)
+                return value, meta
+
+            def with_meta(player_name):
+                entry = player_cache.get_entry(source, player_name)
+                if entry is not MISSING:
+                    return entry[0], freshness(CACHED, entry[1])
+                return _fetch_flights.do(flight_key(player_name), fetch, player_name)
+
+            @functools.wraps(func)
+            def wrapper(player_name):
+                return with_meta(player_name)[0]
+
+            def call_strict(player_name):
+                try:
+                    value = func(player_name)
+                except Exception as e:
+                    record_error(e)
+                    raise
+                return fetched(player_name, value)[0]
+
+            def refresh(player_name):
+                refresh_allowed()
+                return _fetch_flights.do(("refresh",) + flight_key(player_name), call_strict, player_name)
+
+        wrapper.uncached = func
+        wrapper.refresh = refresh
+        wrapper.with_meta = with_meta
+        return wrapper
+    return decorator
+
+def fetch_with_meta(fetch, *args):
+    """
+    (valor, frescura) de un fetcher. Los decorados con `cached` dan la frescura real; para
+    el resto (p. ej. el análisis de IA) el valor se considera recién obtenido.
+    """
+    with_meta = getattr(fetch, "with_meta", None)
+    if with_meta is not None:
+        return with_meta(*args)
+    value = fetch(*args)
+    return value, freshness(FRESH if value else UNAVAILABLE)
+
+async def fetch_with_meta_async(fetch, *args):
+    """
+    Versión asíncrona de `fetch_with_meta`.
+    """
+    with_meta = getattr(fetch, "with_meta", None)
+    if with_meta is not None:
+        return await with_meta(*args)
+    value = await fetch(*args)
+    return value, freshness(FRESH if value else UNAVAILABLE)
+
+def invalidate_player(player_name):
+    return player_cache.invalidate(player_name)
+
+def get_cache_stats():
+    return player_cache.get_stats()
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import Config
+from modules.http_client import HttpRequest
+from modules.metrics import page_fetches
+
+#Objetivo: No volver a descargar ni a parsear las páginas grandes (carrera en Basketball
+# Reference, perfil en Spotrac) cuando no han cambiado desde la última vez.
+
+class PageValidators:
+    """
+    Por URL: ETag, Last-Modified, hash del contenido relevante y el resultado ya parseado (JSON).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS page_validators (
+                       url TEXT PRIMARY KEY,
+                       etag TEXT,
+                       last_modified TEXT,
+                       content_hash TEXT NOT NULL,
+                       parsed TEXT NOT NULL,
+                       checked_at REAL NOT NULL
+                   )"""
+            )
+        return self._db
+
+    def get(self, url):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT etag, last_modified, content_hash, parsed FROM page_validators WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, parsed = row
+        return {"etag": etag, "last_modified": last_modified, "content_hash": content_hash, "parsed": json.loads(parsed)}
+
+    def save(self, url, etag, last_modified, content_hash, parsed):
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO page_validators VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, json.dumps(parsed, ensure_ascii=False), time.time()),
+            )
+            db.commit()
+
+    def touch(self, url, etag, last_modified):
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "UPDATE page_validators SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                "checked_at = ? WHERE url = ?",
+                (etag, last_modified, time.time(), url),
+            )
+            db.commit()
+
+    def update_parsed(self, url, parsed):
+        """
+        Sustituye el resultado parseado guardado (p. ej. al volver a parsear la página con un parser
+        corregido) sin tocar los validadores. Devuelve False si la URL no tenía entrada.
+        """
+        with self._lock:
+            db = self._connection()
+            updated = db.execute("UPDATE page_validators SET parsed = ? WHERE url = ?",
+                                 (json.dumps(parsed, ensure_ascii=False), url)).rowcount
+            db.commit()
+        return bool(updated)
+
+    def clear(self):
+        with self._lock:
+            db = self._connection()
+            db.execute("DELETE FROM page_validators")
+            db.commit()
+
+page_validators = PageValidators(Config.PAGE_VALIDATORS_DB_PATH)
+
+def conditional_page_steps(url, parse, source, fingerprint=None):
+    """
+    Paso HTTP (para `yield from`) que descarga `url` solo si ha cambiado y la parsea solo si hace falta.
+
+    1. Con validadores guardados envía If-None-Match / If-Modified-Since: un 304 no trae cuerpo.
+    2. Si el servidor no los admite, compara el hash de `fingerprint(texto)` (por defecto, toda la
+       página) con el anterior: si coincide no se parsea.
+    3. Si ha cambiado, parsea con `parse(texto)` y guarda el resultado junto a los validadores.
+
+    Devuelve (resultado, cambiado, resultado_anterior); el resultado anterior es None la primera vez.
+    """
+    validator = page_validators.get(url)
+    headers = {}
+    if validator:
+        if validator["etag"]:
+            headers["If-None-Match"] = validator["etag"]
+        if validator["last_modified"]:
+            headers["If-Modified-Since"] = validator["last_modified"]
+
+    response = yield HttpRequest(url, headers=headers or None)
+    previous = validator["parsed"] if validator else None
+
+    if response.status_code == 304 and validator:
+        page_fetches.inc(source=source, result="not_modified")
+        return previous, False, previous
+
+    text = response.text
+    if response.status_code != 200:
+        return parse(text), True, previous
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    content_hash = hashlib.sha256((fingerprint(text) if fingerprint else text).encode("utf-8")).hexdigest()
+    if validator and validator["content_hash"] == content_hash:
+        page_validators.touch(url, etag, last_modified)
+        page_fetches.inc(source=source, result="unchanged")
+        return previous, False, previous
+
+    parsed = parse(text)
+    if parsed is not None:
+        page_validators.save(url, etag, last_modified, content_hash, parsed)
+    page_fetches.inc(source=source, result="changed")
+    return parsed, True, previous
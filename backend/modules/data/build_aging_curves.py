@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from datetime import date
+from modules.season_store import season_store
+
+#Objetivo: Calcular aging_curves.json a partir de las temporadas del almacén local (método delta:
+# cambio relativo de cada estadística entre dos temporadas seguidas de un mismo jugador, por edad).
+#
+#   cd backend && PYTHONPATH=.:root_files python modules/data/build_aging_curves.py [--min-games 20]
+
+AGING_CURVES_PATH = os.path.join(os.path.dirname(__file__), "aging_curves.json")
+STAT_FIELDS = {"ppg": "points_per_game", "rpg": "rebounds_per_game", "apg": "assists_per_game"}
+AGES = list(range(18, 42))
+
+_SEASON_START = re.compile(r"^(\d{4})")
+
+def _season_start(season):
+    match = _SEASON_START.match(season or "")
+    return int(match.group(1)) if match else None
+
+def _smooth(values):
+    # Media móvil (1, 2, 1) sobre las edades con dato; los extremos se quedan con sus vecinos
+    smoothed = []
+    for i, value in enumerate(values):
+        window = [(values[j], weight) for j, weight in ((i - 1, 1), (i, 2), (i + 1, 1))
+                  if 0 <= j < len(values) and values[j] is not None]
+        smoothed.append(None if value is None else sum(v * w for v, w in window) / sum(w for _, w in window))
+    return smoothed
+
+def _fill(values):
+    # Edades sin pares suficientes: el valor de la edad con dato más cercana
+    known = [i for i, value in enumerate(values) if value is not None]
+    if not known:
+        return [0.0] * len(values)
+    return [values[min(known, key=lambda j: abs(j - i))] if value is None else value
+            for i, value in enumerate(values)]
+
+def aging_curves_from_seasons(rows, min_games=20, min_base=1.0, min_pairs=30):
+    """
+    Curvas edad -> variación relativa esperada al pasar de `age` a `age + 1`, con el formato de
+    aging_curves.json, a partir de filas de temporada completas (las de `SeasonStore.full_seasons`).
+
+    Solo cuentan pares de temporadas consecutivas con al menos `min_games` partidos y un valor de
+    partida de al menos `min_base` (evita cocientes enormes con medias casi nulas). Cada par pesa
+    la media armónica de sus partidos. Las edades con menos de `min_pairs` pares toman el valor de
+    la edad más cercana que sí los tiene.
+    """
+    by_player = defaultdict(dict)
+    for row in rows:
+        start = _season_start(row.get("season"))
+        if start is not None and row.get("age") is not None and (row.get("games") or 0) >= min_games:
+            by_player[row["player_id"]][start] = row
+
+    sums = {stat: defaultdict(float) for stat in STAT_FIELDS}
+    weights = {stat: defaultdict(float) for stat in STAT_FIELDS}
+    pairs = {stat: defaultdict(int) for stat in STAT_FIELDS}
+    for seasons in by_player.values():
+        for start, current in seasons.items():
+            following = seasons.get(start + 1)
+            if following is None:
+                continue
+            weight = 2 / (1 / current["games"] + 1 / following["games"])
+            for stat, field in STAT_FIELDS.items():
+                base, after = current.get(field), following.get(field)
+                if base is None or after is None or base < min_base:
+                    continue
+                age = current["age"]
+                sums[stat][age] += weight * (after / base - 1)
+                weights[stat][age] += weight
+                pairs[stat][age] += 1
+
+    curves = {"ages": AGES}
+    for stat in STAT_FIELDS:
+        raw = [sums[stat][age] / weights[stat][age] if pairs[stat][age] >= min_pairs else None for age in AGES]
+        curves[stat] = [round(value, 4) for value in _fill(_smooth(raw))]
+    curves["pairs"] = {stat: [pairs[stat][age] for age in AGES] for stat in STAT_FIELDS}
+    return curves
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcula aging_curves.json desde el almacén local de temporadas")
+    parser.add_argument("--min-games", type=int, default=20)
+    parser.add_argument("--min-pairs", type=int, default=30)
+    parser.add_argument("--output", default=AGING_CURVES_PATH)
+    args = parser.parse_args()
+
+    rows = season_store.full_seasons()
+    curves = aging_curves_from_seasons(rows, min_games=args.min_games, min_pairs=args.min_pairs)
+    total_pairs = sum(curves["pairs"]["ppg"])
+    if total_pairs < args.min_pairs * 10:
+        sys.exit(f"Solo {total_pairs} pares de temporadas en el almacén: carga la liga antes "
+                 "(python -m modules.bulk_ingest o python -m modules.season_store)")
+
+    output = {
+        "description": "Curva de envejecimiento de la liga: variación relativa esperada de cada estadística "
+                       "al pasar de la edad `age` a `age + 1`.",
+        "source": f"Método delta sobre {total_pairs} pares de temporadas consecutivas del almacén local "
+                  f"(mínimo {args.min_games} partidos), calculado el {date.today().isoformat()} con "
+                  "modules/data/build_aging_curves.py.",
+        **curves,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"{args.output}: {total_pairs} pares")
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,308 @@
+import asyncio
+import contextvars
+import functools
 import logging
-from modules.balldontlie_api import get_player_info
-from modules.nba_stats_api import get_advanced_stats
-from modules.basketball_reference import get_historical_stats
-from modules.spotrac_scraper import get_contract_info
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from config import Config
+from modules.balldontlie_api import get_nba_player_data, get_nba_player_data_async, prefetch_nba_players_data
+from modules.nba_stats_api import get_advanced_stats, get_advanced_stats_async
+from modules.basketball_reference import get_historical_stats, get_historical_stats_async
+from modules.spotrac_scraper import get_contract_info, get_contract_info_async
 from modules.mistral_ai import generate_player_analysis
+from modules.player_names import normalize_player_name
+from modules.records import PlayerRecord
+from modules.cache import player_cache, fetch_with_meta, fetch_with_meta_async, MISSING
+from modules.http_client import deadline
+from modules.resilience import STALE, UNAVAILABLE, freshness
+from modules.metrics import timed, source_errors, stale_responses
+from modules.singleflight import SingleFlight, AsyncSingleFlight
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Pool compartido: las fuentes son I/O, así que los hilos bastan para solaparlas
+_executor = ThreadPoolExecutor(max_workers=Config.MERGE_MAX_WORKERS, thread_name_prefix="merge")
+# Pool aparte para lotes: su tamaño es el límite global de jugadores fusionándose a la vez,
+# y al no compartirlo con las fuentes no puede bloquearse esperando por ellas.
+_batch_executor = ThreadPoolExecutor(max_workers=Config.BATCH_MAX_CONCURRENCY, thread_name_prefix="merge-batch")
+# Las fuentes de los lotes tienen su propio pool, con hilo para cada fuente de cada jugador en curso
+# (4 fuentes + análisis de IA): un lote ni espera en cola ni deja sin hilos a las consultas sueltas.
+_SOURCES_PER_MERGE = 5
+_batch_source_executor = ThreadPoolExecutor(max_workers=Config.BATCH_MAX_CONCURRENCY * _SOURCES_PER_MERGE,
+                                            thread_name_prefix="merge-batch-source")
+# Pool de fuentes de la fusión en curso (el de lotes dentro de `merge_players_data`)
+_source_executor = contextvars.ContextVar("merge_source_executor", default=None)
+# Fusiones en curso: las consultas simultáneas del mismo jugador esperan a la misma
+_merge_flights = SingleFlight("merge_player_data")
 
-def merge_player_data(player_name):
+def _run_source(started, source, func, *args):
+    started.at = time.monotonic()
+    started.set()
+    # Con el límite de peticiones del host saturado, la fuente falla al llegar a su plazo en vez de seguir esperando
+    with timed(source), deadline(Config.SOURCE_DEADLINES.get(source)):
+        return fetch_with_meta(func, *args)
+
+def _submit(source, func, *args):
+    # Copia del contexto para que los tiempos lleguen a la traza de la petición
+    started = threading.Event()
+    future = (_source_executor.get() or _executor).submit(contextvars.copy_context().run, _run_source, started, source, func, *args)
+    future.started = started
+    return future
+
+def _fallback(source, player_name, default, unavailable, freshness_by_source):
+    """
+    Valor de una fuente que no ha respondido a tiempo: el último guardado en caché (marcado como
+    caducado) o, si no hay ninguno, el valor por defecto.
+    """
+    stale = player_cache.get_stale(source, player_name) if source in player_cache.ttls else MISSING
+    if stale is MISSING:
+        unavailable.append(source)
+        freshness_by_source[source] = freshness(UNAVAILABLE)
+        return default
+    stale_responses.inc(source=source, reason="deadline")
+    value, stored_at = stale
+    freshness_by_source[source] = freshness(STALE, stored_at)
+    return value
+
+def _ready(future):
+    """
+    Resultado de una fuente si ya ha terminado bien, sin esperarla; si no, None.
+    """
+    if not future.done() or future.cancelled() or future.exception() is not None:
+        return None
+    return future.result()[0]
+
+def _collect(source, future, deadline, default, player_name, unavailable, freshness_by_source):
+    """
+    Espera el resultado de una fuente hasta su plazo y anota su frescura; si falla o se retrasa
+    devuelve el último valor en caché o el valor por defecto.
+
+    El plazo (`deadline`, segundos) cuenta desde que la fuente empieza a ejecutarse, no desde que
+    se encoló: con el pool ocupado, el tiempo en cola no se descuenta de la fuente. Para esperar
+    un hilo libre se concede como mucho otro plazo; si no llega a empezar, se cancela.
+    """
+    try:
+        if not future.started.wait(timeout=deadline):
+            future.cancel()
+            raise FutureTimeoutError()
+        remaining = max(0.0, future.started.at + deadline - time.monotonic())
+        result, meta = future.result(timeout=remaining)
+        if not result:
+            source_errors.inc(source=source, reason="no_data")
+            freshness_by_source[source] = freshness(UNAVAILABLE)
+            return default
+        freshness_by_source[source] = meta
+        return result
+    except FutureTimeoutError:
+        source_errors.inc(source=source, reason="timeout")
+        logging.warning(f"⏱️ {source} superó su plazo, se devuelven datos parciales")
+    except Exception as e:
+        source_errors.inc(source=source, reason="exception")
+        logging.error(f"❌ Error en {source}: {str(e)}")
+    return _fallback(source, player_name, default, unavailable, freshness_by_source)
+
+@timed("merge_player_data")
+def merge_player_data(player_name, include_analysis=True):
+    """
+    Combina los datos de todas las fuentes para un jugador en un `PlayerRecord`.
+
+    Las fuentes independientes se consultan en paralelo, cada una con su propio plazo
+    (`Config.SOURCE_DEADLINES`). El análisis de IA arranca en cuanto llegan el histórico y la
+    ficha; el contrato entra en el prompt solo si ya había llegado, sin esperarlo. Si una fuente
+    no responde a tiempo se devuelven los datos disponibles y su nombre aparece en
+    `unavailable_sources`; si había un valor anterior en caché se usa ese.
+    `PlayerRecord.freshness` indica por fuente si el dato es nuevo, de caché o caducado.
+
+    Con `include_analysis=False` no se llama al LLM (p. ej. cuando el análisis se envía en streaming).
+    Las consultas simultáneas del mismo jugador comparten una única fusión en curso.
+    """
+    flight_key = (normalize_player_name(player_name), include_analysis)
+    return _merge_flights.do(flight_key, _merge_player_data, player_name, include_analysis)
+
+def _merge_player_data(player_name, include_analysis):
+    logging.info(f"📊 Fusionando datos para: {player_name}")
+
+    deadlines = Config.SOURCE_DEADLINES
+    started_at = time.monotonic()
+    unavailable, field_freshness = [], {}
+    collect = functools.partial(_collect, player_name=player_name, unavailable=unavailable,
+                                freshness_by_source=field_freshness)
+
+    # Lanzar todas las fuentes independientes a la vez
+    futures = {
+        "player_info": _submit("player_info", get_nba_player_data, player_name),
+        "advanced_stats": _submit("advanced_stats", get_advanced_stats, player_name),
+        "historical_stats": _submit("historical_stats", get_historical_stats, player_name),
+        "contract_info": _submit("contract_info", get_contract_info, player_name),
+    }
+
+    # El análisis arranca en cuanto están el histórico y la ficha: no espera al contrato
+    historical_stats = collect("historical_stats", futures["historical_stats"], deadlines["historical_stats"], [])
+    player_info = collect("player_info", futures["player_info"], deadlines["player_info"], {})
+    ai_future = None
+    if include_analysis:
+        profile = PlayerRecord.from_sources(player_name, player_info, {}, historical_stats,
+                                            _ready(futures["contract_info"]), None, [])
+        ai_future = _submit("ai_analysis", generate_player_analysis, profile)
+
+    advanced_stats = collect("advanced_stats", futures["advanced_stats"], deadlines["advanced_stats"], {})
+    contract_info = collect("contract_info", futures["contract_info"], deadlines["contract_info"], {})
+    ai_analysis = {}
+    if ai_future is not None:
+        ai_analysis = collect("ai_analysis", ai_future, deadlines["ai_analysis"], {})
+
+    record = PlayerRecord.from_sources(player_name, player_info, advanced_stats, historical_stats,
+                                       contract_info, ai_analysis, unavailable, field_freshness)
+    logging.info(f"✅ Datos fusionados en {time.monotonic() - started_at:.2f}s")
+    return record
+
+def _merge_for_batch(player_name):
+    token = _source_executor.set(_batch_source_executor)
+    try:
+        return player_name, merge_player_data(player_name), None
+    except Exception as e:
+        logging.error(f"❌ Error fusionando {player_name}: {str(e)}")
+        return player_name, None, str(e)
+    finally:
+        _source_executor.reset(token)
+
+def merge_players_data(player_names):
+    """
+    Fusiona los datos de varios jugadores, devolviendo cada uno en cuanto termina.
+
+    Los nombres repetidos (tras normalizarlos) se procesan una sola vez y los jugadores ya
+    identificados en balldontlie.io se precargan con una única petición. Genera tuplas
+    (nombre, datos_fusionados, error) en orden de finalización.
     """
-    Combina los datos de todas las fuentes para un jugador en una sola estructura JSON.
+    unique_names = {}
+    for player_name in player_names:
+        player_key = normalize_player_name(player_name)
+        if player_key and player_key not in unique_names:
+            unique_names[player_key] = player_name.strip()
+
+    logging.info(f"📋 Fusionando lote de {len(unique_names)} jugadores")
+    prefetch_nba_players_data(list(unique_names.values()))
+
+    futures = [_batch_executor.submit(_merge_for_batch, player_name) for player_name in unique_names.values()]
+    for future in as_completed(futures):
+        yield future.result()
+
+# --- Modo asíncrono (ASGI) ---
+
+# Las fuentes que vencen su plazo siguen en marcha para dejar su resultado en caché;
+# asyncio solo guarda referencias débiles a las tareas, así que se retienen aquí.
+_background_tasks = set()
+_batch_semaphores = weakref.WeakKeyDictionary()   # event loop -> semáforo del lote
+_async_merge_flights = AsyncSingleFlight("merge_player_data")
+
+async def _run_source_async(source, func, *args):
+    with timed(source), deadline(Config.SOURCE_DEADLINES.get(source)):
+        return await fetch_with_meta_async(func, *args)
+
+async def _collect_async(source, task, deadline_at, default, player_name, unavailable, freshness_by_source):
+    remaining = max(0.0, deadline_at - time.monotonic())
+    try:
+        result, meta = await asyncio.wait_for(asyncio.shield(task), timeout=remaining)
+        if not result:
+            source_errors.inc(source=source, reason="no_data")
+            freshness_by_source[source] = freshness(UNAVAILABLE)
+            return default
+        freshness_by_source[source] = meta
+        return result
+    except asyncio.TimeoutError:
+        source_errors.inc(source=source, reason="timeout")
+        logging.warning(f"⏱️ {source} superó su plazo, se devuelven datos parciales")
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    except Exception as e:
+        source_errors.inc(source=source, reason="exception")
+        logging.error(f"❌ Error en {source}: {str(e)}")
+    # La caché de reserva está en SQLite: se lee en un hilo
+    return await asyncio.to_thread(_fallback, source, player_name, default, unavailable, freshness_by_source)
+
+async def _generate_player_analysis_async(record):
+    # El cliente de Mistral es síncrono: se ejecuta en un hilo para no bloquear el event loop
+    return await asyncio.to_thread(generate_player_analysis, record)
+
+@timed("merge_player_data")
+async def merge_player_data_async(player_name, include_analysis=True):
+    """
+    Versión asíncrona de `merge_player_data` (mismos plazos y misma estructura de salida).
+
+    Cada fuente es una tarea asyncio con cliente HTTP asíncrono, así que una consulta en curso
+    no ocupa ningún hilo mientras espera a las fuentes externas.
     """
+    flight_key = (normalize_player_name(player_name), include_analysis)
+    return await _async_merge_flights.do(flight_key, _merge_player_data_async, player_name, include_analysis)
+
+async def _merge_player_data_async(player_name, include_analysis):
     logging.info(f"📊 Fusionando datos para: {player_name}")
 
-    # Obtener datos de cada fuente
-    player_info = get_player_info(player_name) or {}
-    advanced_stats = get_advanced_stats(player_name) or {}
-    historical_stats = get_historical_stats(player_name) or []
-    contract_info = get_contract_info(player_name) or {}
-    ai_analysis = generate_player_analysis(player_name, historical_stats) or {}
-
-    # Estructura de salida
-    merged_data = {
-        "player": {
-            "name": player_info.get("full_name", player_name),
-            "team": player_info.get("team", "Desconocido"),
-            "position": player_info.get("position", "N/A"),
-            "height": player_info.get("height", "N/A"),
-            "weight": player_info.get("weight", "N/A"),
-            "birthdate": player_info.get("birthdate", "N/A"),
-        },
-        "stats": {
-            "current_season": advanced_stats.get("current_season", {}),
-            "historical": historical_stats
-        },
-        "contract": contract_info.get("contract_details", "No disponible"),
-        "agent": contract_info.get("agent", "No disponible"),
-        "ai_analysis": ai_analysis.get("summary", "No disponible"),
+    deadlines = Config.SOURCE_DEADLINES
+    started_at = time.monotonic()
+    unavailable, field_freshness = [], {}
+    collect = functools.partial(_collect_async, player_name=player_name, unavailable=unavailable,
+                                freshness_by_source=field_freshness)
+
+    tasks = {
+        "player_info": asyncio.create_task(_run_source_async("player_info", get_nba_player_data_async, player_name)),
+        "advanced_stats": asyncio.create_task(_run_source_async("advanced_stats", get_advanced_stats_async, player_name)),
+        "historical_stats": asyncio.create_task(_run_source_async("historical_stats", get_historical_stats_async, player_name)),
+        "contract_info": asyncio.create_task(_run_source_async("contract_info", get_contract_info_async, player_name)),
     }
 
-    logging.info("✅ Datos fusionados correctamente")
-    return merged_data
+    # El análisis arranca en cuanto están el histórico y la ficha: no espera al contrato
+    historical_stats = await collect("historical_stats", tasks["historical_stats"],
+                                     started_at + deadlines["historical_stats"], [])
+    player_info = await collect("player_info", tasks["player_info"],
+                                started_at + deadlines["player_info"], {})
+    ai_started_at = time.monotonic()
+    ai_task = None
+    if include_analysis:
+        profile = PlayerRecord.from_sources(player_name, player_info, {}, historical_stats,
+                                            _ready(tasks["contract_info"]), None, [])
+        ai_task = asyncio.create_task(_run_source_async("ai_analysis", _generate_player_analysis_async, profile))
+
+    advanced_stats = await collect("advanced_stats", tasks["advanced_stats"],
+                                   started_at + deadlines["advanced_stats"], {})
+    contract_info = await collect("contract_info", tasks["contract_info"],
+                                  started_at + deadlines["contract_info"], {})
+    ai_analysis = {}
+    if ai_task is not None:
+        ai_analysis = await collect("ai_analysis", ai_task, ai_started_at + deadlines["ai_analysis"], {})
+
+    record = PlayerRecord.from_sources(player_name, player_info, advanced_stats, historical_stats,
+                                       contract_info, ai_analysis, unavailable, field_freshness)
+    logging.info(f"✅ Datos fusionados en {time.monotonic() - started_at:.2f}s")
+    return record
+
+async def merge_players_data_async(player_names):
+    """
+    Versión asíncrona de `merge_players_data`: generador asíncrono de (nombre, datos, error).
+
+    Un semáforo de proceso limita a `Config.BATCH_MAX_CONCURRENCY` los jugadores en curso.
+    """
+    loop = asyncio.get_running_loop()
+    batch_semaphore = _batch_semaphores.get(loop)
+    if batch_semaphore is None:
+        batch_semaphore = _batch_semaphores[loop] = asyncio.Semaphore(Config.BATCH_MAX_CONCURRENCY)
+
+    unique_names = {}
+    for player_name in player_names:
+        player_key = normalize_player_name(player_name)
+        if player_key and player_key not in unique_names:
+            unique_names[player_key] = player_name.strip()
+
+    logging.info(f"📋 Fusionando lote de {len(unique_names)} jugadores")
+    await asyncio.to_thread(prefetch_nba_players_data, list(unique_names.values()))
+
+    async def merge_one(player_name):
+        async with batch_semaphore:
+            try:
+                return player_name, await merge_player_data_async(player_name), None
+            except Exception as e:
+                logging.error(f"❌ Error fusionando {player_name}: {str(e)}")
+                return player_name, None, str(e)
+
+    for next_result in asyncio.as_completed([merge_one(player_name) for player_name in unique_names.values()]):
+        yield await next_result
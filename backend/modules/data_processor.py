@@ -1,38 +1,56 @@
 import logging
-
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+from modules.metrics import timed
+from modules.prediction_model import predict_player_performance
 
 #Objetivo: Limpiar y estructurar los datos antes de combinarlos.
 
-def clean_player_data(player_data):
+NO_PREDICTIONS = {"predicted_ppg": "No disponible", "predicted_rpg": "No disponible", "predicted_apg": "No disponible"}
+
+@timed("clean_player_data")
+def clean_player_data(record):
     """
-    Limpia y formatea los datos de los jugadores antes de su procesamiento.
+    Resumen del jugador para la respuesta a partir del `PlayerRecord` fusionado.
+
+    Las estadísticas son números (o null si la fuente no respondió); ya se convirtieron al
+    construir el registro.
     """
     try:
         # Validar si hay datos disponibles
-        if not player_data:
+        if not record:
             logging.warning("⚠️ No hay datos para limpiar.")
             return {}
 
-        cleaned_data = {
-            "name": player_data.get("name", "Desconocido").title(),
-            "team": player_data.get("team", "Sin equipo").title(),
-            "position": player_data.get("position", "Desconocida"),
-            "height": player_data.get("height", "N/A"),
-            "weight": player_data.get("weight", "N/A"),
-            "stats": {
-                "ppg": player_data.get("stats", {}).get("basic", {}).get("ppg", "N/A"),
-                "rpg": player_data.get("stats", {}).get("basic", {}).get("rpg", "N/A"),
-                "apg": player_data.get("stats", {}).get("basic", {}).get("apg", "N/A"),
-                "per": player_data.get("stats", {}).get("advanced", {}).get("per", "N/A"),
-            },
-            "contract": player_data.get("contract", "No disponible")
+        current = record.current
+        return {
+            "name": record.name,
+            "team": record.team or "Sin equipo",
+            "position": record.position or "Desconocida",
+            "height": record.height or "N/A",
+            "weight": record.weight or "N/A",
+            "stats": {"ppg": current.ppg, "rpg": current.rpg, "apg": current.apg, "per": current.per},
+            "contract": record.contract.details or "No disponible",
         }
 
-        logging.info("✅ Datos limpios y estructurados.")
-        return cleaned_data
-
     except Exception as e:
         logging.error(f"❌ Error en clean_player_data: {str(e)}")
         return {}
+
+def build_player_response(player_name, record):
+    """
+    Limpia los datos fusionados y calcula predicciones: el cuerpo de /api/query (Flask y ASGI).
+    """
+    # 🔹 Generar predicciones directamente sobre las columnas del histórico
+    if len(record.seasons):
+        performance_predictions = predict_player_performance(record.seasons)
+    else:
+        performance_predictions = dict(NO_PREDICTIONS)
+
+    # 🔹 El análisis con IA ya lo generó (una sola vez, y con caché) data_merger
+    return {
+        "player": player_name,
+        "data": clean_player_data(record),
+        "predictions": performance_predictions,
+        "ai_analysis": record.ai_analysis or "No disponible",
+        # Por fuente: si el dato es nuevo, de caché o caducado (la fuente está fallando) y su antigüedad
+        "freshness": record.freshness,
+    }
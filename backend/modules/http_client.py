@@ -0,0 +1,240 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+from modules.metrics import upstream_duration, source_errors, add_to_trace, register_collector
+from modules.resilience import ThrottledError, UpstreamError
+from modules.snapshot_store import record_response
+
+#Objetivo: Un único cliente HTTP para todos los módulos: conexiones reutilizadas,
+# límite de peticiones por host, reintentos con backoff y timeout siempre aplicado.
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Respuestas que indican que la fuente está fallando o bloqueándonos (no que el jugador no exista)
+FAILURE_STATUSES = RETRY_STATUSES | {403}
+
+# Petición que emiten los "pasos" de los fetchers (ver `run_steps`)
+HttpRequest = namedtuple("HttpRequest", "url headers params", defaults=(None, None))
+
+# Instante (time.monotonic) en que vence el plazo de quien hace la petición (ver `deadline`)
+_deadline_at = contextvars.ContextVar("http_deadline_at", default=None)
+
+@contextmanager
+def deadline(seconds):
+    """
+    Plazo de las peticiones hechas dentro del bloque (p. ej. el de una fuente en data_merger): la
+    espera por el límite de peticiones del host no pasa de él. Con None no hay plazo.
+    """
+    if seconds is None:
+        yield
+        return
+    token = _deadline_at.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline_at.reset(token)
+
+def remaining_time():
+    """
+    Segundos hasta el plazo actual (0 si ya venció) o None si no hay plazo.
+    """
+    deadline_at = _deadline_at.get()
+    return None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+
+def retry_delay(attempt, backoff_base, response=None):
+    """
+    Espera antes del reintento: Retry-After si el servidor lo indica, si no backoff exponencial con full jitter.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), Config.HTTP_BACKOFF_MAX)
+    # Full jitter: evita que todos los hilos reintenten a la vez
+    return random.uniform(0, min(Config.HTTP_BACKOFF_MAX, backoff_base * 2 ** attempt))
+
+class TokenBucket:
+    """
+    Limitador token-bucket: `rate` peticiones por segundo con ráfagas de hasta `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """
+        Reserva un token sin bloquear y devuelve los segundos que hay que esperar para usarlo.
+
+        Si la espera pasaría de `max_wait` no reserva nada y devuelve None.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self, max_wait=None):
+        """
+        Reserva un token y espera lo necesario hasta que esté disponible. Devuelve los segundos
+        esperados, o None sin esperar nada si habría que esperar más de `max_wait`.
+        """
+        wait = self.reserve(max_wait)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+class HttpClient:
+    """
+    Sesiones `requests` agrupadas por host, con keep-alive, rate limiting y reintentos.
+    """
+
+    def __init__(self, pool_size=None, max_retries=None, backoff_base=None, rate_limits=None, default_rate=None):
+        self.pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.HTTP_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.rate_limits = Config.HTTP_RATE_LIMITS if rate_limits is None else rate_limits
+        self.default_rate = default_rate or Config.HTTP_DEFAULT_RATE
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            host = self._hosts.get(origin)
+            if host is None:
+                session = requests.Session()
+                session.headers["User-Agent"] = Config.HTTP_USER_AGENT
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount(origin, adapter)
+                rate, burst = self.rate_limits.get(parts.hostname, (self.default_rate, self.default_rate))
+                host = {"session": session, "adapter": adapter, "bucket": TokenBucket(rate, burst),
+                        "retries": 0, "throttled_seconds": 0.0}
+                self._hosts[origin] = host
+        return origin, host
+
+    def bucket(self, url):
+        """
+        Limitador del host de `url`; el cliente asíncrono usa el mismo para compartir presupuesto.
+        """
+        return self._host(url)[1]["bucket"]
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        """
+        GET con timeout obligatorio. Reintenta 429/5xx y errores de conexión; devuelve la última respuesta.
+        """
+        origin, host = self._host(url)
+        timeout = timeout or Config.REQUEST_TIMEOUT
+
+        for attempt in range(self.max_retries + 1):
+            waited = host["bucket"].acquire(remaining_time())
+            if waited is None:
+                source_errors.inc(source=origin, reason="throttled")
+                raise ThrottledError(f"{urlsplit(origin).hostname}: sin hueco en el límite de peticiones antes del plazo")
+            host["throttled_seconds"] += waited
+            started = time.perf_counter()
+            try:
+                response = host["session"].get(url, headers=headers, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed = time.perf_counter() - started
+                upstream_duration.observe(elapsed, host=origin, status="error")
+                source_errors.inc(source=origin, reason=type(e).__name__)
+                add_to_trace(f"http_{urlsplit(origin).hostname}", elapsed)
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_delay(attempt, self.backoff_base)
+                logging.warning(f"🔁 Error de conexión con {origin} ({str(e)}), reintento en {delay:.2f}s")
+            else:
+                elapsed = time.perf_counter() - started
+                upstream_duration.observe(elapsed, host=origin, status=response.status_code)
+                add_to_trace(f"http_{urlsplit(origin).hostname}", elapsed)
+                if response.status_code >= 400:
+                    source_errors.inc(source=origin, reason=f"http_{response.status_code}")
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                delay = retry_delay(attempt, self.backoff_base, response)
+                logging.warning(f"🔁 {origin} respondió {response.status_code}, reintento en {delay:.2f}s")
+            host["retries"] += 1
+            time.sleep(delay)
+
+    def get_connection_stats(self):
+        """
+        Por host: peticiones enviadas, conexiones nuevas y conexiones reutilizadas.
+        """
+        stats = {}
+        with self._lock:
+            hosts = list(self._hosts.items())
+        for origin, host in hosts:
+            pools = host["adapter"].poolmanager.pools
+            pools = [pools[key] for key in pools.keys()]
+            sent = sum(pool.num_requests for pool in pools)
+            opened = sum(pool.num_connections for pool in pools)
+            stats[origin] = {
+                "requests": sent,
+                "new_connections": opened,
+                "reused_connections": max(0, sent - opened),
+                "retries": host["retries"],
+                "throttled_seconds": round(host["throttled_seconds"], 3),
+            }
+        return stats
+
+http_client = HttpClient()
+
+def _connection_metrics():
+    lines = ["# HELP scouting_upstream_connections_total Conexiones HTTP nuevas y reutilizadas por host",
+             "# TYPE scouting_upstream_connections_total counter"]
+    for origin, stats in http_client.get_connection_stats().items():
+        lines.append(f'scouting_upstream_connections_total{{host="{origin}",kind="new"}} {stats["new_connections"]}')
+        lines.append(f'scouting_upstream_connections_total{{host="{origin}",kind="reused"}} {stats["reused_connections"]}')
+    return lines
+
+register_collector(_connection_metrics)
+
+def http_get(url, headers=None, params=None, timeout=None):
+    return http_client.get(url, headers=headers, params=params, timeout=timeout)
+
+def get_connection_stats():
+    return http_client.get_connection_stats()
+
+def check_upstream(request, response):
+    """
+    Lanza `UpstreamError` si la respuesta (ya tras los reintentos) indica que la fuente está fallando.
+    """
+    if response.status_code in FAILURE_STATUSES:
+        raise UpstreamError(f"{urlsplit(request.url).hostname} respondió {response.status_code}",
+                            status=response.status_code)
+    return response
+
+def run_steps(steps):
+    """
+    Ejecuta un generador de pasos HTTP: cada `yield HttpRequest(...)` recibe la respuesta y el
+    valor devuelto por el generador es el resultado. Así la lógica de cada fuente se escribe
+    una sola vez y sirve tanto aquí como en `async_http_client.run_steps_async`.
+
+    Los errores de conexión y las respuestas de `FAILURE_STATUSES` se lanzan como `UpstreamError`.
+    Las respuestas 200 de HTML o JSON se encolan para el almacén de snapshots (`snapshot_store`).
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                response = http_get(request.url, headers=request.headers, params=request.params)
+            except requests.RequestException as e:
+                raise UpstreamError(f"{urlsplit(request.url).hostname}: {str(e)}") from e
+            record_response(request, response)
+            request = steps.send(check_upstream(request, response))
+    except StopIteration as stop:
+        return stop.value
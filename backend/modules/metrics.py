@@ -0,0 +1,168 @@
+import contextvars
+import functools
+import inspect
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+
+#Objetivo: Medir cuánto tarda cada etapa de una consulta y cada fuente externa, y exponerlo
+# en formato Prometheus (/metrics) y, bajo petición, en la cabecera Server-Timing.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}   # etiquetas -> [cuentas por bucket, suma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels):
+        entry = self._values.get(tuple(sorted(labels.items())))
+        return entry[2] if entry else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+stage_duration = Histogram("scouting_stage_duration_seconds", "Duración de cada etapa del pipeline de consulta")
+upstream_duration = Histogram("scouting_upstream_request_duration_seconds", "Duración de las peticiones HTTP a fuentes externas")
+source_errors = Counter("scouting_source_errors_total", "Errores y plazos vencidos por fuente")
+cache_lookups = Counter("scouting_cache_lookups_total", "Consultas a la caché por fuente y resultado")
+page_fetches = Counter("scouting_page_fetches_total", "Descargas de páginas por resultado: not_modified (304), unchanged (mismo hash) o changed")
+coalesced_requests = Counter("scouting_coalesced_requests_total", "Llamadas que esperaron a otra idéntica ya en curso")
+request_duration = Histogram("scouting_api_request_duration_seconds", "Duración de las peticiones a la API por endpoint")
+circuit_transitions = Counter("scouting_circuit_transitions_total", "Cambios de estado del circuit breaker por fuente")
+stale_responses = Counter("scouting_stale_responses_total", "Valores caducados servidos porque la fuente estaba fallando")
+
+_METRICS = [stage_duration, upstream_duration, source_errors, cache_lookups, page_fetches, coalesced_requests,
+            request_duration, circuit_transitions, stale_responses]
+_collectors = []
+
+def register_collector(collector):
+    """
+    Registra una función que devuelve líneas Prometheus ya formateadas (métricas calculadas al vuelo).
+    """
+    _collectors.append(collector)
+
+def render_prometheus():
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+# Traza opcional por petición: lista de (etapa, segundos). Los hilos del merger reciben una
+# copia del contexto, así que añaden sus tiempos a la misma lista.
+_trace = contextvars.ContextVar("scouting_trace", default=None)
+
+def start_trace():
+    return _trace.set([])
+
+def end_trace(token):
+    trace = _trace.get()
+    _trace.reset(token)
+    return trace or []
+
+def add_to_trace(stage, seconds):
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+def server_timing_header(trace):
+    """
+    Cabecera Server-Timing con una entrada por etapa, en milisegundos.
+    """
+    entries = []
+    for stage, seconds in trace:
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", stage)
+        entries.append(f"{name};dur={seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+class timed(ContextDecorator):
+    """
+    Mide una etapa (como `with timed("etapa"):` o como decorador) en el histograma y en la traza activa.
+    """
+
+    def __init__(self, stage, **labels):
+        self.stage = stage
+        self.labels = labels
+        self._started = None
+
+    def _recreate_cm(self):
+        # Como decorador, una instancia nueva por llamada: seguro con hilos y con tareas asyncio
+        return timed(self.stage, **self.labels)
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def inner(*args, **kwargs):
+                with self._recreate_cm():
+                    return await func(*args, **kwargs)
+            return inner
+        return super().__call__(func)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._started
+        stage_duration.observe(elapsed, stage=self.stage, **self.labels)
+        add_to_trace(self.stage, elapsed)
+        return False
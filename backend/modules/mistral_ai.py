@@ -1,20 +1,43 @@
+import hashlib
+import logging
+import queue
+import threading
 from mistralai.models.chat_completion import ChatMessage
 from mistralai.client import MistralClient
 from config import Config
+from modules.cache import player_cache, MISSING
+from modules.metrics import timed
+from modules.resilience import circuit_breaker
+from modules.singleflight import SingleFlight
 
-# Inicializar cliente de Mistral AI
-client = MistralClient(api_key=Config.MISTRAL_API_KEY)
+#Objetivo: Un único servicio de análisis con IA. Las respuestas se guardan por hash del
+# prompt y del modelo, así que solo se paga el LLM cuando cambian los datos del jugador.
 
-def generate_analysis(player_data):
+NO_ANALYSIS = "No se pudo generar análisis."
+
+_client = None
+_client_lock = threading.Lock()
+_analysis_flights = SingleFlight("analysis")
+
+def _get_client():
+    # Se crea al primer uso: importar el módulo no exige tener la API key
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MistralClient(
+                api_key=Config.MISTRAL_API_KEY,
+                endpoint=Config.MISTRAL_API_URL or "https://api.mistral.ai",
+                timeout=Config.MISTRAL_TIMEOUT,
+            )
+        return _client
+
+def render_prompt(player_data):
     """
-    Genera un análisis en lenguaje natural basado en los datos del jugador.
+    Construye el prompt de análisis a partir de los datos del jugador.
     """
     player_name = player_data.get("name", "Jugador Desconocido")
 
-    # Crear mensaje con la información estructurada
-    messages = [ChatMessage(
-        role="user",
-        content=f"""Genera un análisis detallado de {player_name} basándote en estos datos:
+    return f"""Genera un análisis detallado de {player_name} basándote en estos datos:
 
 🏀 **Información Básica**
 - Equipo: {player_data.get('team', 'No disponible')}
@@ -30,10 +53,139 @@ def generate_analysis(player_data):
 💰 **Contrato**
 - {player_data.get('contract', 'No disponible')}
 
-🔎 **Analiza la evolución del jugador y su impacto en el equipo.""" 
-    )]
+🔎 **Analiza la evolución del jugador y su impacto en el equipo."""
+
+def _prompt_key(prompt):
+    return hashlib.sha256(f"{Config.MISTRAL_MODEL}\n{prompt}".encode("utf-8")).hexdigest()
+
+@timed("generate_analysis")
+def generate_analysis(player_data):
+    """
+    Genera un análisis en lenguaje natural basado en los datos del jugador.
+    """
+    prompt = render_prompt(player_data)
+    prompt_key = _prompt_key(prompt)
+
+    cached_analysis = player_cache.get("analysis", prompt_key)
+    if cached_analysis is not MISSING:
+        return cached_analysis
+
+    # Un mismo prompt en curso no se vuelve a enviar: se espera a su respuesta
+    return _analysis_flights.do(prompt_key, _complete, prompt, prompt_key)
+
+def _complete(prompt, prompt_key):
+    # Si Mistral lleva varios fallos seguidos no se espera a su timeout: se responde sin análisis
+    breaker = circuit_breaker("analysis")
+    if not breaker.allow():
+        logging.warning("🔌 Mistral AI no responde, se omite el análisis")
+        return NO_ANALYSIS
 
     # Enviar consulta a Mistral AI
-    response = client.chat(model="mistral-medium", messages=messages)
+    try:
+        with timed("llm_completion"):
+            response = _get_client().chat(model=Config.MISTRAL_MODEL, messages=[ChatMessage(role="user", content=prompt)])
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+
+    if not response.choices:
+        return NO_ANALYSIS
+    analysis = response.choices[0].message.content
+    player_cache.set("analysis", prompt_key, analysis)
+    return analysis
+
+def stream_analysis(player_data):
+    """
+    Igual que `generate_analysis`, pero va devolviendo el texto a trozos según lo genera el modelo.
+
+    Pasa por el mismo circuit breaker y la misma agrupación de consultas: si ese prompt ya se está
+    generando (en streaming o no) se espera a la respuesta en curso y se devuelve completa en un
+    único trozo, igual que cuando está en caché.
+    """
+    prompt = render_prompt(player_data)
+    prompt_key = _prompt_key(prompt)
+
+    cached_analysis = player_cache.get("analysis", prompt_key)
+    if cached_analysis is not MISSING:
+        yield cached_analysis
+        return
+
+    # El stream se consume en un hilo dentro de la agrupación; aquí solo se reenvían los trozos
+    events = queue.Queue()
+
+    def run():
+        try:
+            events.put(("done", _analysis_flights.do(prompt_key, _complete_stream, prompt, prompt_key,
+                                                     lambda content: events.put(("chunk", content)))))
+        except Exception as e:
+            events.put(("error", e))
+
+    threading.Thread(target=run, name="analysis-stream", daemon=True).start()
+    streamed = False
+    while True:
+        kind, value = events.get()
+        if kind == "chunk":
+            streamed = True
+            yield value
+        elif kind == "error":
+            raise value
+        else:
+            if not streamed:
+                yield value
+            return
+
+def _complete_stream(prompt, prompt_key, on_chunk):
+    breaker = circuit_breaker("analysis")
+    if not breaker.allow():
+        logging.warning("🔌 Mistral AI no responde, se omite el análisis")
+        return NO_ANALYSIS
 
-    return response.choices[0].message.content if response.choices else "No se pudo generar análisis."
+    chunks = []
+    try:
+        with timed("llm_completion"):
+            for chunk in _get_client().chat_stream(model=Config.MISTRAL_MODEL,
+                                                   messages=[ChatMessage(role="user", content=prompt)]):
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    chunks.append(content)
+                    on_chunk(content)
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+
+    # Solo se guarda si el stream terminó entero: un corte a medias no deja basura en caché
+    if not chunks:
+        return NO_ANALYSIS
+    analysis = "".join(chunks)
+    player_cache.set("analysis", prompt_key, analysis)
+    return analysis
+
+def _player_data_from_record(record):
+    # Mismo prompt (y misma clave de caché) para el análisis de la fusión y el de streaming,
+    # salvo si en la fusión el contrato aún no había llegado al lanzar el análisis
+    latest_season = record.seasons.row(len(record.seasons) - 1) if len(record.seasons) else {}
+    latest_season = {column: value for column, value in latest_season.items() if value is not None}
+    return {
+        "name": record.name,
+        "team": record.team or latest_season.get("team") or "No disponible",
+        "position": record.position or latest_season.get("position") or "No disponible",
+        "height": record.height or "No disponible",
+        "weight": record.weight or "No disponible",
+        "advanced_stats": latest_season,
+        "contract": record.contract.details or "No disponible",
+    }
+
+def generate_player_analysis(record):
+    """
+    Genera el análisis a partir del `PlayerRecord` fusionado: ficha, última temporada y contrato
+    (usado por data_merger).
+    """
+    return {"summary": generate_analysis(_player_data_from_record(record))}
+
+def stream_player_analysis(record):
+    """
+    Versión en streaming de `generate_player_analysis`; comparte la misma caché.
+    """
+    return stream_analysis(_player_data_from_record(record))
@@ -1,44 +1,76 @@
-import requests
 import logging
+from modules.cache import cached
+from modules.http_client import run_steps, HttpRequest
+from modules.async_http_client import run_steps_async
+from modules.resilience import UpstreamError
+from modules.player_index import player_index
 from config import Config
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+def _advanced_stats_steps(player_name):
+    """
+    Pasos HTTP para obtener las estadísticas avanzadas (compartidos por la versión síncrona y la asíncrona).
+    """
+    # URL de consulta: directa a la ficha si el jugador ya está en el índice local
+    player_id = player_index.resolve("nba_stats", player_name)
+    if player_id:
+        url = f"{Config.NBA_STATS_API_URL}players/{player_id}"
+    else:
+        url = f"{Config.NBA_STATS_API_URL}players?search={player_name.replace(' ', '+')}"
+    headers = {"Authorization": f"Bearer {Config.NBA_STATS_API_KEY}"}
+
+    logging.info(f"📊 Consultando NBA Stats API: {url}")
+    response = yield HttpRequest(url, headers=headers)
+
+    if response.status_code != 200:
+        logging.warning(f"⚠️ Error en la API de NBA Stats: {response.status_code}")
+        return None
+
+    data = response.json()
+
+    if isinstance(data.get('data'), dict):
+        data['data'] = [data['data']]
+
+    if 'data' in data and len(data['data']) > 0:
+        player = data['data'][0]
+        if not player_id:
+            player_index.register("nba_stats", player_name, player.get("id"),
+                                  f"{player.get('first_name', '')} {player.get('last_name', '')}".strip())
+        return {
+            "player_id": player.get("id"),
+            "name": f"{player.get('first_name', '')} {player.get('last_name', '')}",
+            "team": player.get("team", {}).get("full_name", "Sin equipo"),
+            "position": player.get("position", "Desconocida"),
+            "ppg": player.get("points_per_game", "N/A"),
+            "rpg": player.get("rebounds_per_game", "N/A"),
+            "apg": player.get("assists_per_game", "N/A"),
+            "per": player.get("player_efficiency_rating", "N/A")
+        }
 
+    logging.warning(f"⚠️ No se encontraron estadísticas avanzadas para {player_name}")
+    return None
+
+@cached("advanced_stats")
 def get_advanced_stats(player_name):
     """
     Obtiene estadísticas avanzadas de un jugador desde la API de NBA Stats.
     """
     try:
-        # URL de consulta
-        url = f"{Config.NBA_STATS_API_URL}players?search={player_name.replace(' ', '+')}"
-        headers = {"Authorization": f"Bearer {Config.NBA_STATS_API_KEY}"}
-
-        logging.info(f"📊 Consultando NBA Stats API: {url}")
-        response = requests.get(url, headers=headers, timeout=Config.REQUEST_TIMEOUT)
-        
-        if response.status_code != 200:
-            logging.warning(f"⚠️ Error en la API de NBA Stats: {response.status_code}")
-            return None
-        
-        data = response.json()
-        
-        if 'data' in data and len(data['data']) > 0:
-            player = data['data'][0]
-            return {
-                "player_id": player.get("id"),
-                "name": f"{player.get('first_name', '')} {player.get('last_name', '')}",
-                "team": player.get("team", {}).get("full_name", "Sin equipo"),
-                "position": player.get("position", "Desconocida"),
-                "ppg": player.get("points_per_game", "N/A"),
-                "rpg": player.get("rebounds_per_game", "N/A"),
-                "apg": player.get("assists_per_game", "N/A"),
-                "per": player.get("player_efficiency_rating", "N/A")
-            }
-
-        logging.warning(f"⚠️ No se encontraron estadísticas avanzadas para {player_name}")
+        return run_steps(_advanced_stats_steps(player_name))
+    except UpstreamError:
+        raise
+    except Exception as e:
+        logging.error(f"❌ Error en get_advanced_stats: {str(e)}")
         return None
 
+@cached("advanced_stats")
+async def get_advanced_stats_async(player_name):
+    """
+    Versión asíncrona de `get_advanced_stats` (modo ASGI).
+    """
+    try:
+        return await run_steps_async(_advanced_stats_steps(player_name))
+    except UpstreamError:
+        raise
     except Exception as e:
-        logging.error(f"❌ Error en get_advanced_stats: {str(e)}")
+        logging.error(f"❌ Error en get_advanced_stats_async: {str(e)}")
         return None
@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import threading
+import time
+from config import Config
+from modules.player_names import normalize_player_name
+
+#Objetivo: Recordar cómo se identifica cada jugador en cada fuente (ID o URL de perfil) para
+# saltarse la búsqueda por nombre, y servir el autocompletado sin salir a la red.
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class PlayerIndex:
+    """
+    Índice persistente (SQLite) de alias de jugador -> referencia en cada fuente.
+
+    En memoria mantiene un trie de prefijos (por cada palabra del nombre) y un índice de
+    trigramas para búsquedas aproximadas.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.RLock()
+        self._refs = {}          # alias -> {fuente: referencia}
+        self._display = {}       # alias -> nombre para mostrar
+        self._trie = {}
+        self._trigrams = {}
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS player_identities (
+                       alias_key TEXT NOT NULL,
+                       source TEXT NOT NULL,
+                       source_ref TEXT NOT NULL,
+                       display_name TEXT NOT NULL,
+                       updated_at REAL NOT NULL,
+                       PRIMARY KEY (alias_key, source)
+                   )"""
+            )
+            for alias_key, source, source_ref, display_name in self._db.execute(
+                "SELECT alias_key, source, source_ref, display_name FROM player_identities"
+            ):
+                self._add(alias_key, source, source_ref, display_name)
+        return self._db
+
+    def _add(self, alias_key, source, source_ref, display_name):
+        if alias_key not in self._refs:
+            self._refs[alias_key] = {}
+            words = alias_key.split(" ")
+            # Cada palabra es un punto de entrada: "dur" encuentra "kevin durant"
+            for start in range(len(words)):
+                node = self._trie
+                for char in " ".join(words[start:]):
+                    node = node.setdefault(char, {})
+                node.setdefault("$", set()).add(alias_key)
+            for trigram in _trigrams(alias_key):
+                self._trigrams.setdefault(trigram, set()).add(alias_key)
+        self._refs[alias_key][source] = source_ref
+        self._display[alias_key] = display_name
+
+    def resolve(self, source, player_name):
+        """
+        Referencia del jugador en `source` (ID o URL), o None si aún no se ha resuelto nunca.
+        """
+        with self._lock:
+            self._connection()
+            return self._refs.get(normalize_player_name(player_name), {}).get(source)
+
+    def display_name(self, player_name):
+        """
+        Nombre oficial del jugador si el alias ya se ha resuelto alguna vez, o None.
+        """
+        with self._lock:
+            self._connection()
+            return self._display.get(normalize_player_name(player_name))
+
+    def register(self, source, player_name, source_ref, display_name=None):
+        """
+        Guarda la referencia para el nombre consultado y, si se conoce, para el nombre oficial.
+        """
+        if source_ref is None:
+            return
+        display_name = display_name or player_name.strip()
+        alias_keys = {normalize_player_name(player_name), normalize_player_name(display_name)} - {""}
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            for alias_key in alias_keys:
+                self._add(alias_key, source, str(source_ref), display_name)
+                db.execute(
+                    "INSERT OR REPLACE INTO player_identities VALUES (?, ?, ?, ?, ?)",
+                    (alias_key, source, str(source_ref), display_name, now),
+                )
+            db.commit()
+
+    def _prefix_matches(self, prefix_key, limit):
+        node = self._trie
+        for char in prefix_key:
+            node = node.get(char)
+            if node is None:
+                return []
+        matches, pending = [], [node]
+        # Recorrido en anchura: primero los nombres más cortos
+        while pending and len(matches) < limit:
+            next_level = []
+            for current in pending:
+                for key, child in sorted(current.items()):
+                    if key == "$":
+                        matches.extend(sorted(child - set(matches)))
+                    else:
+                        next_level.append(child)
+            pending = next_level
+        return matches[:limit]
+
+    def _fuzzy_matches(self, query_key, limit, exclude):
+        query_trigrams = _trigrams(query_key)
+        shared = {}
+        for trigram in query_trigrams:
+            for alias_key in self._trigrams.get(trigram, ()):
+                shared[alias_key] = shared.get(alias_key, 0) + 1
+        scored = []
+        for alias_key, common in shared.items():
+            if alias_key in exclude:
+                continue
+            score = common / (len(query_trigrams) + len(_trigrams(alias_key)) - common)
+            if score >= Config.PLAYER_INDEX_FUZZY_THRESHOLD:
+                scored.append((-score, alias_key))
+        return [alias_key for _, alias_key in sorted(scored)[:limit]]
+
+    def suggest(self, query, limit=10):
+        """
+        Jugadores conocidos cuyo nombre empieza por `query` (en cualquier palabra) o se le parece.
+        """
+        query_key = normalize_player_name(query)
+        if not query_key:
+            return []
+        with self._lock:
+            self._connection()
+            matches = self._prefix_matches(query_key, limit)
+            if len(matches) < limit:
+                matches += self._fuzzy_matches(query_key, limit - len(matches), set(matches))
+            suggestions, seen = [], set()
+            for alias_key in matches:
+                display_name = self._display[alias_key]
+                if display_name not in seen:
+                    seen.add(display_name)
+                    suggestions.append({"name": display_name, "sources": sorted(self._refs[alias_key])})
+            return suggestions
+
+player_index = PlayerIndex(Config.PLAYER_INDEX_DB_PATH)
+
+def suggest_players(query, limit=10):
+    return player_index.suggest(query, limit)
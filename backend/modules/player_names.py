@@ -0,0 +1,19 @@
+import re
+import unicodedata
+
+#Objetivo: Dar una forma única a los nombres de jugador para usarla como clave.
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+def normalize_player_name(player_name):
+    """
+    Normaliza un nombre de jugador: minúsculas, sin acentos, sin puntuación y con espacios simples.
+
+    "Kevin  Durant", "kevin durant" y "Luka Dončić" -> "kevin durant", "kevin durant", "luka doncic"
+    """
+    if not player_name:
+        return ""
+    ascii_name = unicodedata.normalize("NFKD", player_name).encode("ascii", "ignore").decode("ascii")
+    cleaned = _NON_ALNUM.sub(" ", ascii_name.lower().replace("'", "").replace(".", ""))
+    return _SPACES.sub(" ", cleaned).strip()
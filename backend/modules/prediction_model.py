@@ -0,0 +1,137 @@
+import json
+import os
+import numpy as np
+from modules.metrics import timed
+from modules.records import SeasonTable
+
+#Objetivo: Proyectar ppg/rpg/apg de la próxima temporada a partir del histórico, para muchos
+# jugadores a la vez y sin ajustar ningún modelo por petición.
+
+STATS = ("ppg", "rpg", "apg")
+HISTORY_FIELDS = ("points_per_game", "rebounds_per_game", "assists_per_game")
+
+# Temporadas recientes usadas para la tendencia y peso relativo de cada una (la más reciente pesa 1)
+TREND_WINDOW = 5
+TREND_DECAY = 0.6
+# Peso de la tendencia frente a la curva de envejecimiento en la proyección final
+TREND_WEIGHT = 0.5
+
+# Su campo `source` indica de dónde salen los coeficientes; se recalculan desde el almacén local
+# de temporadas con modules/data/build_aging_curves.py
+AGING_CURVES_PATH = os.path.join(os.path.dirname(__file__), "data", "aging_curves.json")
+
+def _load_aging_curves(path):
+    """
+    Carga una sola vez (al importar) la curva de envejecimiento de la liga como tabla edad -> variación.
+    """
+    with open(path, encoding="utf-8") as f:
+        curves = json.load(f)
+    ages = np.asarray(curves["ages"], dtype=np.int64)
+    # Columnas en el orden de STATS; fuera del rango se usa el extremo más cercano
+    table = np.stack([np.asarray(curves[stat], dtype=np.float64) for stat in STATS], axis=1)
+    return int(ages[0]), table
+
+_MIN_AGE, _AGING_TABLE = _load_aging_curves(AGING_CURVES_PATH)
+
+# Pesos y posiciones de la ventana, alineados a la derecha (última temporada = TREND_WINDOW - 1)
+_POSITIONS = np.arange(TREND_WINDOW, dtype=np.float64)
+_WEIGHTS = TREND_DECAY ** (TREND_WINDOW - 1 - _POSITIONS)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _to_arrays(histories):
+    """
+    Convierte los históricos (listas de dicts o `SeasonTable`) en una matriz (jugadores, TREND_WINDOW, 3)
+    y un vector de edades.
+
+    Las temporadas con varios equipos aparecen varias veces; se conserva la primera fila (la combinada).
+    """
+    values = np.full((len(histories), TREND_WINDOW, len(STATS)), np.nan)
+    ages = np.full(len(histories), np.nan)
+    for i, historical in enumerate(histories):
+        if isinstance(historical, SeasonTable):
+            # Las columnas ya son numéricas: se leen directamente, sin pasar por diccionarios
+            recent = historical.season_indices()[-TREND_WINDOW:]
+            if recent:
+                for k, field in enumerate(HISTORY_FIELDS):
+                    column = historical.column(field)
+                    values[i, TREND_WINDOW - len(recent):, k] = [column[j] for j in recent]
+                ages[i] = historical.column("age")[recent[-1]]
+            continue
+
+        seasons, seen = [], set()
+        for row in historical or []:
+            season = row.get("season")
+            if season and season not in seen and season[:1].isdigit():
+                seen.add(season)
+                seasons.append(row)
+        recent = seasons[-TREND_WINDOW:]
+        offset = TREND_WINDOW - len(recent)
+        for j, row in enumerate(recent):
+            values[i, offset + j] = [_to_float(row.get(field)) for field in HISTORY_FIELDS]
+        if recent:
+            ages[i] = _to_float(recent[-1].get("age"))
+    return values, ages
+
+def _project(values, ages):
+    """
+    Proyección vectorizada: regresión lineal ponderada por jugador y estadística, mezclada con la curva de edad.
+    """
+    mask = ~np.isnan(values)
+    y = np.where(mask, values, 0.0)
+    w = np.where(mask, _WEIGHTS[None, :, None], 0.0)
+    x = _POSITIONS[None, :, None]
+
+    sw = w.sum(axis=1)
+    swx = (w * x).sum(axis=1)
+    swy = (w * y).sum(axis=1)
+    swxx = (w * x * x).sum(axis=1)
+    swxy = (w * x * y).sum(axis=1)
+
+    denominator = sw * swxx - swx ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denominator > 1e-12, (sw * swxy - swx * swy) / denominator, 0.0)
+        intercept = np.where(sw > 0, (swy - slope * swx) / sw, np.nan)
+    trend = intercept + slope * TREND_WINDOW
+
+    # Último valor conocido de cada estadística (la ventana está alineada a la derecha)
+    last_index = TREND_WINDOW - 1 - np.argmax(mask[:, ::-1, :], axis=1)
+    last = np.take_along_axis(y, last_index[:, None, :], axis=1)[:, 0, :]
+    last = np.where(mask.any(axis=1), last, np.nan)
+
+    age_index = np.clip(np.nan_to_num(ages, nan=-1) - _MIN_AGE, 0, len(_AGING_TABLE) - 1).astype(np.int64)
+    aging_delta = np.where(np.isnan(ages)[:, None], 0.0, _AGING_TABLE[age_index])
+    aging = last * (1.0 + aging_delta)
+
+    return np.clip(TREND_WEIGHT * trend + (1.0 - TREND_WEIGHT) * aging, 0.0, None)
+
+@timed("prediction")
+def predict_players_performance(histories):
+    """
+    Predice ppg, rpg y apg de la próxima temporada para varios jugadores en una sola llamada.
+
+    Recibe una lista de históricos (el formato de `get_historical_stats` o `SeasonTable`) y devuelve una
+    lista de dicts en el mismo orden.
+    """
+    if not histories:
+        return []
+    values, ages = _to_arrays(histories)
+    projected = np.round(_project(values, ages), 1)
+
+    predictions = []
+    for row in projected:
+        predictions.append({
+            f"predicted_{stat}": (float(value) if not np.isnan(value) else "No disponible")
+            for stat, value in zip(STATS, row)
+        })
+    return predictions
+
+def predict_player_performance(historical_stats):
+    """
+    Predice ppg, rpg y apg de la próxima temporada para un jugador.
+    """
+    return predict_players_performance([historical_stats])[0]
@@ -0,0 +1,219 @@
+import dataclasses
+import json
+import math
+from array import array
+from dataclasses import dataclass, field
+from operator import itemgetter
+import numpy as np
+from modules.season_store import INT_COLUMNS, STAT_COLUMNS
+
+try:
+    import orjson
+except ImportError:
+    # Opcional: sin orjson las respuestas se serializan con el módulo json estándar
+    orjson = None
+
+#Objetivo: Un único modelo tipado y compacto para el jugador fusionado. Los valores se
+# convierten a número una sola vez al construir el registro y el histórico se guarda por
+# columnas, así que ni la respuesta ni las predicciones vuelven a recorrer diccionarios.
+
+MISSING_VALUES = ("", "N/A", "-", "No disponible")
+
+_STAT_GETTER = itemgetter(*STAT_COLUMNS)
+
+def parse_number(value):
+    """
+    Número a partir de lo que devuelven las fuentes ("27.1", 27, "N/A"...); None si no hay dato.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if isinstance(value, float) and math.isnan(value) else value
+    text = str(value).strip()
+    if text in MISSING_VALUES:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+class SeasonTable:
+    """
+    Histórico de un jugador por columnas: temporada, equipo y posición en listas y cada
+    estadística de `STAT_COLUMNS` en un `array('d')` (NaN = sin dato).
+
+    Una carrera de 20 temporadas son unos pocos arrays en lugar de 20 diccionarios, y las
+    columnas se pueden leer como vectores NumPy sin copiarlas (`numpy.frombuffer`).
+    """
+
+    __slots__ = ("seasons", "teams", "positions", "_columns")
+
+    def __init__(self):
+        self.seasons = []
+        self.teams = []
+        self.positions = []
+        self._columns = {column: array("d") for column in STAT_COLUMNS}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Construye la tabla a partir de las filas de `get_historical_stats` (o del almacén de temporadas).
+        """
+        table = cls()
+        rows = rows or ()
+        table.seasons = [str(row.get("season") or "") for row in rows]
+        table.teams = [row.get("team") or "N/A" for row in rows]
+        table.positions = [row.get("position") or None for row in rows]
+        # Filas -> columnas de una vez (si falta alguna columna, se completa con None)
+        try:
+            cells = [_STAT_GETTER(row) for row in rows]
+        except KeyError:
+            cells = [tuple(row.get(column) for column in STAT_COLUMNS) for row in rows]
+        columns = zip(*cells) if cells else ((),) * len(STAT_COLUMNS)
+        for column, values in zip(STAT_COLUMNS, columns):
+            try:
+                # Caso habitual: el parser ya devuelve números, la columna se copia sin conversiones
+                table._columns[column] = array("d", values)
+            except TypeError:
+                numbers = (parse_number(value) for value in values)
+                table._columns[column] = array("d", [math.nan if number is None else number for number in numbers])
+        return table
+
+    def __len__(self):
+        return len(self.seasons)
+
+    def column(self, name):
+        return self._columns[name]
+
+    def season_indices(self):
+        """
+        Índice de la primera fila de cada temporada (en traspasos, la combinada), sin filas de resumen ("Career").
+        """
+        indices, seen = [], set()
+        for index, season in enumerate(self.seasons):
+            if season[:1].isdigit() and season not in seen:
+                seen.add(season)
+                indices.append(index)
+        return indices
+
+    def row(self, index):
+        values = {"season": self.seasons[index], "team": self.teams[index], "position": self.positions[index]}
+        for column, column_values in self._columns.items():
+            value = column_values[index]
+            if math.isnan(value):
+                values[column] = None
+            else:
+                values[column] = int(value) if column in INT_COLUMNS else value
+        return values
+
+    def rows(self):
+        """
+        Filas como diccionarios, en el mismo formato que `get_historical_stats`.
+        """
+        return [self.row(index) for index in range(len(self.seasons))]
+
+@dataclass(slots=True)
+class CurrentStats:
+    """
+    Temporada en curso según NBA Stats.
+    """
+    ppg: float | None = None
+    rpg: float | None = None
+    apg: float | None = None
+    per: float | None = None
+
+    @classmethod
+    def from_source(cls, advanced_stats):
+        advanced_stats = advanced_stats or {}
+        return cls(
+            ppg=parse_number(advanced_stats.get("ppg")),
+            rpg=parse_number(advanced_stats.get("rpg")),
+            apg=parse_number(advanced_stats.get("apg")),
+            per=parse_number(advanced_stats.get("per")),
+        )
+
+@dataclass(slots=True)
+class Contract:
+    details: str | None = None
+    agent: str | None = None
+
+    @classmethod
+    def from_source(cls, contract_info):
+        # Spotrac devuelve el texto del contrato tal cual
+        if isinstance(contract_info, str):
+            return cls(details=contract_info.strip() or None)
+        contract_info = contract_info or {}
+        return cls(details=contract_info.get("contract_details"), agent=contract_info.get("agent"))
+
+@dataclass(slots=True)
+class PlayerRecord:
+    """
+    Jugador fusionado a partir de todas las fuentes (lo que devuelve `data_merger.merge_player_data`).
+    """
+    name: str
+    team: str | None = None
+    team_abbreviation: str | None = None
+    position: str | None = None
+    height: str | None = None
+    weight: str | None = None
+    birthdate: str | None = None
+    current: CurrentStats = field(default_factory=CurrentStats)
+    seasons: SeasonTable = field(default_factory=SeasonTable)
+    contract: Contract = field(default_factory=Contract)
+    ai_analysis: str | None = None
+    unavailable_sources: list = field(default_factory=list)
+    # Fuente -> {"status": fresh | cached | stale | unavailable, "age_seconds": ...}
+    freshness: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_sources(cls, player_name, player_info, advanced_stats, historical_stats, contract_info,
+                     ai_analysis, unavailable, freshness=None):
+        """
+        Une las respuestas de las fuentes: balldontlie.io (ficha), NBA Stats (temporada en curso),
+        Basketball Reference (histórico), Spotrac (contrato) y el análisis de IA.
+        """
+        player_info = player_info or {}
+        advanced_stats = advanced_stats or {}
+        team = player_info.get("team")
+        team = team if isinstance(team, dict) else {"name": team}
+        return cls(
+            name=(player_info.get("name") or "").strip() or (advanced_stats.get("name") or "").strip()
+            or player_name.strip().title(),
+            team=team.get("name") or advanced_stats.get("team"),
+            team_abbreviation=team.get("abbreviation"),
+            position=player_info.get("position") or advanced_stats.get("position"),
+            height=player_info.get("height"),
+            weight=player_info.get("weight"),
+            birthdate=player_info.get("birthdate"),
+            current=CurrentStats.from_source(advanced_stats),
+            seasons=SeasonTable.from_rows(historical_stats),
+            contract=Contract.from_source(contract_info),
+            ai_analysis=(ai_analysis or {}).get("summary"),
+            unavailable_sources=list(unavailable),
+            freshness=dict(freshness or {}),
+        )
+
+def _missing_to_none(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+def _default(value):
+    # NaN (sin dato) sale como null, igual que con orjson
+    if isinstance(value, SeasonTable):
+        return value.rows()
+    if isinstance(value, (array, np.ndarray)):
+        values = value.tolist()
+        return [_missing_to_none(v) for v in values] if isinstance(values, list) else _missing_to_none(values)
+    if isinstance(value, np.generic):
+        return _missing_to_none(value.item())
+    if dataclasses.is_dataclass(value):
+        # Solo con json estándar: orjson ya serializa las dataclasses por sí mismo
+        return {f.name: getattr(value, f.name) for f in dataclasses.fields(value)}
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def dumps(value):
+    """
+    Serializa a JSON (bytes, UTF-8). Usa orjson si está instalado; admite registros, tablas de temporadas y NumPy.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
@@ -0,0 +1,134 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from config import Config
+from modules.cache import player_cache
+from modules.player_names import normalize_player_name
+
+#Objetivo: Refrescar en segundo plano los jugadores más consultados antes de que caduque su
+# caché, para que las peticiones interactivas casi siempre encuentren los datos listos.
+
+class RefreshScheduler:
+    """
+    Planificador en un hilo propio que precalienta la caché de los jugadores más consultados.
+
+    En cada ciclo:
+    - refresca las fuentes cuya entrada caduca pronto (`Config.REFRESH_AHEAD`, fracción del TTL);
+    - una vez al día, tras la noche de partidos, fuerza las fuentes de la temporada actual;
+    - nunca supera el presupuesto de refrescos por fuente y ciclo (`Config.REFRESH_BUDGETS`).
+    """
+
+    def __init__(self, fetchers, interval=None, hot_players=None):
+        self.fetchers = fetchers
+        self.interval = interval or Config.REFRESH_INTERVAL
+        self.hot_players_limit = hot_players or Config.REFRESH_HOT_PLAYERS
+        self._counts = {}            # nombre normalizado -> [frecuencia con decaimiento, nombre original]
+        self._forced = {}            # fuente -> jugadores pendientes de refresco forzado
+        self._last_game_night = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_query(self, player_name):
+        """
+        Anota una consulta del jugador (se llama desde los endpoints, sin hacer I/O).
+        """
+        player_key = normalize_player_name(player_name)
+        if not player_key:
+            return
+        with self._lock:
+            entry = self._counts.setdefault(player_key, [0.0, player_name.strip()])
+            entry[0] += 1
+
+    def hot_players(self):
+        with self._lock:
+            ranked = sorted(self._counts.values(), key=lambda entry: entry[0], reverse=True)
+        return [player_name for _, player_name in ranked[:self.hot_players_limit]]
+
+    def _decay(self):
+        with self._lock:
+            for player_key in list(self._counts):
+                self._counts[player_key][0] *= Config.REFRESH_DECAY
+                if self._counts[player_key][0] < 0.5:
+                    del self._counts[player_key]
+
+    def _schedule_game_night(self, now, players):
+        # Los partidos de la NBA terminan de madrugada (UTC): a partir de esa hora, una vez al día
+        today = now.date()
+        if now.hour < Config.GAME_NIGHT_REFRESH_HOUR or self._last_game_night == today:
+            return
+        self._last_game_night = today
+        for source in Config.GAME_NIGHT_SOURCES:
+            if source in self.fetchers:
+                self._forced.setdefault(source, []).extend(players)
+        logging.info(f"🌙 Refresco post-partidos programado para {len(players)} jugadores")
+
+    def _due(self, source, player_name):
+        expires_in = player_cache.expires_in(source, player_name)
+        return expires_in is None or expires_in < Config.REFRESH_AHEAD * player_cache.ttls[source]
+
+    def run_once(self, now=None):
+        """
+        Ejecuta un ciclo de refresco. Devuelve cuántos jugadores se refrescaron por fuente.
+        """
+        now = now or datetime.now(timezone.utc)
+        players = self.hot_players()
+        self._schedule_game_night(now, players)
+
+        refreshed = {}
+        for source, fetcher in self.fetchers.items():
+            budget = Config.REFRESH_BUDGETS.get(source, 0)
+            forced = self._forced.get(source, [])
+            candidates = list(dict.fromkeys(forced + [p for p in players if self._due(source, p)]))
+            done = 0
+            for player_name in candidates:
+                if done >= budget or self._stop.is_set():
+                    break
+                try:
+                    fetcher.refresh(player_name)
+                except Exception as e:
+                    logging.error(f"❌ Error refrescando {source} de {player_name}: {str(e)}")
+                done += 1
+            # Lo forzado que no cupo en el presupuesto se queda para el siguiente ciclo
+            self._forced[source] = [p for p in forced if p not in candidates[:done]]
+            refreshed[source] = done
+
+        self._decay()
+        if any(refreshed.values()):
+            logging.info(f"♻️ Refresco en segundo plano: {refreshed}")
+        return refreshed
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"❌ Error en el planificador de refresco: {str(e)}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+            logging.info(f"⏰ Planificador de refresco iniciado (cada {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+
+def build_refresh_scheduler():
+    """
+    Planificador con todas las fuentes cacheadas de `modules/*`.
+    """
+    from modules.balldontlie_api import get_nba_player_data
+    from modules.nba_stats_api import get_advanced_stats
+    from modules.basketball_reference import get_historical_stats
+    from modules.spotrac_scraper import get_contract_info
+
+    return RefreshScheduler({
+        "player_info": get_nba_player_data,
+        "advanced_stats": get_advanced_stats,
+        "historical_stats": get_historical_stats,
+        "contract_info": get_contract_info,
+    })
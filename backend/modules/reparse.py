@@ -0,0 +1,108 @@
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+from config import Config
+from modules.basketball_reference import _parse_player_page
+from modules.conditional_fetch import page_validators
+from modules.season_store import season_store
+from modules.snapshot_store import SnapshotStore, snapshot_store
+from modules.spotrac_scraper import _parse_contract
+
+#Objetivo: Rehacer los datos derivados de las páginas (resultado parseado de cada página y
+# temporadas del almacén local) a partir de los snapshots guardados, p. ej. tras arreglar un
+# parser, sin volver a descargar nada.
+
+_PLAYER_NAME = re.compile(r"<h1[^>]*>\s*<span>([^<]+)</span>")
+
+def _player_page(page_html):
+    match = _PLAYER_NAME.search(page_html)
+    return {"parsed": _parse_player_page(page_html), "player_name": match.group(1).strip() if match else None}
+
+def _contract_page(page_html):
+    return {"parsed": _parse_contract(page_html)}
+
+# (fuente, ruta de la página, parser que se ejecuta en los procesos)
+REPARSERS = (
+    ("basketball_reference", re.compile(r"/players/[a-z]/[^/]+\.html"), _player_page),
+    ("spotrac", re.compile(r"/nba/player/_/id/\d+/[^/]+/?"), _contract_page),
+)
+
+_worker_store = None
+
+def _init_worker(db_path):
+    global _worker_store
+    _worker_store = SnapshotStore(db_path)
+
+def _reparser(url):
+    path = urlsplit(url).path
+    for source, pattern, parse in REPARSERS:
+        if pattern.fullmatch(path):
+            return source, parse
+    return None, None
+
+def _reparse_snapshot(url, sha256):
+    # En un proceso del pool: lee y descomprime su propio snapshot, así el proceso principal solo aplica resultados
+    source, parse = _reparser(url)
+    content = _worker_store.read(sha256, touch=False)
+    if content is None:
+        return url, source, None
+    return url, source, parse(content.decode("utf-8", errors="replace"))
+
+def _apply(url, source, result):
+    page_validators.update_parsed(url, result["parsed"])
+    if source == "basketball_reference":
+        table_id, stats = result["parsed"]
+        if table_id and stats and result["player_name"]:
+            player_id = os.path.splitext(os.path.basename(urlsplit(url).path))[0]
+            season_store.ingest_player_seasons(player_id, result["player_name"], stats)
+
+def reparse_snapshots(sources=None, workers=None, store=None):
+    """
+    Vuelve a parsear en paralelo (`workers` procesos) el último snapshot de cada página conocida y
+    guarda los resultados. Devuelve cuántas páginas se reparsearon por fuente.
+
+    Las entradas de la caché de jugadores no se tocan: se renuevan al caducar, y desde ese momento
+    las descargas condicionales (304) ya devuelven el resultado corregido.
+    """
+    store = store or snapshot_store
+    pending = [(url, sha256) for url, sha256 in store.latest_snapshots()
+               if _reparser(url)[0] and (not sources or _reparser(url)[0] in sources)]
+    counts = {}
+    if not pending:
+        return counts
+
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers or Config.REPARSE_WORKERS,
+                             initializer=_init_worker, initargs=(store.db_path,)) as pool:
+        with season_store.batched():
+            results = pool.map(_reparse_snapshot, *zip(*pending), chunksize=8)
+            for url, source, result in results:
+                if result is None:
+                    continue
+                try:
+                    _apply(url, source, result)
+                except Exception as e:
+                    logging.error(f"❌ Error guardando el reparseo de {url}: {str(e)}")
+                    continue
+                counts[source] = counts.get(source, 0) + 1
+    logging.info(f"🔁 {sum(counts.values())} páginas reparseadas en {time.monotonic() - started:.1f}s: {counts}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Vuelve a parsear las páginas guardadas en el almacén de snapshots")
+    parser.add_argument("--sources", nargs="+", choices=[source for source, _, _ in REPARSERS])
+    parser.add_argument("--workers", type=int, default=Config.REPARSE_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=Config.LOG_LEVEL)
+    counts = reparse_snapshots(args.sources, args.workers)
+    print(json.dumps({"reparsed": counts, "snapshots": snapshot_store.get_stats()}, indent=2))
+
+# Uso (desde backend/): PYTHONPATH=.:root_files python -m modules.reparse [--sources basketball_reference]
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from config import Config
+from modules.metrics import circuit_transitions, register_collector
+
+#Objetivo: Que una fuente caída o bloqueándonos (Spotrac, Basketball Reference...) no haga
+# esperar a cada consulta hasta agotar timeouts y reintentos: tras varios fallos seguidos se
+# deja de llamarla durante un tiempo y se sirve el último valor bueno de la caché.
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Frescura de cada campo de la respuesta
+FRESH = "fresh"              # Recién obtenido de la fuente
+CACHED = "cached"            # De la caché, dentro de su TTL
+STALE = "stale"              # Caducado: la fuente está fallando y es el último valor bueno
+UNAVAILABLE = "unavailable"  # Sin datos
+
+class UpstreamError(Exception):
+    """
+    La fuente falló (error de conexión, timeout o 429/5xx tras los reintentos), a diferencia de
+    "el jugador no existe", que los fetchers devuelven como None.
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class ThrottledError(UpstreamError):
+    """
+    La petición no llegó a enviarse: el límite de peticiones del host no dejaba hueco antes del
+    plazo de la consulta. No indica que la fuente esté fallando.
+    """
+
+class CircuitBreaker:
+    """
+    Circuit breaker de una fuente.
+
+    Cerrado: las llamadas pasan. Tras `failure_threshold` fallos seguidos se abre y durante
+    `reset_timeout` segundos no se llama a la fuente. Después pasa a semiabierto y deja pasar
+    una única llamada de prueba: si va bien se cierra, si falla vuelve a abrirse.
+    """
+
+    def __init__(self, source, failure_threshold=None, reset_timeout=None):
+        self.source = source
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = Config.CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        if state != self.state:
+            logging.warning(f"🔌 Circuito de {self.source}: {self.state} -> {state}")
+            circuit_transitions.inc(source=self.source, state=state)
+            self.state = state
+
+    def allow(self):
+        """
+        True si se puede llamar a la fuente ahora. En semiabierto solo lo obtiene la llamada de prueba.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def record_skipped(self):
+        """
+        La llamada no llegó a la fuente (`ThrottledError`): no cuenta como fallo ni como éxito,
+        y si era la llamada de prueba otra puede ocupar su lugar.
+        """
+        with self._lock:
+            self._probing = False
+
+    def get_stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._failures}
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._transition(CLOSED)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def circuit_breaker(source):
+    """
+    Breaker compartido de una fuente (uno por proceso, para todos los fetchers que la usan).
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(source)
+        if breaker is None:
+            breaker = _breakers[source] = CircuitBreaker(source)
+        return breaker
+
+def get_circuit_stats():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.source: breaker.get_stats() for breaker in breakers}
+
+def reset_circuits():
+    """
+    Cierra todos los circuitos (los fetchers guardan su breaker, así que se reinician en lugar de borrarse).
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
+
+def freshness(status, stored_at=None):
+    """
+    Metadatos de frescura de un campo: estado y antigüedad (segundos desde que se obtuvo de la fuente).
+    """
+    age = round(max(0.0, time.time() - stored_at), 1) if stored_at is not None else None
+    return {"status": status, "age_seconds": 0.0 if status == FRESH else age}
+
+def _circuit_metrics():
+    lines = ["# HELP scouting_circuit_open Circuito abierto (1) o semiabierto (0.5) por fuente",
+             "# TYPE scouting_circuit_open gauge"]
+    levels = {CLOSED: 0, HALF_OPEN: 0.5, OPEN: 1}
+    for source, stats in sorted(get_circuit_stats().items()):
+        lines.append(f'scouting_circuit_open{{source="{source}"}} {levels[stats["state"]]}')
+    return lines
+
+register_collector(_circuit_metrics)
@@ -0,0 +1,343 @@
+import argparse
+import csv
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+from modules.player_names import normalize_player_name
+
+#Objetivo: Guardar en local las temporadas de cada jugador con columnas tipadas e índices, para
+# responder consultas de toda la liga ("bases con más de 20 puntos desde 2015") sin scraping.
+
+# Columnas numéricas, con los mismos nombres que las filas de bref_parser
+INT_COLUMNS = ("age", "games")
+REAL_COLUMNS = (
+    "minutes_per_game", "fg_pct", "fg3_pct", "ft_pct",
+    "points_per_game", "rebounds_per_game", "assists_per_game",
+    "steals_per_game", "blocks_per_game", "turnovers_per_game",
+)
+STAT_COLUMNS = INT_COLUMNS + REAL_COLUMNS
+COLUMNS = ("player_id", "player_key", "player_name", "season", "season_start", "team", "position",
+           "full_season") + STAT_COLUMNS
+
+# Cabeceras del CSV "per game" de temporada de Basketball Reference -> columna
+CSV_COLUMNS = {
+    "Player": "player_name",
+    "Player-additional": "player_id",
+    "Season": "season",
+    "Age": "age",
+    "Team": "team",
+    "Tm": "team",
+    "Pos": "position",
+    "G": "games",
+    "MP": "minutes_per_game",
+    "FG%": "fg_pct",
+    "3P%": "fg3_pct",
+    "FT%": "ft_pct",
+    "TRB": "rebounds_per_game",
+    "AST": "assists_per_game",
+    "STL": "steals_per_game",
+    "BLK": "blocks_per_game",
+    "TOV": "turnovers_per_game",
+    "PTS": "points_per_game",
+}
+
+# Fila que suma varios equipos en una temporada con traspaso ("TOT" antes, "2TM", "3TM"... ahora)
+_COMBINED_TEAM = re.compile(r"^(TOT|\d+TM)$")
+_SEASON_START = re.compile(r"^(\d{4})")
+
+INGEST_CHUNK_SIZE = 5000
+
+def _number(column, value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value) if column in INT_COLUMNS else float(value)
+    except ValueError:
+        return None
+
+def _season_start(season):
+    match = _SEASON_START.match(season or "")
+    return int(match.group(1)) if match else None
+
+def changed_season_rows(previous, current):
+    """
+    Filas de `current` de las temporadas que no están igual en `previous` (p. ej. la temporada en
+    curso). Se devuelven temporadas completas para que los traspasos se marquen bien al ingerirlas.
+    """
+    if not previous:
+        return list(current)
+    previous_rows = {(row.get("season"), row.get("team")): row for row in previous}
+    changed = {row.get("season") for row in current if previous_rows.get((row.get("season"), row.get("team"))) != row}
+    return [row for row in current if row.get("season") in changed]
+
+class SeasonStore:
+    """
+    Temporadas por jugador en SQLite (una fila por jugador, temporada y equipo).
+
+    Las lecturas usan mmap (`Config.SEASON_STORE_MMAP_SIZE`): las páginas las comparte el sistema
+    operativo y el proceso no mantiene su propia copia de la tabla en memoria.
+    """
+
+    def __init__(self, db_path, mmap_size=None):
+        self.db_path = db_path
+        self.mmap_size = Config.SEASON_STORE_MMAP_SIZE if mmap_size is None else mmap_size
+        self._db = None
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._pending = None         # Filas acumuladas dentro de `batched()`
+
+    def add_listener(self, callback):
+        """
+        Registra `callback(filas)`, llamado tras cada ingesta con las filas guardadas (ya normalizadas).
+        """
+        self._listeners.append(callback)
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            stat_columns = ",\n".join(
+                f"{column} {'INTEGER' if column in INT_COLUMNS else 'REAL'}" for column in STAT_COLUMNS)
+            self._db.execute(
+                f"""CREATE TABLE IF NOT EXISTS player_seasons (
+                       player_id TEXT NOT NULL,
+                       player_key TEXT NOT NULL,
+                       player_name TEXT NOT NULL,
+                       season TEXT NOT NULL,
+                       season_start INTEGER,
+                       team TEXT NOT NULL,
+                       position TEXT,
+                       full_season INTEGER NOT NULL,
+                       {stat_columns},
+                       updated_at REAL NOT NULL,
+                       PRIMARY KEY (player_id, season, team)
+                   ) WITHOUT ROWID"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_seasons_player_key ON player_seasons (player_key)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_seasons_start_ppg ON player_seasons (season_start, points_per_game)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_seasons_ppg ON player_seasons (points_per_game)")
+        return self._db
+
+    def _prepare(self, rows):
+        """
+        Normaliza las filas y marca `full_season`: en temporadas con traspaso solo la fila
+        combinada (TOT/2TM) cuenta como temporada completa; las de cada equipo son parciales.
+        """
+        prepared, combined = [], set()
+        for row in rows:
+            player_name = (row.get("player_name") or "").strip()
+            season = (row.get("season") or "").strip()
+            player_id = row.get("player_id") or normalize_player_name(player_name)
+            if not player_id or not season:
+                continue
+            team = row.get("team") or "N/A"
+            if _COMBINED_TEAM.match(team):
+                combined.add((player_id, season))
+            values = {
+                "player_id": player_id,
+                "player_key": normalize_player_name(player_name),
+                "player_name": player_name,
+                "season": season,
+                "season_start": _season_start(season),
+                "team": team,
+                "position": row.get("position") or None,
+                "full_season": 1,
+            }
+            for column in STAT_COLUMNS:
+                values[column] = _number(column, row.get(column))
+            prepared.append(values)
+        for values in prepared:
+            if (values["player_id"], values["season"]) in combined and not _COMBINED_TEAM.match(values["team"]):
+                values["full_season"] = 0
+        return prepared
+
+    def ingest_rows(self, rows):
+        """
+        Inserta o actualiza filas de temporada (dicts con `player_id`, `player_name`, `season`,
+        `team` y las columnas de `STAT_COLUMNS`) en una sola transacción. Devuelve cuántas se guardaron.
+
+        Dentro de `batched()` las filas se acumulan y se escriben al llamar a `flush()`.
+        """
+        prepared = self._prepare(rows)
+        if not prepared:
+            return 0
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(prepared)
+                return len(prepared)
+        self._write(prepared)
+        return len(prepared)
+
+    def _write(self, prepared):
+        now = time.time()
+        placeholders = ", ".join("?" for _ in range(len(COLUMNS) + 1))
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.executemany(
+                    f"INSERT OR REPLACE INTO player_seasons ({', '.join(COLUMNS)}, updated_at) VALUES ({placeholders})",
+                    [tuple(values[column] for column in COLUMNS) + (now,) for values in prepared],
+                )
+        for callback in self._listeners:
+            try:
+                callback(prepared)
+            except Exception as e:
+                logging.error(f"❌ Error notificando la ingesta de temporadas: {str(e)}")
+
+    @contextmanager
+    def batched(self):
+        """
+        Acumula en memoria las ingestas hechas dentro del bloque (desde cualquier hilo) y las
+        escribe juntas en cada `flush()` y al salir, en una transacción por lote en lugar de una
+        por jugador. Si el proceso muere, lo no escrito se pierde: quien carga decide cuándo hacer `flush()`.
+        """
+        with self._lock:
+            self._pending = []
+        try:
+            yield self
+        finally:
+            with self._lock:
+                prepared, self._pending = self._pending, None
+            if prepared:
+                self._write(prepared)
+
+    def flush(self):
+        """
+        Escribe las filas acumuladas por `batched()`. Devuelve cuántas se escribieron.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            prepared, self._pending = self._pending, []
+        self._write(prepared)
+        return len(prepared)
+
+    def ingest_player_seasons(self, player_id, player_name, seasons):
+        """
+        Guarda el histórico de un jugador tal como lo devuelve `get_historical_stats`.
+        """
+        return self.ingest_rows(dict(season, player_id=player_id, player_name=player_name) for season in seasons)
+
+    def ingest_csv(self, path, season=None):
+        """
+        Carga un volcado CSV de temporada (formato "per game" de Basketball Reference).
+
+        Si el fichero no tiene columna `Season` se usa `season` para todas las filas.
+        """
+        total, chunk = 0, []
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                row = {CSV_COLUMNS[header]: value for header, value in record.items() if header in CSV_COLUMNS}
+                if row.get("player_name") in (None, "", "League Average"):
+                    continue
+                row.setdefault("season", season)
+                # Las filas de un mismo jugador van en el mismo lote para marcar bien los traspasos
+                if len(chunk) >= INGEST_CHUNK_SIZE and row.get("player_name") != chunk[-1].get("player_name"):
+                    total += self.ingest_rows(chunk)
+                    chunk = []
+                chunk.append(row)
+        total += self.ingest_rows(chunk)
+        logging.info(f"📚 {total} temporadas cargadas desde {path}")
+        return total
+
+    def player_seasons(self, player_name):
+        """
+        Temporadas guardadas de un jugador (por nombre o alias normalizado), de la más antigua a la más reciente.
+        En una temporada con traspaso va primero la fila combinada (TOT/2TM) y después las de cada equipo.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT player_id, player_name, season, team, position, full_season, {', '.join(STAT_COLUMNS)} "
+                "FROM player_seasons "
+                "WHERE player_key = ? ORDER BY season_start, full_season DESC, team",
+                (normalize_player_name(player_name),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def full_seasons(self):
+        """
+        Todas las temporadas completas (sin las filas parciales de cada equipo en un traspaso).
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT player_id, player_name, season, team, full_season, {', '.join(STAT_COLUMNS)} "
+                "FROM player_seasons WHERE full_season = 1"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query(self, position=None, team=None, since=None, until=None, min_ppg=None, min_rpg=None,
+              min_apg=None, min_games=None, include_partial=False, order_by="points_per_game", limit=100):
+        """
+        Temporadas de toda la liga que cumplen los filtros, ordenadas de mayor a menor por `order_by`.
+
+        `position` admite un grupo ("G" = bases y escoltas, "F" = aleros y ala-pívots, "C") o una
+        posición concreta ("PG"). `since`/`until` son años de inicio de temporada (2015 = 2015-16).
+        Por defecto, en temporadas con traspaso se devuelve solo la fila combinada del jugador.
+        """
+        if order_by not in STAT_COLUMNS + ("season_start",):
+            raise ValueError(f"Columna de orden no válida: {order_by}")
+
+        conditions, params = [], []
+        if not include_partial:
+            conditions.append("full_season = 1")
+        if position:
+            conditions.append("position LIKE ?")
+            params.append(f"%{position.upper()}%")
+        if team:
+            conditions.append("team = ?")
+            params.append(team.upper())
+        for column, operator, value in (
+            ("season_start", ">=", since), ("season_start", "<=", until),
+            ("points_per_game", ">=", min_ppg), ("rebounds_per_game", ">=", min_rpg),
+            ("assists_per_game", ">=", min_apg), ("games", ">=", min_games),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT player_id, player_name, season, team, position, {', '.join(STAT_COLUMNS)} "
+                f"FROM player_seasons {where} ORDER BY {order_by} DESC LIMIT ?",
+                params + [int(limit)],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_stats(self):
+        with self._lock:
+            players, seasons = self._connection().execute(
+                "SELECT COUNT(DISTINCT player_id), COUNT(*) FROM player_seasons").fetchone()
+        return {"players": players, "season_rows": seasons}
+
+season_store = SeasonStore(Config.SEASON_STORE_DB_PATH)
+
+def query_seasons(**filters):
+    return season_store.query(**filters)
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga volcados CSV de temporada en el almacén local")
+    parser.add_argument("files", nargs="+", help="CSV 'per game' de Basketball Reference")
+    parser.add_argument("--season", help="Temporada de los ficheros sin columna Season, p. ej. 2023-24")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=Config.LOG_LEVEL)
+    for path in args.files:
+        season_store.ingest_csv(path, args.season)
+    print(season_store.get_stats())
+
+# Uso (desde backend/): PYTHONPATH=.:root_files python -m modules.season_store temporada.csv --season 2023-24
+if __name__ == "__main__":
+    main()
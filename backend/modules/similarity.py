@@ -0,0 +1,208 @@
+import logging
+import threading
+import numpy as np
+from config import Config
+from modules.player_index import player_index
+from modules.season_store import season_store
+
+#Objetivo: Responder "¿a quién se parece este jugador?" comparando su temporada con todas las
+# temporadas guardadas en el almacén local, en milisegundos y sin scraping.
+
+# Variables de cada temporada que forman el vector del jugador
+FEATURES = (
+    "age", "minutes_per_game",
+    "points_per_game", "rebounds_per_game", "assists_per_game",
+    "steals_per_game", "blocks_per_game", "turnovers_per_game",
+    "fg_pct", "fg3_pct", "ft_pct",
+)
+
+class SimilarityIndex:
+    """
+    Matriz NumPy (temporadas x variables) para búsqueda exacta de vecinos por fuerza bruta.
+
+    La matriz guarda los valores en bruto y se mantiene al día fila a fila con cada ingesta
+    del almacén de temporadas (alta, reemplazo o baja en O(1), sin reconstruirla). La media y la
+    desviación de cada variable se llevan en sumas acumuladas, así que la normalización z se
+    aplica en la consulta. Los valores que faltan cuentan como la media de la liga.
+    """
+
+    def __init__(self, store, features=FEATURES, min_games=None):
+        self.store = store
+        self.features = features
+        self.min_games = Config.SIMILARITY_MIN_GAMES if min_games is None else min_games
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._matrix = np.empty((1024, len(features)))
+        self._players = np.empty(1024, dtype=np.int64)   # código de jugador por fila
+        self._size = 0
+        self._keys = []                                  # fila -> (player_id, season, team)
+        self._names = []                                 # fila -> nombre del jugador
+        self._rows = {}                                  # (player_id, season, team) -> fila
+        self._player_codes = {}                          # player_id -> código
+        self._sum = np.zeros(len(features))
+        self._sumsq = np.zeros(len(features))
+        self._count = np.zeros(len(features))
+
+    def _comparable(self, row):
+        games = row.get("games")
+        return bool(row.get("full_season", 1)) and (games is None or games >= self.min_games)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        # Carga inicial en bloque: una sola matriz y sumas vectorizadas
+        rows = [row for row in self.store.full_seasons() if self._comparable(row)]
+        matrix = np.array([[np.nan if row.get(feature) is None else row[feature] for feature in self.features]
+                           for row in rows], dtype=float).reshape(len(rows), len(self.features))
+        self._matrix = np.concatenate([matrix, np.empty((max(len(rows), 1024), len(self.features)))])
+        self._players = np.empty(len(self._matrix), dtype=np.int64)
+        for index, row in enumerate(rows):
+            key = (row["player_id"], row["season"], row["team"])
+            self._keys.append(key)
+            self._names.append(row["player_name"])
+            self._rows[key] = index
+            self._players[index] = self._player_codes.setdefault(row["player_id"], len(self._player_codes))
+        self._size = len(rows)
+        self._sum = np.nansum(matrix, axis=0)
+        self._sumsq = np.nansum(matrix ** 2, axis=0)
+        self._count = np.sum(~np.isnan(matrix), axis=0).astype(float)
+        self._loaded = True
+        logging.info(f"🧭 Índice de similitud cargado con {self._size} temporadas")
+
+    def _vector(self, row):
+        return np.array([np.nan if row.get(feature) is None else row[feature] for feature in self.features], dtype=float)
+
+    def _accumulate(self, vector, sign):
+        present = ~np.isnan(vector)
+        self._sum[present] += sign * vector[present]
+        self._sumsq[present] += sign * vector[present] ** 2
+        self._count[present] += sign
+
+    def _remove(self, index):
+        self._accumulate(self._matrix[index], -1)
+        del self._rows[self._keys[index]]
+        last = self._size - 1
+        if index != last:
+            # La última fila ocupa el hueco
+            self._matrix[index] = self._matrix[last]
+            self._players[index] = self._players[last]
+            self._keys[index] = self._keys[last]
+            self._names[index] = self._names[last]
+            self._rows[self._keys[index]] = index
+        self._keys.pop()
+        self._names.pop()
+        self._size = last
+
+    def _upsert(self, row):
+        key = (row["player_id"], row["season"], row["team"])
+        index = self._rows.get(key)
+        if not self._comparable(row):
+            if index is not None:
+                self._remove(index)
+            return
+
+        vector = self._vector(row)
+        if index is None:
+            if self._size == len(self._matrix):
+                # Crecimiento geométrico: añadir filas sigue siendo O(1) amortizado
+                self._matrix = np.concatenate([self._matrix, np.empty_like(self._matrix)])
+                self._players = np.concatenate([self._players, np.empty_like(self._players)])
+            index = self._size
+            self._size += 1
+            self._keys.append(key)
+            self._names.append(row["player_name"])
+            self._rows[key] = index
+            self._players[index] = self._player_codes.setdefault(row["player_id"], len(self._player_codes))
+        else:
+            self._accumulate(self._matrix[index], -1)
+            self._names[index] = row["player_name"]
+        self._matrix[index] = vector
+        self._accumulate(vector, 1)
+
+    def on_ingest(self, rows):
+        """
+        Listener del almacén de temporadas: aplica las filas recién guardadas.
+        """
+        with self._lock:
+            # Si aún no se ha cargado, la carga inicial ya leerá estas filas
+            if self._loaded:
+                for row in rows:
+                    self._upsert(row)
+
+    def similar(self, target, k=10):
+        """
+        Las `k` temporadas más parecidas a `target` (una fila del almacén), como mucho una por jugador.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            size = self._size
+            if not size:
+                return []
+            matrix = self._matrix[:size]
+            count = np.maximum(self._count, 1)
+            mean = self._sum / count
+            std = np.sqrt(np.maximum(self._sumsq / count - mean ** 2, 0))
+            std[std == 0] = 1
+
+            query = self._vector(target)
+            query = np.where(np.isnan(query), mean, query)
+            diff = (np.where(np.isnan(matrix), mean, matrix) - query) / std
+            distances = np.einsum("ij,ij->i", diff, diff)
+            target_code = self._player_codes.get(target["player_id"])
+            if target_code is not None:
+                distances[self._players[:size] == target_code] = np.inf
+
+            # Primero un subconjunto con argpartition; si no da para k jugadores distintos, orden completo
+            candidates = min(size, k * 5)
+            for order in (np.argpartition(distances, candidates - 1)[:candidates], np.arange(size)):
+                order = order[np.argsort(distances[order])]
+                results, seen = [], set()
+                for index in order:
+                    if not np.isfinite(distances[index]) or len(results) == k:
+                        break
+                    player_code = self._players[index]
+                    if player_code in seen:
+                        continue
+                    seen.add(player_code)
+                    results.append(self._result(index, distances[index]))
+                if len(results) == k or candidates == size:
+                    return results
+            return results
+
+    def _result(self, index, squared_distance):
+        player_id, season, _ = self._keys[index]
+        distance = float(np.sqrt(squared_distance))
+        stats = {feature: (None if np.isnan(value) else round(float(value), 3))
+                 for feature, value in zip(self.features, self._matrix[index])}
+        return {
+            "player_id": player_id,
+            "player_name": self._names[index],
+            "season": season,
+            "distance": round(distance, 3),
+            "similarity": round(1 / (1 + distance), 3),
+            "stats": stats,
+        }
+
+similarity_index = SimilarityIndex(season_store)
+season_store.add_listener(similarity_index.on_ingest)
+
+def find_similar_players(player_name, season=None, k=10):
+    """
+    Jugadores más parecidos a `player_name` en `season` (por defecto, su última temporada completa).
+
+    Devuelve None si el jugador no tiene temporadas en el almacén local.
+    """
+    seasons = season_store.player_seasons(player_name)
+    if not seasons:
+        display_name = player_index.display_name(player_name)
+        seasons = season_store.player_seasons(display_name) if display_name else []
+    seasons = [row for row in seasons if row["full_season"] and (season is None or row["season"] == season)]
+    if not seasons:
+        return None
+
+    target = seasons[-1]
+    return {
+        "player": target["player_name"],
+        "season": target["season"],
+        "similar": similarity_index.similar(target, k),
+    }
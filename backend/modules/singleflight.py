@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import weakref
+from modules.metrics import coalesced_requests
+
+#Objetivo: Que las consultas simultáneas de lo mismo (p. ej. decenas de scouts buscando al
+# jugador de un traspaso) esperen a una única ejecución en curso y compartan su resultado.
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave (entre hilos).
+
+    La primera llamada ejecuta la función; las que llegan mientras está en curso esperan y reciben
+    el mismo resultado (o la misma excepción). Al terminar, la clave queda libre: no es una caché.
+    Los resultados se comparten entre llamantes y deben tratarse como de solo lectura.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            coalesced_requests.inc(scope=self.scope)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+class AsyncSingleFlight:
+    """
+    Equivalente de `SingleFlight` para corrutinas (modo ASGI).
+
+    La ejecución compartida es una tarea propia: si se cancela quien la inició (p. ej. el
+    cliente se desconecta), el resto sigue esperando el resultado sin interrupción.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        self._calls = weakref.WeakKeyDictionary()   # event loop -> {clave: tarea}
+
+    async def do(self, key, func, *args):
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = asyncio.ensure_future(func(*args))
+            task.add_done_callback(lambda done: calls.pop(key, None) if calls.get(key) is done else None)
+        else:
+            coalesced_requests.inc(scope=self.scope)
+        return await asyncio.shield(task)
@@ -0,0 +1,347 @@
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from urllib.parse import urlsplit
+from config import Config
+
+try:
+    import zstandard
+except ImportError:
+    # Opcional: sin zstandard se comprime con zlib (también con diccionario, hasta 32 KB)
+    zstandard = None
+
+#Objetivo: Guardar las páginas y respuestas descargadas tal cual llegaron, para poder volver a
+# parsearlas (p. ej. cuando Basketball Reference cambia los IDs de sus tablas) sin ir a la red.
+# Las páginas de un mismo sitio comparten casi todo el marcado: se comprimen con un diccionario
+# por sitio y las idénticas se guardan una sola vez (por su SHA-256).
+
+ZSTD, ZLIB = "zstd", "zlib"
+ZLIB_MAX_DICT_SIZE = 32 * 1024    # Ventana de deflate: de un diccionario mayor solo se usaría el final
+
+def current_codec():
+    return ZSTD if zstandard is not None else ZLIB
+
+def build_dictionary(samples, size):
+    """
+    Diccionario con el marcado común a las muestras (líneas presentes en al menos la mitad de
+    ellas), con lo más repetido al final, que es lo que los compresores referencian más barato.
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update(set(sample.splitlines(keepends=True)))
+    threshold = max(2, len(samples) // 2)
+    chosen, total = [], 0
+    for line, count in counts.most_common():
+        if count < threshold or total >= size:
+            break
+        if len(line.strip()) < 8:
+            continue
+        chosen.append(line)
+        total += len(line)
+    return b"".join(reversed(chosen))[-size:]
+
+def _train_dictionary(codec, samples, size):
+    if codec == ZSTD:
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except Exception as e:
+            # zstd necesita bastantes muestras; con pocas se usa el marcado común como diccionario
+            logging.info(f"🗜️ Diccionario zstd sin entrenar ({str(e)}), se usa el marcado común")
+    return build_dictionary(samples, min(size, ZLIB_MAX_DICT_SIZE) if codec == ZLIB else size)
+
+def _compress(codec, data, dictionary, level):
+    if codec == ZSTD:
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=level, dict_data=dict_data).compress(data)
+    compressor = zlib.compressobj(level, zdict=dictionary) if dictionary else zlib.compressobj(level)
+    return compressor.compress(data) + compressor.flush()
+
+def _decompress(codec, data, dictionary):
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Snapshot comprimido con zstd: instala zstandard para leerlo")
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+class SnapshotStore:
+    """
+    Respuestas descargadas (HTML y JSON) en SQLite, comprimidas y direccionadas por contenido.
+
+    - `snapshot_blobs`: un contenido por SHA-256; si una página no cambia entre descargas no se
+      vuelve a guardar, solo se anota que se ha visto.
+    - `snapshots`: qué contenido tenía cada URL y cuándo.
+    - `snapshot_dicts`: diccionario de compresión por host, entrenado con sus primeras
+      `dict_samples` páginas (esas páginas se recomprimen con él al entrenarlo).
+
+    El tamaño comprimido total se mantiene por debajo de `max_bytes` borrando los contenidos
+    usados (guardados o vistos) hace más tiempo.
+
+    Desde las consultas se usa `submit`: el hash, la compresión, el entrenamiento de diccionarios,
+    la escritura y el desalojo los hace un hilo en segundo plano. Si su cola está llena, el
+    snapshot se descarta (queda anotado en `dropped`) en vez de frenar la consulta.
+    """
+
+    def __init__(self, db_path, max_bytes=None, dict_samples=None, dict_size=None, level=None, queue_size=None):
+        self.db_path = db_path
+        self.max_bytes = max_bytes or Config.SNAPSHOT_MAX_BYTES
+        self.dict_samples = dict_samples or Config.SNAPSHOT_DICT_SAMPLES
+        self.dict_size = dict_size or Config.SNAPSHOT_DICT_SIZE
+        self.level = level or Config.SNAPSHOT_COMPRESSION_LEVEL
+        self._db = None
+        self._lock = threading.Lock()
+        self._dicts = {}             # dict_id -> bytes
+        self._stored_bytes = 0
+        self._stats = {"writes": 0, "deduplicated": 0, "evicted": 0, "dropped": 0}
+        self._queue = queue.Queue(maxsize=queue_size or Config.SNAPSHOT_QUEUE_SIZE)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS snapshot_dicts (
+                       dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       host TEXT NOT NULL,
+                       codec TEXT NOT NULL,
+                       data BLOB NOT NULL,
+                       created_at REAL NOT NULL
+                   )"""
+            )
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS snapshot_blobs (
+                       sha256 TEXT PRIMARY KEY,
+                       host TEXT NOT NULL,
+                       codec TEXT NOT NULL,
+                       dict_id INTEGER,
+                       data BLOB NOT NULL,
+                       raw_size INTEGER NOT NULL,
+                       stored_size INTEGER NOT NULL,
+                       last_used REAL NOT NULL
+                   )"""
+            )
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS snapshots (
+                       url TEXT NOT NULL,
+                       sha256 TEXT NOT NULL,
+                       content_type TEXT,
+                       fetched_at REAL NOT NULL,
+                       PRIMARY KEY (url, sha256)
+                   )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_used ON snapshot_blobs (last_used)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_sha256 ON snapshots (sha256)")
+            self._stored_bytes = self._db.execute(
+                "SELECT COALESCE(SUM(stored_size), 0) FROM snapshot_blobs").fetchone()[0]
+        return self._db
+
+    def _dictionary(self, db, dict_id):
+        if dict_id is None:
+            return None
+        dictionary = self._dicts.get(dict_id)
+        if dictionary is None:
+            row = db.execute("SELECT data FROM snapshot_dicts WHERE dict_id = ?", (dict_id,)).fetchone()
+            dictionary = self._dicts[dict_id] = bytes(row[0])
+        return dictionary
+
+    def _host_dictionary(self, db, host, codec):
+        row = db.execute(
+            "SELECT dict_id FROM snapshot_dicts WHERE host = ? AND codec = ? ORDER BY dict_id DESC LIMIT 1",
+            (host, codec),
+        ).fetchone()
+        return (row[0], self._dictionary(db, row[0])) if row else (None, None)
+
+    def _maybe_train(self, db, host, codec):
+        """
+        Con `dict_samples` páginas sin diccionario del host, entrena el suyo y las recomprime con él.
+        """
+        rows = db.execute(
+            "SELECT sha256, codec, data FROM snapshot_blobs WHERE host = ? AND dict_id IS NULL LIMIT ?",
+            (host, self.dict_samples),
+        ).fetchall()
+        if len(rows) < self.dict_samples:
+            return
+        samples = {sha256: _decompress(blob_codec, data, None) for sha256, blob_codec, data in rows}
+        dictionary = _train_dictionary(codec, list(samples.values()), self.dict_size)
+        if not dictionary:
+            return
+        dict_id = db.execute(
+            "INSERT INTO snapshot_dicts (host, codec, data, created_at) VALUES (?, ?, ?, ?)",
+            (host, codec, dictionary, time.time()),
+        ).lastrowid
+        self._dicts[dict_id] = dictionary
+        for sha256, content in samples.items():
+            data = _compress(codec, content, dictionary, self.level)
+            old_size = db.execute("SELECT stored_size FROM snapshot_blobs WHERE sha256 = ?", (sha256,)).fetchone()[0]
+            db.execute("UPDATE snapshot_blobs SET codec = ?, dict_id = ?, data = ?, stored_size = ? WHERE sha256 = ?",
+                       (codec, dict_id, data, len(data), sha256))
+            self._stored_bytes += len(data) - old_size
+        logging.info(f"🗜️ Diccionario de compresión para {host} ({len(dictionary)} bytes, {len(samples)} muestras)")
+
+    def _evict(self, db):
+        # LRU: primero los contenidos usados hace más tiempo, con las URLs que apuntaban a ellos
+        while self._stored_bytes > self.max_bytes:
+            rows = db.execute("SELECT sha256, stored_size FROM snapshot_blobs ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                break
+            for sha256, stored_size in rows:
+                db.execute("DELETE FROM snapshot_blobs WHERE sha256 = ?", (sha256,))
+                db.execute("DELETE FROM snapshots WHERE sha256 = ?", (sha256,))
+                self._stored_bytes -= stored_size
+                self._stats["evicted"] += 1
+                if self._stored_bytes <= self.max_bytes:
+                    break
+
+    def record(self, url, content, content_type=None):
+        """
+        Guarda el contenido descargado de `url`. Devuelve su SHA-256 (si ya estaba, no se vuelve a guardar).
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        host = urlsplit(url).netloc
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            with db:
+                seen = db.execute("UPDATE snapshot_blobs SET last_used = ? WHERE sha256 = ?", (now, sha256)).rowcount
+                if seen:
+                    self._stats["deduplicated"] += 1
+                else:
+                    codec = current_codec()
+                    dict_id, dictionary = self._host_dictionary(db, host, codec)
+                    data = _compress(codec, content, dictionary, self.level)
+                    db.execute("INSERT INTO snapshot_blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (sha256, host, codec, dict_id, data, len(content), len(data), now))
+                    self._stored_bytes += len(data)
+                    self._stats["writes"] += 1
+                    if dict_id is None:
+                        self._maybe_train(db, host, codec)
+                db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)", (url, sha256, content_type, now))
+                self._evict(db)
+        return sha256
+
+    def submit(self, url, content, content_type=None):
+        """
+        Encola el contenido de `url` para que lo guarde el hilo de escritura. No bloquea nunca.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="snapshot-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait((url, content, content_type))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            logging.warning(f"🗜️ Cola de snapshots llena, se descarta {url}")
+
+    def _write_pending(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.record(*item)
+            except Exception as e:
+                logging.error(f"❌ Error guardando snapshot de {item[0]}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Espera a que se guarden los snapshots encolados hasta ahora.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Guarda lo pendiente y para el hilo de escritura.
+        """
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def read(self, sha256, touch=True):
+        """
+        Contenido original (bytes) de un snapshot, o None si no está (o se desalojó).
+        """
+        with self._lock:
+            db = self._connection()
+            row = db.execute("SELECT codec, dict_id, data FROM snapshot_blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None:
+                return None
+            codec, dict_id, data = row
+            dictionary = self._dictionary(db, dict_id)
+            if touch:
+                with db:
+                    db.execute("UPDATE snapshot_blobs SET last_used = ? WHERE sha256 = ?", (time.time(), sha256))
+        return _decompress(codec, data, dictionary)
+
+    def latest(self, url):
+        """
+        Último contenido guardado de `url` (bytes) o None.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT sha256 FROM snapshots WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (url,)
+            ).fetchone()
+        return self.read(row[0]) if row else None
+
+    def latest_snapshots(self):
+        """
+        (url, sha256) del último contenido guardado de cada URL.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT url, sha256 FROM snapshots s WHERE fetched_at = "
+                "(SELECT MAX(fetched_at) FROM snapshots WHERE url = s.url) ORDER BY url"
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def get_stats(self):
+        with self._lock:
+            db = self._connection()
+            blobs, raw_bytes = db.execute("SELECT COUNT(*), COALESCE(SUM(raw_size), 0) FROM snapshot_blobs").fetchone()
+            urls = db.execute("SELECT COUNT(DISTINCT url) FROM snapshots").fetchone()[0]
+            stats = dict(self._stats, urls=urls, blobs=blobs, raw_bytes=raw_bytes, stored_bytes=self._stored_bytes,
+                         pending=self._queue.qsize())
+        stats["compression_ratio"] = round(raw_bytes / stats["stored_bytes"], 2) if stats["stored_bytes"] else 0.0
+        return stats
+
+snapshot_store = SnapshotStore(Config.SNAPSHOT_DB_PATH)
+# Los procesos por lotes (bulk_ingest) terminan nada más acabar: antes se guarda lo encolado
+atexit.register(lambda: snapshot_store.close())
+
+def record_response(request, response):
+    """
+    Encola en el almacén de snapshots una respuesta 200 de HTML o JSON (se llama desde `run_steps`
+    y `run_steps_async`); se guarda en segundo plano.
+
+    Nunca lanza: un fallo al guardar el snapshot no debe romper la consulta.
+    """
+    if not Config.SNAPSHOTS_ENABLED:
+        return
+    try:
+        if response.status_code != 200:
+            return
+        content_type = response.headers.get("Content-Type") or ""
+        if "html" not in content_type and "json" not in content_type:
+            return
+        url = str(response.url) if request.params else request.url
+        snapshot_store.submit(url, response.content, content_type)
+    except Exception as e:
+        logging.error(f"❌ Error guardando snapshot de {request.url}: {str(e)}")
@@ -1,21 +1,24 @@
-import requests
 from bs4 import BeautifulSoup
 import logging
+from modules.cache import cached
+from modules.http_client import run_steps, HttpRequest
+from modules.conditional_fetch import conditional_page_steps
+from modules.async_http_client import run_steps_async
+from modules.resilience import UpstreamError
+from modules.player_index import player_index
 from config import Config
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
-
-def get_contract_info(player_name):
+def _contract_info_steps(player_name):
     """
-    Obtiene información contractual de un jugador desde Spotrac.
+    Pasos HTTP para obtener el contrato (compartidos por la versión síncrona y la asíncrona).
     """
-    try:
-        # 🔎 1️⃣ Buscar al jugador en Spotrac
+    # 🔎 1️⃣ Buscar al jugador en Spotrac (solo si no está en el índice local)
+    player_href = player_index.resolve("spotrac", player_name)
+    if not player_href:
         search_url = f"{Config.SPOTRAC_URL}search/{player_name.replace(' ', '-')}/"
         logging.info(f"📑 Buscando en Spotrac: {search_url}")
-        
-        response = requests.get(search_url)
+
+        response = yield HttpRequest(search_url)
         soup = BeautifulSoup(response.text, "html.parser")
 
         # Extraer la URL del perfil del jugador
@@ -23,22 +26,48 @@ def get_contract_info(player_name):
         if not player_profile:
             logging.warning(f"⚠️ No se encontró información de contrato para {player_name}")
             return None
-        
-        player_url = Config.SPOTRAC_URL + player_profile["href"]
-        logging.info(f"🔗 URL del contrato del jugador: {player_url}")
-
-        # 🔎 2️⃣ Extraer información del contrato
-        player_response = requests.get(player_url)
-        player_soup = BeautifulSoup(player_response.text, "html.parser")
-
-        contract_section = player_soup.find("div", class_="player_contracts")
-        if contract_section:
-            contract_info = contract_section.text.strip()
-            return contract_info
-        
-        logging.warning(f"⚠️ No se encontró información de contrato para {player_name}")
-        return None
 
+        player_href = player_profile["href"]
+        player_index.register("spotrac", player_name, player_href, player_profile.text.strip() or None)
+
+    player_url = Config.SPOTRAC_URL + player_href
+    logging.info(f"🔗 URL del contrato del jugador: {player_url}")
+
+    # 🔎 2️⃣ Extraer información del contrato (sin descargar ni parsear si el perfil no ha cambiado)
+    contract_info, _, _ = yield from conditional_page_steps(player_url, _parse_contract, "spotrac")
+    if contract_info:
+        return contract_info
+
+    logging.warning(f"⚠️ No se encontró información de contrato para {player_name}")
+    return None
+
+def _parse_contract(page_html):
+    player_soup = BeautifulSoup(page_html, "html.parser")
+    contract_section = player_soup.find("div", class_="player_contracts")
+    return contract_section.text.strip() if contract_section else None
+
+@cached("contract_info")
+def get_contract_info(player_name):
+    """
+    Obtiene información contractual de un jugador desde Spotrac.
+    """
+    try:
+        return run_steps(_contract_info_steps(player_name))
+    except UpstreamError:
+        raise
     except Exception as e:
         logging.error(f"❌ Error en get_contract_info: {str(e)}")
         return None
+
+@cached("contract_info")
+async def get_contract_info_async(player_name):
+    """
+    Versión asíncrona de `get_contract_info` (modo ASGI).
+    """
+    try:
+        return await run_steps_async(_contract_info_steps(player_name))
+    except UpstreamError:
+        raise
+    except Exception as e:
+        logging.error(f"❌ Error en get_contract_info_async: {str(e)}")
+        return None
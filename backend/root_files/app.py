@@ -1,11 +1,70 @@
-from flask import Flask, request, jsonify
-from modules.data_merger import merge_player_data
-from modules.data_processor import clean_player_data
-from modules.prediction_model import predict_player_performance
-from modules.mistral_ai import generate_analysis
+import logging
+import os
+import time
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from config import Config
+from modules.data_merger import merge_player_data, merge_players_data
+from modules.data_processor import build_player_response
+from modules.mistral_ai import stream_player_analysis
+from modules.cache import invalidate_player, get_cache_stats
+from modules.http_client import get_connection_stats
+from modules.player_index import suggest_players
+from modules.season_store import query_seasons
+from modules.similarity import find_similar_players
+from modules.basketball_reference import get_historical_stats
+from modules.refresh_scheduler import build_refresh_scheduler
+from modules.metrics import render_prometheus, request_duration, start_trace, end_trace, server_timing_header
+from modules.records import dumps
+
+# Configurar logging (una sola vez para toda la aplicación)
+logging.basicConfig(level=Config.LOG_LEVEL)
 
 app = Flask(__name__)
 
+# ♻️ Precalentar en segundo plano la caché de los jugadores más consultados. Se crea al importar,
+# pero el hilo no arranca hasta `start_refresh_scheduler`: importar el módulo (recargador de Flask,
+# cada worker de gunicorn, los tests) no debe lanzar refrescos por su cuenta.
+refresh_scheduler = build_refresh_scheduler()
+
+def start_refresh_scheduler(reloader=False):
+    """
+    Arranca el planificador de refresco una vez por proceso servidor.
+
+    Con el recargador de Werkzeug (`reloader=True`) el proceso padre solo vigila los ficheros y
+    el que atiende peticiones es el hijo (`WERKZEUG_RUN_MAIN=true`): solo arranca en ese. Con un
+    servidor WSGI de varios workers hay que llamarlo desde un hook de arranque y activarlo
+    (`REFRESH_SCHEDULER_ENABLED=1`) en un único proceso, o cada worker repetirá los refrescos.
+    """
+    if not Config.REFRESH_SCHEDULER_ENABLED:
+        return
+    if reloader and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        return
+    refresh_scheduler.start()
+
+@app.before_request
+def start_request_timing():
+    g.started_at = time.perf_counter()
+    # Traza por etapas solo si el cliente la pide (cabecera X-Trace: 1 o ?trace=1)
+    if request.headers.get("X-Trace") == "1" or request.args.get("trace") == "1":
+        g.trace_token = start_trace()
+
+@app.after_request
+def finish_request_timing(response):
+    elapsed = time.perf_counter() - g.started_at
+    request_duration.observe(elapsed, endpoint=request.url_rule.rule if request.url_rule else "unknown")
+    token = g.pop("trace_token", None)
+    if token is not None:
+        trace = end_trace(token) + [("total", elapsed)]
+        response.headers["Server-Timing"] = server_timing_header(trace)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Métricas en formato Prometheus: latencia por etapa y por fuente, aciertos de caché y errores.
+    """
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/api/query', methods=['POST'])
 def query_player():
     """
@@ -17,32 +76,153 @@ def query_player():
     if not player_name:
         return jsonify({"error": "Debes proporcionar un nombre de jugador"}), 400
 
+    refresh_scheduler.record_query(player_name)
+
     try:
         # 🔹 Obtener y fusionar todos los datos en un solo JSON estructurado
-        merged_data = merge_player_data(player_name)
+        record = merge_player_data(player_name)
 
-        # 🔹 Limpiar los datos antes de usarlos en modelos predictivos
-        cleaned_data = clean_player_data(merged_data)
+        return Response(dumps(build_player_response(player_name, record)), mimetype="application/json")
 
-        # 🔹 Generar predicciones basadas en `stats_history`
-        historical_stats = merged_data.get("stats", {}).get("historical", [])
-        if historical_stats:
-            performance_predictions = predict_player_performance(historical_stats)
-        else:
-            performance_predictions = {"predicted_ppg": "No disponible", "predicted_rpg": "No disponible", "predicted_apg": "No disponible"}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # 🔹 Generar análisis con IA basado en los datos limpios
-        ai_analysis = generate_analysis(cleaned_data)
+@app.route('/api/query/batch', methods=['POST'])
+def query_players_batch():
+    """
+    Consulta varios jugadores (plantilla, draft board) y devuelve NDJSON: una línea por jugador
+    en cuanto termina, con la misma estructura que /api/query.
+    """
+    data = request.get_json() or {}
+    player_names = data.get("player_names")
 
-        return jsonify({
-            "player": player_name,
-            "data": cleaned_data,
-            "predictions": performance_predictions,
-            "ai_analysis": ai_analysis
-        })
+    if not isinstance(player_names, list) or not player_names:
+        return jsonify({"error": "Debes proporcionar una lista de nombres en player_names"}), 400
+    if len(player_names) > Config.BATCH_MAX_PLAYERS:
+        return jsonify({"error": f"Máximo {Config.BATCH_MAX_PLAYERS} jugadores por consulta"}), 400
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    for player_name in player_names:
+        refresh_scheduler.record_query(str(player_name))
+
+    def generate():
+        for player_name, record, error in merge_players_data(str(name) for name in player_names):
+            if error is None:
+                try:
+                    line = build_player_response(player_name, record)
+                except Exception as e:
+                    line = {"player": player_name, "error": str(e)}
+            else:
+                line = {"player": player_name, "error": error}
+            yield dumps(line) + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route('/api/query/stream', methods=['POST'])
+def query_player_stream():
+    """
+    Como /api/query, pero por Server-Sent Events: primero un evento `player` con los datos y
+    predicciones, después el análisis de IA en eventos `token` según se genera y un evento `done`.
+    """
+    data = request.get_json() or {}
+    player_name = data.get("player_name")
+
+    if not player_name:
+        return jsonify({"error": "Debes proporcionar un nombre de jugador"}), 400
+
+    refresh_scheduler.record_query(player_name)
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {dumps(payload).decode('utf-8')}\n\n"
+
+    def generate():
+        try:
+            record = merge_player_data(player_name, include_analysis=False)
+            body = build_player_response(player_name, record)
+            del body["ai_analysis"]
+            yield sse("player", body)
+
+            for chunk in stream_player_analysis(record):
+                yield sse("token", chunk)
+            yield sse("done", {})
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+@app.route('/api/players/autocomplete', methods=['GET'])
+def autocomplete_players():
+    """
+    Sugerencias de nombres desde el índice local de jugadores (no consulta fuentes externas).
+    """
+    query = request.args.get("q", "")
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    return jsonify({"query": query, "suggestions": suggest_players(query, limit)})
+
+@app.route('/api/seasons', methods=['GET'])
+def search_seasons():
+    """
+    Temporadas de toda la liga desde el almacén local, p. ej. ?position=G&min_ppg=20&since=2015.
+    """
+    try:
+        seasons = query_seasons(
+            position=request.args.get("position"),
+            team=request.args.get("team"),
+            since=request.args.get("since", type=int),
+            until=request.args.get("until", type=int),
+            min_ppg=request.args.get("min_ppg", type=float),
+            min_rpg=request.args.get("min_rpg", type=float),
+            min_apg=request.args.get("min_apg", type=float),
+            min_games=request.args.get("min_games", type=int),
+            order_by=request.args.get("order_by", "points_per_game"),
+            limit=min(request.args.get("limit", 100, type=int), 1000),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"count": len(seasons), "seasons": seasons})
+
+@app.route('/api/similar', methods=['GET'])
+def similar_players():
+    """
+    Jugadores más parecidos por temporada, p. ej. ?player=Kevin Durant&season=2013-14&k=10.
+    """
+    player_name = request.args.get("player", "").strip()
+    if not player_name:
+        return jsonify({"error": "Debes proporcionar un nombre de jugador"}), 400
+    season = request.args.get("season")
+    k = min(request.args.get("k", 10, type=int), 50)
+
+    result = find_similar_players(player_name, season, k)
+    if result is None and get_historical_stats(player_name):
+        # Jugador aún no guardado en local: su histórico se acaba de descargar y almacenar
+        result = find_similar_players(player_name, season, k)
+    if result is None:
+        return jsonify({"error": f"No hay temporadas de {player_name}" + (f" en {season}" if season else "")}), 404
+    return jsonify(result)
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Aciertos y fallos de la caché de respuestas.
+    """
+    return jsonify(get_cache_stats())
+
+@app.route('/api/http/stats', methods=['GET'])
+def http_stats():
+    """
+    Conexiones nuevas frente a reutilizadas, reintentos y espera por rate limiting, por host.
+    """
+    return jsonify(get_connection_stats())
+
+@app.route('/api/cache/<player_name>', methods=['DELETE'])
+def invalidate_player_cache(player_name):
+    """
+    Invalida todas las entradas en caché de un jugador (p. ej. tras un traspaso).
+    """
+    deleted = invalidate_player(player_name)
+    return jsonify({"player": player_name, "invalidated": deleted})
 
 if __name__ == '__main__':
+    # debug=True activa el recargador de Werkzeug
+    start_refresh_scheduler(reloader=True)
     app.run(debug=True)
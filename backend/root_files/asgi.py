@@ -0,0 +1,255 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from config import Config
+from modules.data_merger import merge_player_data_async, merge_players_data_async
+from modules.data_processor import build_player_response
+from modules.mistral_ai import stream_player_analysis
+from modules.async_http_client import async_http_client
+from modules.cache import invalidate_player, get_cache_stats
+from modules.http_client import get_connection_stats
+from modules.player_index import suggest_players
+from modules.season_store import query_seasons
+from modules.similarity import find_similar_players
+from modules.basketball_reference import get_historical_stats_async
+from modules.refresh_scheduler import build_refresh_scheduler
+from modules.metrics import render_prometheus, request_duration, start_trace, end_trace, server_timing_header
+from modules.records import dumps
+
+#Objetivo: Modo de servicio asíncrono (ASGI). Mismo contrato JSON que app.py, pero cada
+# consulta en curso espera a las fuentes sin ocupar un hilo.
+#
+#   cd backend && PYTHONPATH=.:root_files uvicorn asgi:app --workers 1
+#
+# Lo que no tiene versión asíncrona (SQLite, NumPy, el contador del refresco) se ejecuta con
+# `run_in_threadpool`: una consulta lenta no debe parar el event loop para el resto.
+
+# Configurar logging (una sola vez para toda la aplicación)
+logging.basicConfig(level=Config.LOG_LEVEL)
+
+refresh_scheduler = build_refresh_scheduler()
+
+@asynccontextmanager
+async def lifespan(app):
+    if Config.REFRESH_SCHEDULER_ENABLED:
+        refresh_scheduler.start()
+    yield
+    refresh_scheduler.stop()
+    await async_http_client.aclose()
+
+class TimingMiddleware(BaseHTTPMiddleware):
+    """
+    Duración por endpoint y, con X-Trace: 1 o ?trace=1, cabecera Server-Timing por etapa.
+    """
+
+    async def dispatch(self, request, call_next):
+        started_at = time.perf_counter()
+        tracing = request.headers.get("X-Trace") == "1" or request.query_params.get("trace") == "1"
+        token = start_trace() if tracing else None
+        response = await call_next(request)
+        elapsed = time.perf_counter() - started_at
+        route = request.scope.get("route")
+        request_duration.observe(elapsed, endpoint=route.path if route else "unknown")
+        if token is not None:
+            response.headers["Server-Timing"] = server_timing_header(end_trace(token) + [("total", elapsed)])
+        return response
+
+class RecordJSONResponse(JSONResponse):
+    """
+    JSONResponse serializada con `records.dumps` (orjson si está instalado, admite registros y NumPy).
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+async def _json_body(request):
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+async def query_player(request):
+    """
+    Endpoint principal para consultar un jugador y obtener todas sus estadísticas.
+    """
+    data = await _json_body(request)
+    player_name = data.get("player_name")
+
+    if not player_name:
+        return JSONResponse({"error": "Debes proporcionar un nombre de jugador"}, status_code=400)
+
+    await run_in_threadpool(refresh_scheduler.record_query, player_name)
+
+    try:
+        record = await merge_player_data_async(player_name)
+        return RecordJSONResponse(build_player_response(player_name, record))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def query_players_batch(request):
+    """
+    Consulta varios jugadores y devuelve NDJSON, una línea por jugador en cuanto termina.
+    """
+    data = await _json_body(request)
+    player_names = data.get("player_names")
+
+    if not isinstance(player_names, list) or not player_names:
+        return JSONResponse({"error": "Debes proporcionar una lista de nombres en player_names"}, status_code=400)
+    if len(player_names) > Config.BATCH_MAX_PLAYERS:
+        return JSONResponse({"error": f"Máximo {Config.BATCH_MAX_PLAYERS} jugadores por consulta"}, status_code=400)
+
+    def record_queries():
+        for player_name in player_names:
+            refresh_scheduler.record_query(str(player_name))
+
+    await run_in_threadpool(record_queries)
+
+    async def generate():
+        async for player_name, record, error in merge_players_data_async(str(name) for name in player_names):
+            if error is None:
+                try:
+                    line = build_player_response(player_name, record)
+                except Exception as e:
+                    line = {"player": player_name, "error": str(e)}
+            else:
+                line = {"player": player_name, "error": error}
+            yield dumps(line) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+async def query_player_stream(request):
+    """
+    Como /api/query, pero por Server-Sent Events (eventos `player`, `token` y `done`).
+    """
+    data = await _json_body(request)
+    player_name = data.get("player_name")
+
+    if not player_name:
+        return JSONResponse({"error": "Debes proporcionar un nombre de jugador"}, status_code=400)
+
+    await run_in_threadpool(refresh_scheduler.record_query, player_name)
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {dumps(payload).decode('utf-8')}\n\n"
+
+    async def generate():
+        try:
+            record = await merge_player_data_async(player_name, include_analysis=False)
+            body = build_player_response(player_name, record)
+            del body["ai_analysis"]
+            yield sse("player", body)
+
+            # El cliente de Mistral es síncrono: el stream se consume desde un hilo
+            async for chunk in iterate_in_threadpool(stream_player_analysis(record)):
+                yield sse("token", chunk)
+            yield sse("done", {})
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(generate(), media_type="text/event-stream", headers=headers)
+
+async def autocomplete_players(request):
+    """
+    Sugerencias de nombres desde el índice local de jugadores (no consulta fuentes externas).
+    """
+    query = request.query_params.get("q", "")
+    try:
+        limit = min(int(request.query_params.get("limit", 10)), 50)
+    except ValueError:
+        limit = 10
+    return JSONResponse({"query": query, "suggestions": await run_in_threadpool(suggest_players, query, limit)})
+
+async def search_seasons(request):
+    """
+    Temporadas de toda la liga desde el almacén local, p. ej. ?position=G&min_ppg=20&since=2015.
+    """
+    params = request.query_params
+    try:
+        seasons = await run_in_threadpool(
+            query_seasons,
+            position=params.get("position"),
+            team=params.get("team"),
+            since=int(params["since"]) if "since" in params else None,
+            until=int(params["until"]) if "until" in params else None,
+            min_ppg=float(params["min_ppg"]) if "min_ppg" in params else None,
+            min_rpg=float(params["min_rpg"]) if "min_rpg" in params else None,
+            min_apg=float(params["min_apg"]) if "min_apg" in params else None,
+            min_games=int(params["min_games"]) if "min_games" in params else None,
+            order_by=params.get("order_by", "points_per_game"),
+            limit=min(int(params.get("limit", 100)), 1000),
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"count": len(seasons), "seasons": seasons})
+
+async def similar_players(request):
+    """
+    Jugadores más parecidos por temporada, p. ej. ?player=Kevin Durant&season=2013-14&k=10.
+    """
+    player_name = request.query_params.get("player", "").strip()
+    if not player_name:
+        return JSONResponse({"error": "Debes proporcionar un nombre de jugador"}, status_code=400)
+    season = request.query_params.get("season")
+    try:
+        k = min(int(request.query_params.get("k", 10)), 50)
+    except ValueError:
+        k = 10
+
+    result = await run_in_threadpool(find_similar_players, player_name, season, k)
+    if result is None and await get_historical_stats_async(player_name):
+        # Jugador aún no guardado en local: su histórico se acaba de descargar y almacenar
+        result = await run_in_threadpool(find_similar_players, player_name, season, k)
+    if result is None:
+        return JSONResponse({"error": f"No hay temporadas de {player_name}" + (f" en {season}" if season else "")},
+                            status_code=404)
+    return JSONResponse(result)
+
+async def cache_stats(request):
+    """
+    Aciertos y fallos de la caché de respuestas.
+    """
+    return JSONResponse(get_cache_stats())
+
+async def http_stats(request):
+    """
+    Conexiones nuevas frente a reutilizadas, reintentos y espera por rate limiting, por host.
+    """
+    return JSONResponse(get_connection_stats())
+
+async def invalidate_player_cache(request):
+    """
+    Invalida todas las entradas en caché de un jugador (p. ej. tras un traspaso).
+    """
+    player_name = request.path_params["player_name"]
+    deleted = await run_in_threadpool(invalidate_player, player_name)
+    return JSONResponse({"player": player_name, "invalidated": deleted})
+
+async def metrics(request):
+    """
+    Métricas en formato Prometheus.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+app = Starlette(
+    routes=[
+        Route("/api/query", query_player, methods=["POST"]),
+        Route("/api/query/batch", query_players_batch, methods=["POST"]),
+        Route("/api/query/stream", query_player_stream, methods=["POST"]),
+        Route("/api/players/autocomplete", autocomplete_players, methods=["GET"]),
+        Route("/api/seasons", search_seasons, methods=["GET"]),
+        Route("/api/similar", similar_players, methods=["GET"]),
+        Route("/api/cache/stats", cache_stats, methods=["GET"]),
+        Route("/api/http/stats", http_stats, methods=["GET"]),
+        Route("/api/cache/{player_name}", invalidate_player_cache, methods=["DELETE"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ],
+    middleware=[Middleware(TimingMiddleware)],
+    lifespan=lifespan,
+)
@@ -26,6 +26,105 @@ class Config:
     # 🧠 Mistral AI (Análisis de Texto)
     MISTRAL_API_URL = os.getenv("MISTRAL_API_URL")
     MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
+    MISTRAL_MODEL = os.getenv("MISTRAL_MODEL", "mistral-medium")
+    MISTRAL_TIMEOUT = int(os.getenv("MISTRAL_TIMEOUT", 60))
 
     # ⏳ Configuración General
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 10))  # Por defecto, 10 segundos
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+    # 🔀 Fusión concurrente de fuentes (plazo máximo por fuente, en segundos)
+    MERGE_MAX_WORKERS = int(os.getenv("MERGE_MAX_WORKERS", 16))
+    SOURCE_DEADLINES = {
+        "player_info": float(os.getenv("DEADLINE_PLAYER_INFO", 5)),
+        "advanced_stats": float(os.getenv("DEADLINE_ADVANCED_STATS", 5)),
+        "historical_stats": float(os.getenv("DEADLINE_HISTORICAL_STATS", 12)),
+        "contract_info": float(os.getenv("DEADLINE_CONTRACT_INFO", 12)),
+        "ai_analysis": float(os.getenv("DEADLINE_AI_ANALYSIS", 20)),
+    }
+
+    # 📋 Consultas por lotes (plantillas, draft boards)
+    BATCH_MAX_PLAYERS = int(os.getenv("BATCH_MAX_PLAYERS", 60))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))  # Jugadores en paralelo en todo el proceso
+
+    # 🗄️ Caché de respuestas (LRU en memoria + SQLite en disco), TTL en segundos por fuente
+    CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "data/player_cache.sqlite3")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 2048))
+    CACHE_TTLS = {
+        "player_info": int(os.getenv("CACHE_TTL_PLAYER_INFO", 6 * 3600)),
+        "advanced_stats": int(os.getenv("CACHE_TTL_ADVANCED_STATS", 10 * 60)),
+        "historical_stats": int(os.getenv("CACHE_TTL_HISTORICAL_STATS", 3 * 24 * 3600)),
+        "contract_info": int(os.getenv("CACHE_TTL_CONTRACT_INFO", 12 * 3600)),
+        "analysis": int(os.getenv("CACHE_TTL_ANALYSIS", 7 * 24 * 3600)),  # Clave = hash del prompt
+    }
+
+    # 🔌 Circuit breaker por fuente: fallos seguidos para abrirlo y segundos hasta volver a probar.
+    # Con el circuito abierto se sirve el último valor bueno de la caché aunque haya caducado.
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30))
+
+    # ♻️ Refresco en segundo plano de los jugadores más consultados
+    REFRESH_SCHEDULER_ENABLED = os.getenv("REFRESH_SCHEDULER_ENABLED", "1") == "1"
+    REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", 60))           # Segundos entre ciclos
+    REFRESH_HOT_PLAYERS = int(os.getenv("REFRESH_HOT_PLAYERS", 50))
+    REFRESH_AHEAD = float(os.getenv("REFRESH_AHEAD", 0.2))              # Refrescar al quedar el 20% del TTL
+    REFRESH_DECAY = float(os.getenv("REFRESH_DECAY", 0.95))             # Olvido de la frecuencia por ciclo
+    GAME_NIGHT_REFRESH_HOUR = int(os.getenv("GAME_NIGHT_REFRESH_HOUR", 9))  # UTC, tras la noche de partidos
+    GAME_NIGHT_SOURCES = ("advanced_stats", "historical_stats")
+    # Refrescos máximos por fuente y ciclo (los scrapers tienen el presupuesto más bajo)
+    REFRESH_BUDGETS = {
+        "player_info": int(os.getenv("REFRESH_BUDGET_PLAYER_INFO", 10)),
+        "advanced_stats": int(os.getenv("REFRESH_BUDGET_ADVANCED_STATS", 10)),
+        "historical_stats": int(os.getenv("REFRESH_BUDGET_HISTORICAL_STATS", 3)),
+        "contract_info": int(os.getenv("REFRESH_BUDGET_CONTRACT_INFO", 2)),
+    }
+
+    # 🗂️ Índice local de identidades de jugador (alias -> ID/URL en cada fuente)
+    PLAYER_INDEX_DB_PATH = os.getenv("PLAYER_INDEX_DB_PATH", "data/player_index.sqlite3")
+    PLAYER_INDEX_FUZZY_THRESHOLD = float(os.getenv("PLAYER_INDEX_FUZZY_THRESHOLD", 0.3))
+
+    # 📚 Almacén local de temporadas (consultas de toda la liga sin scraping)
+    SEASON_STORE_DB_PATH = os.getenv("SEASON_STORE_DB_PATH", "data/season_stats.sqlite3")
+    SEASON_STORE_MMAP_SIZE = int(os.getenv("SEASON_STORE_MMAP_SIZE", 256 * 1024 * 1024))
+    # Temporadas con menos partidos no se usan como comparables (muestra demasiado pequeña)
+    SIMILARITY_MIN_GAMES = int(os.getenv("SIMILARITY_MIN_GAMES", 20))
+
+    # 🌙 Carga nocturna de toda la liga (python -m modules.bulk_ingest)
+    # Hilos por fuente: el ritmo real lo marca el límite de peticiones de cada host (HTTP_RATE_LIMITS)
+    BULK_INGEST_WORKERS = {
+        "player_info": int(os.getenv("BULK_WORKERS_PLAYER_INFO", 4)),
+        "historical_stats": int(os.getenv("BULK_WORKERS_HISTORICAL_STATS", 2)),
+        "contract_info": int(os.getenv("BULK_WORKERS_CONTRACT_INFO", 2)),
+    }
+    BULK_INGEST_BATCH_PLAYERS = int(os.getenv("BULK_INGEST_BATCH_PLAYERS", 25))  # Jugadores por escritura y checkpoint
+    BULK_INGEST_MAX_ATTEMPTS = int(os.getenv("BULK_INGEST_MAX_ATTEMPTS", 3))
+    BULK_INGEST_MAX_MINUTES = float(os.getenv("BULK_INGEST_MAX_MINUTES", 300))  # Ventana nocturna; lo pendiente se reanuda
+    BULK_INGEST_CHECKPOINT_PATH = os.getenv("BULK_INGEST_CHECKPOINT_PATH", "data/bulk_ingest.checkpoint.jsonl")
+
+    # 🔁 Validadores de páginas (ETag, Last-Modified, hash) para descargas condicionales
+    PAGE_VALIDATORS_DB_PATH = os.getenv("PAGE_VALIDATORS_DB_PATH", "data/page_validators.sqlite3")
+
+    # 🗜️ Snapshots de las respuestas descargadas, para volver a parsearlas sin red (python -m modules.reparse)
+    SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "1") == "1"
+    SNAPSHOT_DB_PATH = os.getenv("SNAPSHOT_DB_PATH", "data/snapshots.sqlite3")
+    SNAPSHOT_MAX_BYTES = int(os.getenv("SNAPSHOT_MAX_MB", 1024)) * 1024 * 1024  # Tamaño comprimido máximo
+    SNAPSHOT_COMPRESSION_LEVEL = int(os.getenv("SNAPSHOT_COMPRESSION_LEVEL", 9))
+    SNAPSHOT_DICT_SAMPLES = int(os.getenv("SNAPSHOT_DICT_SAMPLES", 16))  # Páginas de un host para entrenar su diccionario
+    SNAPSHOT_DICT_SIZE = int(os.getenv("SNAPSHOT_DICT_SIZE", 64 * 1024))    # zlib solo usa los últimos 32 KB
+    SNAPSHOT_QUEUE_SIZE = int(os.getenv("SNAPSHOT_QUEUE_SIZE", 256))  # Respuestas pendientes de guardar; si se llena se descartan
+    REPARSE_WORKERS = int(os.getenv("REPARSE_WORKERS", os.cpu_count() or 2))
+
+    # 🌐 Cliente HTTP compartido (pool por host, reintentos y límite de peticiones)
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+    HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))
+    HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 10))
+    HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "basketball-scouting-ai/1.0")
+    HTTP_DEFAULT_RATE = float(os.getenv("HTTP_DEFAULT_RATE", 10))
+    # Conexiones por host en modo ASGI (el pool de httpx degrada con muchas conexiones a un mismo host)
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", 20))
+    # (peticiones por segundo, ráfaga máxima) por host; Basketball Reference bloquea por encima de ~20/min
+    HTTP_RATE_LIMITS = {
+        "www.basketball-reference.com": (float(os.getenv("RATE_BASKETBALL_REFERENCE", 0.3)), 3),
+        "www.spotrac.com": (float(os.getenv("RATE_SPOTRAC", 1)), 3),
+    }
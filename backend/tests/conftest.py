@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config import Config
+from modules import (balldontlie_api, basketball_reference, bulk_ingest, cache, conditional_fetch, data_merger,
+                     mistral_ai, nba_stats_api, player_index, refresh_scheduler, reparse, season_store, similarity,
+                     snapshot_store, spotrac_scraper)
+from modules.async_http_client import async_http_client
+from modules.cache import TieredCache
+from modules.conditional_fetch import PageValidators
+from modules.http_client import http_client
+from modules.player_index import PlayerIndex
+from modules.resilience import reset_circuits
+from modules.season_store import SeasonStore
+from modules.similarity import SimilarityIndex
+from modules.snapshot_store import SnapshotStore
+from tests.replay_server import ReplayServer
+
+
+@pytest.fixture(autouse=True)
+def snapshots(monkeypatch, tmp_path):
+    """
+    Snapshots de las respuestas en un directorio temporal (cualquier prueba que pase por `run_steps` los guarda).
+    """
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite3"))
+    monkeypatch.setattr(snapshot_store, "snapshot_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture(autouse=True)
+def local_stores(monkeypatch, tmp_path):
+    """
+    Caché, índice de jugadores, validadores y almacén de temporadas en un directorio temporal:
+    ninguna prueba (ni un hilo que siga en marcha tras ella) escribe en los de backend/data.
+    """
+    player_cache = TieredCache(str(tmp_path / "cache.sqlite3"), 100, Config.CACHE_TTLS)
+    for module in (cache, balldontlie_api, mistral_ai, data_merger, refresh_scheduler):
+        monkeypatch.setattr(module, "player_cache", player_cache)
+    index = PlayerIndex(str(tmp_path / "index.sqlite3"))
+    for module in (player_index, balldontlie_api, nba_stats_api, basketball_reference, spotrac_scraper, similarity):
+        monkeypatch.setattr(module, "player_index", index)
+    seasons = SeasonStore(str(tmp_path / "seasons.sqlite3"))
+    for module in (season_store, basketball_reference, bulk_ingest, reparse, similarity):
+        monkeypatch.setattr(module, "season_store", seasons)
+    similarity_index = SimilarityIndex(seasons)
+    seasons.add_listener(similarity_index.on_ingest)
+    monkeypatch.setattr(similarity, "similarity_index", similarity_index)
+    monkeypatch.setattr(conditional_fetch, "page_validators", PageValidators(str(tmp_path / "validators.sqlite3")))
+    monkeypatch.setattr(reparse, "page_validators", conditional_fetch.page_validators)
+
+
+@pytest.fixture(autouse=True)
+def circuits(monkeypatch):
+    """
+    Circuitos cerrados al empezar y al terminar, y un pool propio para las llamadas de prueba de
+    los circuitos semiabiertos: al acabar se espera a las que sigan en marcha. Así los fallos de
+    una prueba no afectan a la siguiente.
+    """
+    reset_circuits()
+    probe_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="circuit-probe")
+    monkeypatch.setattr(cache, "_probe_executor", probe_executor)
+    yield probe_executor
+    probe_executor.shutdown(wait=True)
+    reset_circuits()
+
+
+@pytest.fixture
+def replay(monkeypatch, tmp_path, circuits):
+    """
+    Todas las fuentes apuntando a las grabaciones locales (con los almacenes vacíos de `local_stores`).
+
+    La latencia y los fallos se pueden cambiar en mitad de la prueba (`replay.latency = {...}`).
+    """
+    monkeypatch.setattr(mistral_ai, "_client", None)
+    # Reintentos sin esperas reales
+    monkeypatch.setattr(http_client, "backoff_base", 0.001)
+    monkeypatch.setattr(async_http_client, "backoff_base", 0.001)
+
+    with ReplayServer(seed=0) as server:
+        for name, value in server.config_overrides().items():
+            monkeypatch.setattr(Config, name, value)
+        yield server
+        # Las llamadas de prueba pendientes terminan contra las grabaciones, no contra un servidor parado
+        circuits.shutdown(wait=True)
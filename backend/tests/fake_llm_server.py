@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer:
+    """
+    Servidor local que imita /v1/chat/completions de Mistral (normal y en streaming).
+
+    Uso:
+        with FakeLLMServer(reply="Análisis de prueba") as llm:
+            Config.MISTRAL_API_URL = llm.url
+    """
+
+    def __init__(self, reply="Jugador anotador con gran impacto ofensivo.", token_delay=0.0):
+        self.reply = reply
+        self.token_delay = token_delay
+        self.requests = []
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests.append(body)
+                if body.get("stream"):
+                    self._stream(body)
+                else:
+                    self._complete(body)
+
+            def _complete(self, body):
+                payload = json.dumps({
+                    "id": "fake-1", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": server.reply},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for token in server.reply.split(" "):
+                    chunk = {"id": "fake-1", "model": body["model"],
+                             "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(server.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
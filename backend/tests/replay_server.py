@@ -0,0 +1,315 @@
+"""
+Fuentes externas grabadas: un servidor HTTP local que responde como balldontlie.io, NBA Stats,
+Basketball Reference, Spotrac y Mistral con las respuestas guardadas en tests/fixtures/replay.
+
+Cada fuente escucha en su propio puerto (como en producción, cada una es un host distinto).
+Las grabaciones se describen en `recordings.json`: la primera cuya ruta (y parámetros) encaja
+es la que se sirve. Las rutas y los parámetros son expresiones regulares; los grupos con nombre
+(`name`, `id`, `slug`) rellenan las plantillas (`"template": true`), así cualquier jugador tiene
+respuesta y las pruebas de carga pueden usar jugadores distintos sin salir a la red.
+
+Se puede simular latencia (segundos por petición, global o por fuente) y fallos: un porcentaje
+aleatorio de respuestas de error (`failure_rate`) o los N siguientes fallos de una fuente
+(`fail_next`), incluido cortar la conexión sin responder (`DROP_CONNECTION`).
+
+Uso:
+    with ReplayServer(latency={"basketball_reference": 0.3}) as replay:
+        for name, value in replay.config_overrides().items():
+            monkeypatch.setattr(Config, name, value)
+
+Desde la línea de comandos (desde backend/), para levantar la API sin red:
+    PYTHONPATH=.:root_files python -m tests.replay_server [--port 8765] [--latency 0.2] [--failure-rate 0.05]
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote_plus, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "replay")
+RECORDINGS = os.path.join(FIXTURES_DIR, "recordings.json")
+SOURCES = ("balldontlie", "nba_stats", "basketball_reference", "spotrac", "mistral")
+
+# Fallo inyectado que cierra la conexión sin enviar respuesta (el cliente ve un ConnectionError)
+DROP_CONNECTION = "drop"
+
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+_CONTENT_TYPES = {".json": "application/json", ".html": "text/html; charset=utf-8"}
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "player"
+
+def load_recordings(path=RECORDINGS):
+    """
+    Lee el manifiesto de grabaciones y los cuerpos de cada una (una sola vez, en memoria).
+    """
+    directory = os.path.dirname(path)
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    recordings = []
+    for entry in entries:
+        with open(os.path.join(directory, entry["file"]), "rb") as f:
+            body = f.read()
+        recordings.append({
+            "source": entry["source"],
+            "method": entry.get("method", "GET"),
+            "path": re.compile(entry["path"]),
+            "query": {name: re.compile(pattern) for name, pattern in entry.get("query", {}).items()},
+            "status": entry.get("status", 200),
+            "content_type": _CONTENT_TYPES.get(os.path.splitext(entry["file"])[1], "application/octet-stream"),
+            "body": body.decode("utf-8") if entry.get("template") else body,
+            "template": entry.get("template", False),
+            "etag": entry.get("etag", False),
+        })
+    return recordings
+
+def template_values(groups):
+    """
+    Valores para las plantillas a partir de lo capturado en la URL (nombre, ID o slug del jugador).
+    """
+    name = groups.get("name")
+    if name:
+        name = re.sub(r"[-+\s]+", " ", unquote_plus(name)).strip()
+    elif groups.get("slug"):
+        name = groups["slug"].replace("-", " ").title()
+    else:
+        name = "Replay Player"
+    first_name, _, last_name = name.partition(" ")
+    slug = groups.get("slug") or _slug(name)
+    return {
+        "name": name,
+        "first_name": first_name,
+        "last_name": last_name,
+        "slug": slug,
+        "initial": slug[0],
+        "id": groups.get("id") or str(zlib.crc32(_slug(name).encode()) % 1_000_000),
+    }
+
+def render(recording, groups):
+    if not recording["template"]:
+        return recording["body"]
+    values = template_values(groups)
+    if recording["content_type"] == "application/json":
+        escape = lambda value: json.dumps(value)[1:-1]
+    else:
+        escape = html.escape
+    return _PLACEHOLDER.sub(lambda match: escape(values[match.group(1)]), recording["body"]).encode("utf-8")
+
+def config_overrides(base_urls):
+    """
+    Atributos de `Config` que apuntan todas las fuentes a un servidor de grabaciones (sus URLs base).
+    """
+    return {
+        "BALLDONTLIE_API_URL": f"{base_urls['balldontlie']}/",
+        "NBA_STATS_API_URL": f"{base_urls['nba_stats']}/",
+        "BASKETBALL_REFERENCE_URL": base_urls["basketball_reference"],
+        "SPOTRAC_URL": f"{base_urls['spotrac']}/",
+        "MISTRAL_API_URL": base_urls["mistral"],
+        "MISTRAL_API_KEY": "replay",
+    }
+
+class _SourceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, replay, source):
+        super().__init__(address, ReplayHandler)
+        self.replay = replay
+        self.source = source
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, como las fuentes reales
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente abandonó la petición (p. ej. una fuente que superó su plazo)
+            self.close_connection = True
+
+    def do_GET(self):
+        self._replay("GET")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._replay("POST", json.loads(self.rfile.read(length) or b"{}"))
+
+    def _replay(self, method, payload=None):
+        replay, source = self.server.replay, self.server.source
+        replay._log(source, method, self.path, self.headers)
+        time.sleep(replay.latency_for(source))
+
+        fault = replay._next_fault(source)
+        if fault == DROP_CONNECTION:
+            self.close_connection = True
+            return
+        if fault:
+            return self._send(fault, b'{"error": "injected failure"}', "application/json")
+
+        parts = urlsplit(self.path)
+        recording, groups = replay.match(source, method, parts.path, parse_qs(parts.query))
+        if recording is None:
+            return self._send(404, b'{"error": "no recording"}', "application/json")
+        body = render(recording, groups)
+
+        if payload and payload.get("stream"):
+            return self._stream_completion(json.loads(body))
+
+        headers = {}
+        if recording["etag"] and replay.etags:
+            headers["ETag"] = f'"{zlib.crc32(body):08x}"'
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                return self._send(304, b"", None, headers)
+        self._send(recording["status"], body, recording["content_type"], headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_completion(self, completion):
+        # La grabación de Mistral es una respuesta completa: en streaming se envía palabra a palabra
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        content = completion["choices"][0]["message"]["content"]
+        for token in content.split(" "):
+            chunk = {"id": completion["id"], "model": completion["model"],
+                     "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+class ReplayServer:
+    """
+    Un servidor por fuente en hilos, todos con las mismas grabaciones y la misma configuración de fallos.
+
+    `latency` y `failure_rate` admiten un número (todas las fuentes) o un dict {fuente: valor}.
+    Con `etags=False` las páginas grandes se sirven siempre completas, sin ETag.
+    Cada petición recibida queda en `requests` como (fuente, método, ruta, cabeceras).
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, failure_status=503, etags=True, seed=None,
+                 recordings=RECORDINGS, port=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.etags = etags
+        self.port = port
+        self.requests = []
+        self.base_urls = {}
+        self._recordings = load_recordings(recordings)
+        self._random = random.Random(seed)
+        self._faults = {source: deque() for source in SOURCES}
+        self._lock = threading.Lock()
+        self._servers = []
+
+    def latency_for(self, source):
+        return self.latency.get(source, 0.0) if isinstance(self.latency, dict) else self.latency
+
+    def _failure_rate_for(self, source):
+        return self.failure_rate.get(source, 0.0) if isinstance(self.failure_rate, dict) else self.failure_rate
+
+    def fail_next(self, source, times=1, status=503):
+        """
+        Las `times` siguientes peticiones a `source` fallan con `status` (o `DROP_CONNECTION`).
+        """
+        with self._lock:
+            self._faults[source].extend([status] * times)
+
+    def _next_fault(self, source):
+        with self._lock:
+            if self._faults[source]:
+                return self._faults[source].popleft()
+            if self._random.random() < self._failure_rate_for(source):
+                return self.failure_status
+        return None
+
+    def _log(self, source, method, path, headers):
+        with self._lock:
+            self.requests.append((source, method, path, dict(headers)))
+
+    def requests_to(self, source):
+        with self._lock:
+            return [request for request in self.requests if request[0] == source]
+
+    def match(self, source, method, path, query):
+        """
+        Primera grabación de `source` que encaja con la petición; devuelve (grabación, grupos capturados).
+        """
+        for recording in self._recordings:
+            if recording["source"] != source or recording["method"] != method:
+                continue
+            path_match = recording["path"].fullmatch(path)
+            if not path_match:
+                continue
+            groups = dict(path_match.groupdict())
+            for name, pattern in recording["query"].items():
+                value_match = pattern.fullmatch(query.get(name, [""])[0])
+                if not value_match:
+                    break
+                groups.update(value_match.groupdict())
+            else:
+                return recording, groups
+        return None, {}
+
+    def config_overrides(self):
+        return config_overrides(self.base_urls)
+
+    def start(self):
+        # Con `port=0` cada servidor elige un puerto libre; si no, se usan `port`, `port + 1`, ...
+        for offset, source in enumerate(SOURCES):
+            server = _SourceServer(("127.0.0.1", self.port + offset if self.port else 0), self, source)
+            threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+            self._servers.append(server)
+            self.base_urls[source] = f"http://127.0.0.1:{server.server_address[1]}"
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765, help="Primer puerto (uno por fuente)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Segundos de espera por petición")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--no-etags", action="store_true", help="Servir las páginas sin ETag")
+    args = parser.parse_args()
+
+    replay = ReplayServer(args.latency, args.failure_rate, etags=not args.no_etags, port=args.port).start()
+    print(f"Fuentes grabadas (latencia {args.latency * 1000:.0f} ms, fallos {args.failure_rate:.0%}). En el .env:")
+    for name, value in replay.config_overrides().items():
+        print(f"{name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        replay.stop()
+
+if __name__ == "__main__":
+    main()
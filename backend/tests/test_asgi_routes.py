@@ -0,0 +1,63 @@
+import asyncio
+import re
+
+from starlette.testclient import TestClient
+
+from config import Config
+
+
+def _flask_routes(app):
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == "static":
+            continue
+        path = re.sub(r"<(?:\w+:)?(\w+)>", r"{\1}", rule.rule)
+        routes |= {(path, method) for method in rule.methods - {"HEAD", "OPTIONS"}}
+    return routes
+
+
+def _starlette_routes(app):
+    return {(route.path, method) for route in app.routes for method in route.methods - {"HEAD"}}
+
+
+def test_asgi_serves_the_same_endpoints_as_flask(monkeypatch):
+    monkeypatch.setattr(Config, "REFRESH_SCHEDULER_ENABLED", False)
+    import app
+    import asgi
+
+    assert _starlette_routes(asgi.app) == _flask_routes(app.app)
+
+
+def test_asgi_cache_endpoints(monkeypatch):
+    import asgi
+    monkeypatch.setattr(asgi, "invalidate_player", lambda player_name: 3)
+    client = TestClient(asgi.app)
+
+    assert "hit_rate" in client.get("/api/cache/stats").json()
+    assert client.get("/api/http/stats").status_code == 200
+    assert client.delete("/api/cache/Kevin Durant").json() == {"player": "Kevin Durant", "invalidated": 3}
+
+
+def _off_the_loop(result):
+    # Falla si se llama desde el hilo del event loop
+    def call(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return result
+        raise AssertionError("llamada bloqueante en el event loop")
+    return call
+
+
+def test_asgi_runs_blocking_calls_in_threadpool(monkeypatch):
+    import asgi
+    monkeypatch.setattr(asgi, "suggest_players", _off_the_loop([]))
+    monkeypatch.setattr(asgi, "query_seasons", _off_the_loop([]))
+    monkeypatch.setattr(asgi, "find_similar_players", _off_the_loop({"similar": []}))
+    monkeypatch.setattr(asgi, "invalidate_player", _off_the_loop(0))
+    client = TestClient(asgi.app)
+
+    assert client.get("/api/players/autocomplete?q=dur").status_code == 200
+    assert client.get("/api/seasons?position=G").status_code == 200
+    assert client.get("/api/similar?player=Kevin Durant").status_code == 200
+    assert client.delete("/api/cache/Kevin Durant").status_code == 200
@@ -1,83 +1,48 @@
-import requests
-from bs4 import BeautifulSoup
-import logging
+import asyncio
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+from modules import basketball_reference
+from modules.async_http_client import async_http_client
+from modules.basketball_reference import get_historical_stats, get_historical_stats_async
+from modules.metrics import page_fetches
 
-BASKETBALL_REFERENCE_URL = "https://www.basketball-reference.com"
 
-def get_historical_stats(player_name):
-    """
-    Obtiene estadísticas avanzadas de un jugador desde Basketball Reference.
-    """
-    try:
-        # 🔎 1️⃣ Buscar la URL del jugador
-        search_url = f"{BASKETBALL_REFERENCE_URL}/search/search.fcgi?search={player_name.replace(' ', '+')}"
-        logging.info(f"📊 Buscando en Basketball Reference: {search_url}")
-        
-        response = requests.get(search_url)
-        soup = BeautifulSoup(response.text, "html.parser")
+def test_search_resolves_player_and_parses_career(replay):
+    stats = get_historical_stats.uncached("Kevin Durant")
 
-        # Extraer la URL del jugador
-        player_link = soup.select_one(".search-item-url")
-        if not player_link:
-            logging.warning(f"⚠️ No se encontró perfil para {player_name}")
-            return None
-        
-        player_url = BASKETBALL_REFERENCE_URL + player_link.text.strip()
-        logging.info(f"🔗 URL del jugador: {player_url}")
+    assert len(stats) == 18
+    assert stats[0]["season"] == "2007-08"
+    assert stats[0]["team"] == "SEA"
+    assert stats[0]["points_per_game"] == 23.3
+    assert basketball_reference.player_index.resolve("basketball_reference", "kevin durant") == "/players/d/duranke01.html"
+    assert basketball_reference.player_index.display_name("kevin durant") == "Kevin Durant"
 
-        # 🔎 2️⃣ Extraer estadísticas del jugador
-        player_response = requests.get(player_url)
-        player_soup = BeautifulSoup(player_response.text, "html.parser")
 
-        # Posibles IDs de las tablas
-        possible_ids = ["per_game", "per_game_stats", "per_game_stats_post"]
+def test_career_is_stored_and_revalidated(replay):
+    not_modified = page_fetches.value(source="basketball_reference", result="not_modified")
 
-        per_game_table = None
-        for table_id in possible_ids:
-            per_game_table = player_soup.find("table", {"id": table_id})
-            if per_game_table:
-                logging.info(f"✅ Tabla encontrada con ID: {table_id}")
-                break
+    first = get_historical_stats.uncached("Kevin Durant")
+    second = get_historical_stats.uncached("Kevin Durant")
 
-        if not per_game_table:
-            logging.warning(f"⚠️ No se encontraron estadísticas en la tabla per_game para {player_name}")
-            return None
+    assert first == second
+    # Sin segunda búsqueda: el índice ya conoce la página, que responde 304
+    assert [path for _, _, path, _ in replay.requests_to("basketball_reference")] == [
+        "/search/search.fcgi?search=Kevin+Durant", "/players/d/duranke01.html", "/players/d/duranke01.html"]
+    assert page_fetches.value(source="basketball_reference", result="not_modified") == not_modified + 1
+    stored = basketball_reference.season_store.player_seasons("Kevin Durant")
+    assert {row["player_id"] for row in stored} == {"duranke01"}
+    assert len(stored) == len(first)
 
-        stats = []
-        rows = per_game_table.find("tbody").find_all("tr")
 
-        for row in rows:
-            try:
-                season = row.find("th").text.strip()
-                team = row.find("td", {"data-stat": "team_name_abbr"}).text.strip() if row.find("td", {"data-stat": "team_name_abbr"}) else "N/A"
-                points_per_game = row.find("td", {"data-stat": "pts_per_g"}).text.strip() if row.find("td", {"data-stat": "pts_per_g"}) else "0"
-                rebounds_per_game = row.find("td", {"data-stat": "trb_per_g"}).text.strip() if row.find("td", {"data-stat": "trb_per_g"}) else "0"
-                assists_per_game = row.find("td", {"data-stat": "ast_per_g"}).text.strip() if row.find("td", {"data-stat": "ast_per_g"}) else "0"
+def test_unknown_player_returns_none(replay):
+    assert get_historical_stats.uncached("Nobody Here") is None
+    assert len(replay.requests_to("basketball_reference")) == 1
 
-                stats.append({
-                    "season": season,
-                    "team": team,
-                    "points_per_game": points_per_game,
-                    "rebounds_per_game": rebounds_per_game,
-                    "assists_per_game": assists_per_game
-                })
-            except AttributeError:
-                logging.warning(f"⚠️ Se saltó una fila en la tabla debido a datos faltantes.")
 
-        if not stats:
-            logging.warning(f"⚠️ No se encontraron estadísticas para {player_name}")
-            return None
+def test_async_version_matches_sync(replay):
+    async def main():
+        try:
+            return await get_historical_stats_async.uncached("Kevin Durant")
+        finally:
+            await async_http_client.aclose()
 
-        return stats
-
-    except Exception as e:
-        logging.error(f"❌ Error en get_historical_stats: {str(e)}")
-        return None
-
-# 🚀 Prueba con Kevin Durant
-if __name__ == "__main__":
-    player_stats = get_historical_stats("Kevin Durant")
-    print(player_stats)
+    assert asyncio.run(main()) == get_historical_stats.uncached("Kevin Durant")
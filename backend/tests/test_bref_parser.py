@@ -0,0 +1,63 @@
+import os
+
+from modules.bref_parser import parse_per_game_stats, parse_per_game_tables
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "basketball_reference", "kevin_durant.html")
+
+
+def _page():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parses_regular_season_table_with_typed_values():
+    table_id, rows = parse_per_game_stats(_page())
+
+    assert table_id == "per_game_stats"
+    assert len(rows) == 18
+    first = rows[0]
+    assert first["season"] == "2007-08"
+    assert first["team"] == "SEA"
+    assert first["age"] == 19
+    assert isinstance(first["points_per_game"], float)
+    assert 0 < first["fg_pct"] < 1
+
+
+def test_finds_tables_hidden_in_comments():
+    tables = parse_per_game_tables(_page())
+
+    assert set(tables) == {"per_game_stats", "per_game_stats_post"}
+    assert len(tables["per_game_stats_post"]) == 14
+
+
+def test_skips_repeated_header_rows_and_keeps_defaults():
+    page = """<table id="per_game"><tbody>
+        <tr class="thead"><th data-stat="year_id">Season</th></tr>
+        <tr><th data-stat="year_id">2023-24</th><td data-stat="pts_per_g">27.1</td><td data-stat="fg3_pct"></td></tr>
+    </tbody></table>"""
+
+    table_id, rows = parse_per_game_stats(page)
+
+    assert table_id == "per_game"
+    assert rows == [{
+        "season": "2023-24", "team": "N/A", "position": None, "age": None, "games": None,
+        "minutes_per_game": None, "fg_pct": None, "fg3_pct": None, "ft_pct": None,
+        "points_per_game": 27.1, "rebounds_per_game": None, "assists_per_game": None,
+        "steals_per_game": None, "blocks_per_game": None, "turnovers_per_game": None,
+    }]
+
+
+def test_did_not_play_row_has_no_stats():
+    page = """<table id="per_game"><tbody>
+        <tr><th data-stat="year_id">2019-20</th><td data-stat="team_name_abbr">BRK</td>
+            <td data-stat="reason" colspan="28">Did Not Play (injury)</td></tr>
+    </tbody></table>"""
+
+    _, rows = parse_per_game_stats(page)
+
+    assert rows[0]["team"] == "BRK"
+    assert (rows[0]["points_per_game"], rows[0]["rebounds_per_game"], rows[0]["assists_per_game"]) == (None, None, None)
+
+
+def test_missing_table():
+    assert parse_per_game_stats("<html><table id='totals'></table></html>") == (None, [])
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from modules import basketball_reference, bulk_ingest
+from modules.balldontlie_api import list_active_players
+from modules.resilience import reset_circuits
+
+
+@pytest.fixture
+def store(replay, monkeypatch):
+    # El mismo almacén en el que escribe el scraper dentro de la prueba
+    store = basketball_reference.season_store
+    monkeypatch.setattr(bulk_ingest, "season_store", store)
+    return store
+
+
+def test_loads_active_players_in_batches(replay, store, monkeypatch, tmp_path):
+    writes = []
+    write = store._write
+    monkeypatch.setattr(store, "_write", lambda prepared: writes.append(len(prepared)) or write(prepared))
+    players = list_active_players(page_size=3)
+    checkpoint = str(tmp_path / "ingest.jsonl")
+
+    report = bulk_ingest.BulkIngest(players, checkpoint_path=checkpoint, batch_players=2).run()
+
+    assert players == ["Kevin Durant", "Stephen Curry", "Nikola Jokic", "LeBron James", "Jayson Tatum"]
+    assert report["players_completed"] == 5 and report["complete"]
+    assert report["players_per_minute"] > 0
+    assert store.get_stats()["players"] == 5
+    # Una transacción por lote de jugadores, no una por jugador
+    assert 1 <= len(writes) <= 3
+    # El listado ya dio los IDs: ninguna ficha se buscó por nombre
+    assert all("search=" not in request[2] for request in replay.requests_to("balldontlie"))
+    assert not os.path.exists(checkpoint)
+
+
+def test_interrupted_run_resumes_from_checkpoint(replay, store, tmp_path):
+    players = ["Kevin Durant", "Stephen Curry", "Nikola Jokic"]
+    checkpoint = str(tmp_path / "ingest.jsonl")
+    replay.failure_rate = {"spotrac": 1.0}
+
+    first = bulk_ingest.BulkIngest(players, checkpoint_path=checkpoint, max_attempts=1).run()
+
+    assert not first["complete"]
+    assert first["sources"]["historical_stats"]["done"] == 3
+    assert first["sources"]["contract_info"]["done"] == 0
+    assert os.path.exists(checkpoint)
+
+    # Spotrac se recupera: la siguiente ejecución solo hace lo que faltaba
+    replay.failure_rate = {}
+    reset_circuits()
+    bref_requests = len(replay.requests_to("basketball_reference"))
+
+    second = bulk_ingest.BulkIngest(players, checkpoint_path=checkpoint).run()
+
+    assert second["resumed_jobs"] == 6 and second["complete"]
+    assert second["sources"]["contract_info"]["done"] == 3
+    assert second["sources"]["historical_stats"]["done"] == 0
+    assert len(replay.requests_to("basketball_reference")) == bref_requests
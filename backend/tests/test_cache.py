@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from modules import cache as cache_module
+from modules.cache import MISSING, TieredCache, cached
+from modules.player_names import normalize_player_name
+
+
+def _cache(tmp_path, max_entries=10):
+    ttls = {"historical_stats": 60, "advanced_stats": 0.05}
+    return TieredCache(str(tmp_path / "cache.sqlite3"), max_entries, ttls)
+
+
+def test_normalized_names_share_entry(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("historical_stats", "Kevin  Durant", [{"season": "2023-24"}])
+
+    assert cache.get("historical_stats", "kevin durant") == [{"season": "2023-24"}]
+    assert normalize_player_name("Luka Dončić") == "luka doncic"
+
+
+def test_disk_level_survives_new_instance(tmp_path):
+    _cache(tmp_path).set("historical_stats", "Kevin Durant", {"ppg": 27.1})
+    cache = _cache(tmp_path)
+
+    assert cache.get("historical_stats", "Kevin Durant") == {"ppg": 27.1}
+    assert cache.get_stats()["disk_hits"] == 1
+    assert cache.get("historical_stats", "Kevin Durant") == {"ppg": 27.1}
+    assert cache.get_stats()["memory_hits"] == 1
+
+
+def test_ttl_per_source_and_lru_bound(tmp_path):
+    cache = _cache(tmp_path, max_entries=1)
+    cache.set("advanced_stats", "Kevin Durant", {"ppg": 27.1})
+    cache.set("historical_stats", "Stephen Curry", [])
+    time.sleep(0.1)
+
+    assert cache.get_stats()["memory_entries"] == 1
+    assert cache.get("advanced_stats", "Kevin Durant") is MISSING
+    assert cache.get("historical_stats", "Stephen Curry") == []
+
+
+def test_invalidate_player(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("historical_stats", "Kevin Durant", [])
+    cache.set("advanced_stats", "Kevin Durant", {})
+    cache.set("historical_stats", "Stephen Curry", [])
+
+    assert cache.invalidate("KEVIN DURANT") == 2
+    assert cache.get("historical_stats", "Kevin Durant") is MISSING
+    assert cache.get("historical_stats", "Stephen Curry") == []
+
+
+class _OffLoopCache(TieredCache):
+    # Falla si una lectura o escritura de SQLite se hace en el hilo del event loop
+    def _connection(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return super()._connection()
+        raise AssertionError("SQLite en el event loop")
+
+
+def test_async_fetchers_touch_sqlite_off_the_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "player_cache", _OffLoopCache(str(tmp_path / "cache.sqlite3"), 10,
+                                                                    {"historical_stats": 60}))
+
+    @cached("historical_stats")
+    async def fetch(player_name):
+        return [{"season": "2023-24"}]
+
+    async def run():
+        return await fetch("Kevin Durant"), await fetch.with_meta("Kevin Durant"), await fetch.refresh("Kevin Durant")
+
+    first, (second, meta), refreshed = asyncio.run(run())
+    assert first == second == refreshed == [{"season": "2023-24"}]
+    assert meta["status"] == "cached"
@@ -0,0 +1,99 @@
+import os
+
+from modules import basketball_reference, conditional_fetch
+from modules.conditional_fetch import PageValidators, conditional_page_steps
+from modules.season_store import SeasonStore, changed_season_rows
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "basketball_reference")
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+def _drive(steps, respond):
+    # Ejecuta un generador de pasos respondiendo con `respond(request)` en lugar de ir a la red
+    requests = []
+    try:
+        request = next(steps)
+        while True:
+            requests.append(request)
+            request = steps.send(respond(request))
+    except StopIteration as stop:
+        return stop.value, requests
+
+
+def _counting_parse(calls):
+    def parse(text):
+        calls.append(text)
+        return {"contract": text.upper()}
+    return parse
+
+
+def test_etag_revalidation_skips_download_and_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(conditional_fetch, "page_validators", PageValidators(str(tmp_path / "v.sqlite3")))
+    calls = []
+    parse = _counting_parse(calls)
+
+    def server(request):
+        if (request.headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, "4 años", {"ETag": '"v1"'})
+
+    first, _ = _drive(conditional_page_steps("https://spotrac/kd", parse, "spotrac"), server)
+    second, requests = _drive(conditional_page_steps("https://spotrac/kd", parse, "spotrac"), server)
+
+    assert first == ({"contract": "4 AÑOS"}, True, None)
+    assert second == ({"contract": "4 AÑOS"}, False, {"contract": "4 AÑOS"})
+    assert requests[0].headers == {"If-None-Match": '"v1"'}
+    assert len(calls) == 1
+
+
+def test_content_hash_skips_parse_without_validators(tmp_path, monkeypatch):
+    monkeypatch.setattr(conditional_fetch, "page_validators", PageValidators(str(tmp_path / "v.sqlite3")))
+    calls = []
+    parse = _counting_parse(calls)
+    pages = iter(["<ad 1>4 años", "<ad 2>4 años", "<ad 3>5 años"])
+
+    def server(request):
+        return FakeResponse(200, next(pages))
+
+    def fingerprint(text):
+        return text.split(">", 1)[1]
+
+    results = [_drive(conditional_page_steps("https://spotrac/kd", parse, "spotrac", fingerprint), server)[0]
+               for _ in range(3)]
+
+    assert [changed for _, changed, _ in results] == [True, False, True]
+    assert calls == ["<ad 1>4 años", "<ad 3>5 años"]
+
+
+def test_changed_page_stores_only_changed_seasons(tmp_path, monkeypatch):
+    with open(os.path.join(FIXTURES, "kevin_durant.html"), encoding="utf-8") as f:
+        page = f.read()
+    # Cambia una sola temporada, el resto de la carrera no
+    updated_page = page.replace('data-stat="pts_per_g" >23.3<', 'data-stat="pts_per_g" >23.5<', 1)
+    assert updated_page != page
+
+    store = SeasonStore(str(tmp_path / "seasons.sqlite3"))
+    ingested = []
+    store.add_listener(ingested.append)
+    monkeypatch.setattr(conditional_fetch, "page_validators", PageValidators(str(tmp_path / "v.sqlite3")))
+    monkeypatch.setattr(basketball_reference, "season_store", store)
+    monkeypatch.setattr(basketball_reference.player_index, "resolve", lambda source, name: "/players/d/duranke01.html")
+    monkeypatch.setattr(basketball_reference.player_index, "display_name", lambda name: "Kevin Durant")
+    pages = iter([page, page, updated_page])
+
+    def server(request):
+        return FakeResponse(200, next(pages))
+
+    runs = [_drive(basketball_reference._historical_stats_steps("Kevin Durant"), server)[0] for _ in range(3)]
+
+    assert runs[0] == runs[1]
+    assert len(ingested) == 2                      # la segunda descarga no cambió nada
+    assert len(ingested[0]) == len(runs[0])
+    assert {row["season"] for row in ingested[1]} == {"2007-08"}
+    assert changed_season_rows(runs[0], runs[2]) == [row for row in runs[2] if row["season"] == "2007-08"]
@@ -0,0 +1,205 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules import data_merger
+from modules.cache import TieredCache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch, tmp_path):
+    # Las fuentes que vencen su plazo se sustituyen por su último valor en caché: sin ninguno
+    monkeypatch.setattr(data_merger, "player_cache", TieredCache(str(tmp_path / "cache.sqlite3"), 10,
+                                                                  data_merger.Config.CACHE_TTLS))
+
+
+def _slow(value, delay):
+    def fetch(*args):
+        time.sleep(delay)
+        return value
+    return fetch
+
+
+def test_sources_run_concurrently(monkeypatch):
+    monkeypatch.setattr(data_merger, "get_nba_player_data", _slow({"position": "F"}, 0.2))
+    monkeypatch.setattr(data_merger, "get_advanced_stats", _slow({}, 0.2))
+    monkeypatch.setattr(data_merger, "get_historical_stats", _slow([{"season": "2023-24"}], 0.2))
+    monkeypatch.setattr(data_merger, "get_contract_info", _slow("4 años / 194M", 0.2))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", _slow({"summary": "ok"}, 0.1))
+
+    started = time.monotonic()
+    merged = data_merger.merge_player_data("Kevin Durant")
+    elapsed = time.monotonic() - started
+
+    # Fuentes en paralelo (0.2s) + análisis (0.1s), no la suma de todas
+    assert elapsed < 0.6
+    assert merged.position == "F"
+    assert merged.contract.details == "4 años / 194M"
+    assert merged.ai_analysis == "ok"
+    assert merged.unavailable_sources == []
+
+
+def test_slow_source_returns_partial_data(monkeypatch):
+    monkeypatch.setitem(data_merger.Config.SOURCE_DEADLINES, "contract_info", 0.1)
+    monkeypatch.setattr(data_merger, "get_nba_player_data", _slow({}, 0))
+    monkeypatch.setattr(data_merger, "get_advanced_stats", _slow({}, 0))
+    monkeypatch.setattr(data_merger, "get_historical_stats", _slow([], 0))
+    monkeypatch.setattr(data_merger, "get_contract_info", _slow("tarde", 1))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", _slow({}, 0))
+
+    started = time.monotonic()
+    merged = data_merger.merge_player_data("Kevin Durant")
+
+    assert time.monotonic() - started < 0.5
+    assert merged.contract.details is None
+    assert merged.unavailable_sources == ["contract_info"]
+
+
+def test_async_slow_contract_does_not_delay_analysis(monkeypatch):
+    analysis_started = []
+
+    def analyze(record):
+        analysis_started.append(time.monotonic())
+        return {"summary": "ok"}
+
+    monkeypatch.setattr(data_merger, "get_nba_player_data_async", _slow_async({"position": "F"}, 0.05))
+    monkeypatch.setattr(data_merger, "get_advanced_stats_async", _slow_async({}, 0.05))
+    monkeypatch.setattr(data_merger, "get_historical_stats_async", _slow_async([{"season": "2023-24"}], 0.05))
+    monkeypatch.setattr(data_merger, "get_contract_info_async", _slow_async("4 años / 194M", 0.5))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", analyze)
+
+    started = time.monotonic()
+    merged = asyncio.run(data_merger.merge_player_data_async("Kevin Durant"))
+
+    assert analysis_started[0] - started < 0.3
+    assert merged.ai_analysis == "ok"
+    assert merged.contract.details == "4 años / 194M"
+
+
+def test_deadline_starts_when_the_source_starts(monkeypatch):
+    # Pool ocupado: la mitad de las fuentes espera en cola tanto como tarda la otra mitad
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(data_merger, "_executor", pool)
+    for source in ("player_info", "advanced_stats", "historical_stats", "contract_info", "ai_analysis"):
+        monkeypatch.setitem(data_merger.Config.SOURCE_DEADLINES, source, 0.15)
+    monkeypatch.setattr(data_merger, "get_nba_player_data", _slow({"position": "F"}, 0.1))
+    monkeypatch.setattr(data_merger, "get_advanced_stats", _slow({"ppg": 27}, 0.1))
+    monkeypatch.setattr(data_merger, "get_historical_stats", _slow([{"season": "2023-24"}], 0.1))
+    monkeypatch.setattr(data_merger, "get_contract_info", _slow("4 años / 194M", 0.1))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", _slow({"summary": "ok"}, 0.1))
+
+    merged = data_merger.merge_player_data("Kevin Durant")
+    pool.shutdown()
+
+    assert merged.unavailable_sources == []
+    assert merged.contract.details == "4 años / 194M"
+
+
+def test_batch_deduplicates_and_streams_in_completion_order(monkeypatch):
+    calls = []
+
+    def fake_merge(player_name):
+        calls.append(player_name)
+        time.sleep(0.3 if player_name == "Kevin Durant" else 0.05)
+        return {"player": {"name": player_name}}
+
+    monkeypatch.setattr(data_merger, "merge_player_data", fake_merge)
+    monkeypatch.setattr(data_merger, "prefetch_nba_players_data", lambda names: 0)
+
+    results = list(data_merger.merge_players_data(["Kevin Durant", "kevin  durant", "Stephen Curry", ""]))
+
+    assert sorted(calls) == ["Kevin Durant", "Stephen Curry"]
+    assert [name for name, _, _ in results] == ["Stephen Curry", "Kevin Durant"]
+    assert all(error is None for _, _, error in results)
+
+
+def test_concurrent_batch_sources_do_not_time_out_in_queue(monkeypatch):
+    for source in ("player_info", "advanced_stats", "historical_stats", "contract_info", "ai_analysis"):
+        monkeypatch.setitem(data_merger.Config.SOURCE_DEADLINES, source, 0.3)
+    monkeypatch.setattr(data_merger, "get_nba_player_data", _slow({"position": "F"}, 0.2))
+    monkeypatch.setattr(data_merger, "get_advanced_stats", _slow({"ppg": 27}, 0.2))
+    monkeypatch.setattr(data_merger, "get_historical_stats", _slow([{"season": "2023-24"}], 0.2))
+    monkeypatch.setattr(data_merger, "get_contract_info", _slow("4 años / 194M", 0.2))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", _slow({"summary": "ok"}, 0.1))
+    monkeypatch.setattr(data_merger, "prefetch_nba_players_data", lambda names: 0)
+    # Una consulta suelta a la vez que el lote, en el pool de fuentes compartido
+    caller = ThreadPoolExecutor(max_workers=1)
+    single = caller.submit(data_merger.merge_player_data, "Luka Doncic")
+
+    players = [f"Player {i}" for i in range(data_merger.Config.BATCH_MAX_CONCURRENCY)]
+    results = list(data_merger.merge_players_data(players))
+    caller.shutdown()
+
+    assert len(results) == len(players)
+    assert all(record.unavailable_sources == [] for _, record, _ in results)
+    assert single.result().unavailable_sources == []
+
+
+def test_slow_contract_does_not_delay_analysis(monkeypatch):
+    analysis_started = []
+
+    def analyze(record):
+        analysis_started.append(time.monotonic())
+        return {"summary": "ok"}
+
+    monkeypatch.setattr(data_merger, "get_nba_player_data", _slow({"position": "F"}, 0.05))
+    monkeypatch.setattr(data_merger, "get_advanced_stats", _slow({}, 0.05))
+    monkeypatch.setattr(data_merger, "get_historical_stats", _slow([{"season": "2023-24"}], 0.05))
+    monkeypatch.setattr(data_merger, "get_contract_info", _slow("4 años / 194M", 0.5))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", analyze)
+
+    started = time.monotonic()
+    merged = data_merger.merge_player_data("Kevin Durant")
+
+    # El análisis empieza con el histórico y la ficha, no tras el contrato (0.5s)
+    assert analysis_started[0] - started < 0.3
+    assert merged.ai_analysis == "ok"
+    assert merged.contract.details == "4 años / 194M"
+
+
+def _slow_async(value, delay):
+    async def fetch(*args):
+        await asyncio.sleep(delay)
+        return value
+    return fetch
+
+
+def test_async_merge_matches_sync_contract(monkeypatch):
+    monkeypatch.setitem(data_merger.Config.SOURCE_DEADLINES, "contract_info", 0.1)
+    monkeypatch.setattr(data_merger, "get_nba_player_data_async", _slow_async({"position": "F"}, 0.2))
+    monkeypatch.setattr(data_merger, "get_advanced_stats_async", _slow_async({}, 0.2))
+    monkeypatch.setattr(data_merger, "get_historical_stats_async", _slow_async([{"season": "2023-24"}], 0.2))
+    monkeypatch.setattr(data_merger, "get_contract_info_async", _slow_async("tarde", 1))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", _slow({"summary": "ok"}, 0.1))
+
+    started = time.monotonic()
+    merged = asyncio.run(data_merger.merge_player_data_async("Kevin Durant"))
+
+    assert time.monotonic() - started < 0.6
+    assert merged.position == "F"
+    assert merged.ai_analysis == "ok"
+    assert merged.contract.details is None
+    assert merged.unavailable_sources == ["contract_info"]
+
+
+def test_async_slow_contract_does_not_delay_analysis(monkeypatch):
+    analysis_started = []
+
+    def analyze(record):
+        analysis_started.append(time.monotonic())
+        return {"summary": "ok"}
+
+    monkeypatch.setattr(data_merger, "get_nba_player_data_async", _slow_async({"position": "F"}, 0.05))
+    monkeypatch.setattr(data_merger, "get_advanced_stats_async", _slow_async({}, 0.05))
+    monkeypatch.setattr(data_merger, "get_historical_stats_async", _slow_async([{"season": "2023-24"}], 0.05))
+    monkeypatch.setattr(data_merger, "get_contract_info_async", _slow_async("4 años / 194M", 0.5))
+    monkeypatch.setattr(data_merger, "generate_player_analysis", analyze)
+
+    started = time.monotonic()
+    merged = asyncio.run(data_merger.merge_player_data_async("Kevin Durant"))
+
+    assert analysis_started[0] - started < 0.3
+    assert merged.ai_analysis == "ok"
+    assert merged.contract.details == "4 años / 194M"
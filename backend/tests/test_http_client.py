@@ -0,0 +1,111 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modules.cache import cached
+from modules.http_client import HttpClient, TokenBucket, deadline
+from modules.resilience import CLOSED, ThrottledError, circuit_breaker
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    failures_left = 0
+
+    def do_GET(self):
+        if _Handler.failures_left > 0:
+            _Handler.failures_left -= 1
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client(**kwargs):
+    options = {"max_retries": 3, "backoff_base": 0.001, "rate_limits": {}, "default_rate": 1000}
+    options.update(kwargs)
+    return HttpClient(**options)
+
+
+def test_keep_alive_reuses_connections(server):
+    client = _client()
+    for _ in range(5):
+        assert client.get(f"{server}/players").status_code == 200
+
+    stats = client.get_connection_stats()[server]
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+
+
+def test_retries_on_5xx(server):
+    _Handler.failures_left = 2
+    client = _client()
+
+    response = client.get(f"{server}/players")
+
+    assert response.status_code == 200
+    assert client.get_connection_stats()[server]["retries"] == 2
+
+
+def test_returns_last_response_when_retries_exhausted(server):
+    _Handler.failures_left = 5
+    client = _client(max_retries=1)
+
+    assert client.get(f"{server}/players").status_code == 503
+    _Handler.failures_left = 0
+
+
+def test_token_bucket_throttles_bursts():
+    bucket = TokenBucket(rate=50, capacity=2)
+    waits = [bucket.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[3] > 0.01
+
+
+def test_token_bucket_gives_up_past_max_wait():
+    bucket = TokenBucket(rate=2, capacity=1)
+    assert bucket.acquire() == 0.0
+
+    started = time.monotonic()
+    assert bucket.acquire(max_wait=0.1) is None
+    assert time.monotonic() - started < 0.05
+    # No se llevó ningún token: el siguiente sigue esperando solo medio segundo
+    assert 0.4 < bucket.reserve(max_wait=1) <= 0.5
+
+
+def test_saturated_host_fails_fast_at_the_callers_deadline(server, monkeypatch):
+    client = _client(rate_limits={"127.0.0.1": (0.5, 1)})
+    monkeypatch.setattr(circuit_breaker("throttled_source"), "failure_threshold", 1)
+    assert client.get(f"{server}/players").status_code == 200
+
+    @cached("throttled_source")
+    def fetch(player_name):
+        return client.get(f"{server}/players").text
+
+    started = time.monotonic()
+    with deadline(0.2):
+        with pytest.raises(ThrottledError):
+            client.get(f"{server}/players")
+        # A través de la caché: sin valor de reserva, y sin abrir el circuito de la fuente
+        assert fetch.with_meta("Kevin Durant")[0] is None
+    assert time.monotonic() - started < 0.1
+    assert circuit_breaker("throttled_source").state == CLOSED
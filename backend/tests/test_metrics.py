@@ -0,0 +1,37 @@
+import time
+
+from modules.metrics import Counter, Histogram, end_trace, server_timing_header, start_trace, timed
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_duration_seconds", "Prueba", buckets=(0.1, 1))
+    histogram.observe(0.05, stage="parse")
+    histogram.observe(0.5, stage="parse")
+    histogram.observe(5, stage="parse")
+
+    lines = histogram.render()
+
+    assert 'test_duration_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'test_duration_seconds_bucket{stage="parse",le="1"} 2' in lines
+    assert 'test_duration_seconds_bucket{stage="parse",le="+Inf"} 3' in lines
+    assert 'test_duration_seconds_count{stage="parse"} 3' in lines
+
+
+def test_counter_escapes_labels():
+    counter = Counter("test_errors_total", "Prueba")
+    counter.inc(source='spo"trac')
+    counter.inc(source='spo"trac')
+
+    assert 'test_errors_total{source="spo\\"trac"} 2' in counter.render()
+
+
+def test_timed_records_into_active_trace():
+    token = start_trace()
+    with timed("merge_player_data"):
+        time.sleep(0.01)
+    trace = end_trace(token)
+
+    assert [stage for stage, _ in trace] == ["merge_player_data"]
+    assert server_timing_header(trace).startswith("merge_player_data;dur=")
+    with timed("outside_trace"):
+        pass
@@ -1,18 +1,95 @@
-import json
-from modules.mistral_ai import generate_analysis
+import threading
+
+import pytest
+
+from modules import mistral_ai
+from modules.cache import TieredCache
+from modules.records import PlayerRecord
+from modules.resilience import circuit_breaker
+from tests.fake_llm_server import FakeLLMServer
 
 # Datos de prueba simulados
 fake_player_data = {
     "name": "Kevin Durant",
     "team": "Phoenix Suns",
-    "points_per_game": 27.1,
-    "rebounds_per_game": 6.6,
-    "assists_per_game": 5.0,
     "position": "PF",
+    "advanced_stats": {"points_per_game": 27.1, "rebounds_per_game": 6.6, "assists_per_game": 5.0},
     "contract": {"team": "PHO", "salary": "46M", "years_left": 2},
-    "stats_history": [{"season": "2022-23", "team": "PHO", "ppg": 29.1, "rpg": 6.7, "apg": 5.0}]
 }
 
-print("🔍 Probando análisis con Mistral AI...\n")
-response = generate_analysis(json.dumps(fake_player_data, indent=2))
-print(response)
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    with FakeLLMServer(reply="Anotador de élite con impacto inmediato.", token_delay=0.02) as server:
+        monkeypatch.setattr(mistral_ai.Config, "MISTRAL_API_URL", server.url)
+        monkeypatch.setattr(mistral_ai.Config, "MISTRAL_API_KEY", "test-key")
+        monkeypatch.setattr(mistral_ai, "_client", None)
+        monkeypatch.setattr(mistral_ai, "player_cache", TieredCache(str(tmp_path / "cache.sqlite3"), 10, {"analysis": 60}))
+        yield server
+
+
+def test_repeat_queries_are_served_from_cache(llm):
+    first = mistral_ai.generate_analysis(fake_player_data)
+    second = mistral_ai.generate_analysis(dict(fake_player_data))
+
+    assert first == second == "Anotador de élite con impacto inmediato."
+    assert len(llm.requests) == 1
+    assert llm.requests[0]["model"] == mistral_ai.Config.MISTRAL_MODEL
+
+
+def test_changed_data_misses_cache(llm):
+    mistral_ai.generate_analysis(fake_player_data)
+    mistral_ai.generate_analysis({**fake_player_data, "team": "Houston Rockets"})
+
+    assert len(llm.requests) == 2
+
+
+def test_stream_yields_tokens_and_fills_cache(llm):
+    chunks = list(mistral_ai.stream_analysis(fake_player_data))
+
+    assert len(chunks) == 6
+    assert "".join(chunks).strip() == "Anotador de élite con impacto inmediato."
+    assert list(mistral_ai.stream_analysis(fake_player_data)) == ["".join(chunks)]
+    assert mistral_ai.generate_analysis(fake_player_data) == "".join(chunks)
+    assert len(llm.requests) == 1
+
+
+def test_player_prompt_includes_profile_and_contract(llm):
+    record = PlayerRecord.from_sources(
+        "kevin durant", {"name": "Kevin Durant", "team": "Phoenix Suns", "position": "F", "height": "6-11",
+                         "weight": "240"},
+        {}, [{"season": "2023-24", "team": "PHO", "points_per_game": 27.1}], "2 años / 105M", None, [])
+
+    assert mistral_ai.generate_player_analysis(record)["summary"] == "Anotador de élite con impacto inmediato."
+    assert "".join(mistral_ai.stream_player_analysis(record)) == "Anotador de élite con impacto inmediato."
+
+    prompt = llm.requests[0]["messages"][0]["content"]
+    assert "Altura: 6-11" in prompt and "Peso: 240" in prompt and "2 años / 105M" in prompt
+    assert "Puntos por partido: 27.1" in prompt
+    # Mismo prompt en streaming: sale de la caché
+    assert len(llm.requests) == 1
+
+
+def test_concurrent_streams_share_one_completion(llm):
+    results = []
+
+    def stream():
+        results.append("".join(mistral_ai.stream_analysis(fake_player_data)))
+
+    threads = [threading.Thread(target=stream) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(llm.requests) == 1
+    assert [result.strip() for result in results] == ["Anotador de élite con impacto inmediato."] * 3
+
+
+def test_stream_skips_llm_with_open_circuit(llm):
+    breaker = circuit_breaker("analysis")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    assert list(mistral_ai.stream_analysis(fake_player_data)) == [mistral_ai.NO_ANALYSIS]
+    assert llm.requests == []
@@ -0,0 +1,38 @@
+from modules.player_index import PlayerIndex
+
+
+def _index(tmp_path):
+    return PlayerIndex(str(tmp_path / "index.sqlite3"))
+
+
+def test_resolve_by_alias_and_official_name(tmp_path):
+    index = _index(tmp_path)
+    index.register("basketball_reference", "kd", "/players/d/duranke01.html", "Kevin Durant")
+
+    assert index.resolve("basketball_reference", "KD") == "/players/d/duranke01.html"
+    assert index.resolve("basketball_reference", "Kevin  Durant") == "/players/d/duranke01.html"
+    assert index.resolve("spotrac", "Kevin Durant") is None
+
+
+def test_persists_between_instances(tmp_path):
+    _index(tmp_path).register("balldontlie", "Stephen Curry", 115)
+
+    assert _index(tmp_path).resolve("balldontlie", "stephen curry") == "115"
+
+
+def test_prefix_suggestions_match_any_word(tmp_path):
+    index = _index(tmp_path)
+    index.register("balldontlie", "Kevin Durant", 140)
+    index.register("balldontlie", "Kevin Love", 282)
+    index.register("spotrac", "Kevin Durant", "/nba/player/_/id/2803/kevin-durant")
+
+    assert [s["name"] for s in index.suggest("kev")] == ["Kevin Love", "Kevin Durant"]
+    assert index.suggest("dura") == [{"name": "Kevin Durant", "sources": ["balldontlie", "spotrac"]}]
+
+
+def test_fuzzy_suggestions_tolerate_typos(tmp_path):
+    index = _index(tmp_path)
+    index.register("balldontlie", "Giannis Antetokounmpo", 15)
+
+    assert [s["name"] for s in index.suggest("antetokumpo")] == ["Giannis Antetokounmpo"]
+    assert index.suggest("zzz") == []
@@ -0,0 +1,95 @@
+import json
+import time
+
+import numpy as np
+
+from modules.data.build_aging_curves import aging_curves_from_seasons
+from modules.prediction_model import AGING_CURVES_PATH, predict_player_performance, predict_players_performance
+
+
+def _season(year, age, ppg, rpg=5.0, apg=3.0):
+    return {"season": f"{year}-{str(year + 1)[2:]}", "age": age, "team": "OKC",
+            "points_per_game": ppg, "rebounds_per_game": rpg, "assists_per_game": apg}
+
+
+def test_rising_young_player_projects_upwards():
+    history = [_season(2020 + i, 20 + i, 10.0 + 3 * i) for i in range(4)]
+
+    prediction = predict_player_performance(history)
+
+    assert prediction["predicted_ppg"] > 19.0
+    assert prediction["predicted_rpg"] > 5.0
+
+
+def test_veteran_projects_decline_and_accepts_string_values():
+    history = [_season(2020 + i, 34 + i, str(25.0)) for i in range(4)]
+
+    prediction = predict_player_performance(history)
+
+    assert prediction["predicted_ppg"] < 25.0
+
+
+def test_batch_matches_single_and_handles_edge_cases():
+    traded = [_season(2022, 25, 20.0), {**_season(2022, 25, 18.0), "team": "PHO"}, _season(2023, 26, 22.0)]
+    histories = [traded, [_season(2023, 22, 12.0)], [], [{"season": "Career", "points_per_game": 27.3}]]
+
+    predictions = predict_players_performance(histories)
+
+    assert predictions[0] == predict_player_performance(traded)
+    assert predictions[1]["predicted_ppg"] > 12.0
+    assert predictions[2] == {"predicted_ppg": "No disponible", "predicted_rpg": "No disponible",
+                              "predicted_apg": "No disponible"}
+    assert predictions[3] == predictions[2]
+
+
+def test_batch_scoring_is_cheap():
+    histories = [[_season(2010 + j, 20 + j, 10.0 + j) for j in range(15)] for _ in range(1000)]
+
+    started = time.perf_counter()
+    predictions = predict_players_performance(histories)
+
+    assert len(predictions) == 1000
+    assert time.perf_counter() - started < 1.0
+
+
+def test_season_without_stats_is_skipped_not_zero():
+    # Temporada sin jugar (p. ej. lesión): sin datos, no 0 puntos
+    history = [_season(2017, 28, 26.0), _season(2018, 29, 26.0), _season(2019, 30, None, None, None)]
+
+    prediction = predict_player_performance(history)
+
+    assert prediction["predicted_ppg"] > 20.0
+
+
+def _peak_age(ages, deltas):
+    # Edad en la que la curva acumulada (1 + variación año a año) llega a su máximo
+    return ages[int(np.argmax(np.cumprod([1.0] + [1.0 + delta for delta in deltas[:-1]])))]
+
+
+def test_aging_curves_peak_mid_twenties_and_decline_after_thirty():
+    with open(AGING_CURVES_PATH, encoding="utf-8") as f:
+        curves = json.load(f)
+
+    ages = curves["ages"]
+    for stat in ("ppg", "rpg", "apg"):
+        assert 24 <= _peak_age(ages, curves[stat]) <= 29
+        assert all(delta < 0 for age, delta in zip(ages, curves[stat]) if age >= 30)
+
+
+def test_aging_curves_are_derived_from_consecutive_seasons():
+    # Liga sintética: todos mejoran un 10% al año hasta los 26 y pierden un 5% al año desde entonces
+    rows = []
+    for player in range(60):
+        ppg = 10.0
+        for age in range(20, 36):
+            rows.append({"player_id": f"p{player}", "season": f"{1990 + age}-{str(1991 + age)[2:]}", "age": age,
+                         "games": 70, "points_per_game": ppg, "rebounds_per_game": ppg / 2,
+                         "assists_per_game": ppg / 3})
+            ppg *= 1.10 if age < 26 else 0.95
+
+    curves = aging_curves_from_seasons(rows)
+
+    assert _peak_age(curves["ages"], curves["ppg"]) in (26, 27)
+    assert curves["ppg"][curves["ages"].index(22)] == 0.1
+    assert curves["ppg"][curves["ages"].index(31)] == -0.05
+    assert curves["pairs"]["ppg"][curves["ages"].index(40)] == 0
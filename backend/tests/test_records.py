@@ -0,0 +1,93 @@
+import json
+import math
+
+import numpy as np
+
+from modules import records
+from modules.data_processor import build_player_response
+from modules.prediction_model import predict_player_performance
+from modules.records import PlayerRecord, SeasonTable, dumps, parse_number
+
+
+def _career():
+    return [
+        {"season": "2022-23", "team": "TOT", "position": "PF", "age": 34, "games": 47,
+         "points_per_game": 29.1, "rebounds_per_game": 6.7, "assists_per_game": 5.0},
+        {"season": "2022-23", "team": "BRK", "position": "PF", "age": 34, "games": 39,
+         "points_per_game": 29.7, "rebounds_per_game": 6.7, "assists_per_game": 5.3},
+        {"season": "2023-24", "team": "PHO", "position": "PF", "age": 35, "games": 75,
+         "points_per_game": "27.1", "rebounds_per_game": 6.6, "assists_per_game": "N/A"},
+        {"season": "Career", "team": None, "points_per_game": 27.3},
+    ]
+
+
+def test_parse_number():
+    assert parse_number("27.1") == 27.1
+    assert parse_number(26) == 26
+    assert parse_number(" 5 ") == 5.0
+    for missing in (None, "", "N/A", "-", "No disponible", "n/a?", True, math.nan):
+        assert parse_number(missing) is None
+
+
+def test_season_table_round_trip():
+    table = SeasonTable.from_rows(_career())
+
+    assert len(table) == 4
+    assert table.season_indices() == [0, 2]
+    row = table.row(2)
+    assert row["points_per_game"] == 27.1
+    assert row["assists_per_game"] is None
+    assert row["games"] == 75 and isinstance(row["games"], int)
+    assert table.rows()[3]["team"] == "N/A"
+    assert np.frombuffer(table.column("points_per_game"))[0] == 29.1
+
+
+def test_record_from_source_shapes():
+    record = PlayerRecord.from_sources(
+        "kevin durant",
+        {"name": "Kevin Durant", "team": {"name": "Phoenix Suns", "abbreviation": "PHX"}, "position": "F",
+         "height": "6 ft 10 in"},
+        {"team": "Phoenix Suns", "ppg": 26.6, "rpg": "6.6", "apg": None},
+        _career(),
+        "4 yr(s) / $194,219,320",
+        {"summary": "ok"},
+        [],
+    )
+
+    assert (record.name, record.team, record.team_abbreviation) == ("Kevin Durant", "Phoenix Suns", "PHX")
+    assert (record.current.ppg, record.current.rpg, record.current.apg) == (26.6, 6.6, None)
+    assert record.contract.details.startswith("4 yr(s)")
+    assert record.ai_analysis == "ok"
+
+    # Sin ficha de balldontlie: nombre y equipo de NBA Stats
+    fallback = PlayerRecord.from_sources("kevin durant", None, {"name": "Kevin Durant", "team": "Phoenix Suns"},
+                                         None, None, None, ["player_info"])
+    assert (fallback.name, fallback.team, fallback.contract.details) == ("Kevin Durant", "Phoenix Suns", None)
+    assert len(fallback.seasons) == 0
+
+
+def test_response_reads_current_stats():
+    record = PlayerRecord.from_sources("kevin durant", {"team": {"name": "Phoenix Suns"}}, {"ppg": 26.6},
+                                       _career(), None, None, [])
+
+    response = build_player_response("kevin durant", record)
+
+    assert response["data"]["stats"] == {"ppg": 26.6, "rpg": None, "apg": None, "per": None}
+    assert response["data"]["team"] == "Phoenix Suns"
+    assert response["data"]["contract"] == "No disponible"
+    assert response["predictions"] == predict_player_performance(_career())
+
+
+def test_dumps_with_and_without_orjson(monkeypatch):
+    record = PlayerRecord.from_sources("kevin durant", {}, {"ppg": 26.6}, _career(), None, None, [])
+    payload = {"record": record, "value": np.float64(1.5), "column": record.seasons.column("games")}
+
+    fast = json.loads(dumps(payload))
+    monkeypatch.setattr(records, "orjson", None)
+    standard = json.loads(dumps(payload))
+
+    assert fast == standard
+    assert standard["record"]["seasons"][2]["points_per_game"] == 27.1
+    assert standard["record"]["current"]["ppg"] == 26.6
+    assert standard["value"] == 1.5
+    assert standard["column"][0] == 47.0
@@ -0,0 +1,87 @@
+import importlib
+from datetime import datetime, timezone
+
+import pytest
+
+from modules import refresh_scheduler
+from modules.cache import TieredCache
+
+
+class _Fetcher:
+    def __init__(self, source, cache):
+        self.source, self.cache, self.refreshed = source, cache, []
+
+    def refresh(self, player_name):
+        self.refreshed.append(player_name)
+        self.cache.set(self.source, player_name, {"ok": True})
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = TieredCache(str(tmp_path / "cache.sqlite3"), 100, {"advanced_stats": 600, "contract_info": 43200})
+    monkeypatch.setattr(refresh_scheduler, "player_cache", cache)
+    monkeypatch.setattr(refresh_scheduler.Config, "REFRESH_BUDGETS", {"advanced_stats": 2, "contract_info": 1})
+    return cache
+
+
+def _scheduler(cache):
+    fetchers = {source: _Fetcher(source, cache) for source in ("advanced_stats", "contract_info")}
+    return refresh_scheduler.RefreshScheduler(fetchers, interval=1, hot_players=2), fetchers
+
+
+MORNING_BEFORE_GAMES = datetime(2026, 3, 1, 3, tzinfo=timezone.utc)
+
+
+def test_refreshes_only_hot_players_within_budget(cache):
+    scheduler, fetchers = _scheduler(cache)
+    for player_name in ["Kevin Durant"] * 3 + ["Stephen Curry"] * 2 + ["Role Player"]:
+        scheduler.record_query(player_name)
+
+    assert scheduler.run_once(MORNING_BEFORE_GAMES) == {"advanced_stats": 2, "contract_info": 1}
+    assert fetchers["advanced_stats"].refreshed == ["Kevin Durant", "Stephen Curry"]
+    assert fetchers["contract_info"].refreshed == ["Kevin Durant"]
+
+
+def test_skips_fresh_entries_and_refreshes_expiring_ones(cache):
+    scheduler, fetchers = _scheduler(cache)
+    scheduler.record_query("Kevin Durant")
+    cache.set("advanced_stats", "Kevin Durant", {}, ttl=60)       # 10% del TTL restante: toca
+    cache.set("contract_info", "Kevin Durant", {})                 # recién cargado: no toca
+
+    assert scheduler.run_once(MORNING_BEFORE_GAMES) == {"advanced_stats": 1, "contract_info": 0}
+
+
+def test_game_night_forces_current_season_once_per_day(cache, monkeypatch):
+    monkeypatch.setattr(refresh_scheduler.Config, "GAME_NIGHT_SOURCES", ("advanced_stats",))
+    scheduler, fetchers = _scheduler(cache)
+    scheduler.record_query("Kevin Durant")
+    cache.set("advanced_stats", "Kevin Durant", {})
+    cache.set("contract_info", "Kevin Durant", {})
+    after_games = datetime(2026, 3, 1, 10, tzinfo=timezone.utc)
+
+    assert scheduler.run_once(after_games)["advanced_stats"] == 1
+    assert scheduler.run_once(after_games)["advanced_stats"] == 0
+
+
+class _CountingScheduler:
+    def __init__(self):
+        self.starts = 0
+
+    def start(self):
+        self.starts += 1
+
+
+def test_flask_app_starts_scheduler_only_in_the_serving_process(monkeypatch):
+    monkeypatch.setattr(refresh_scheduler.Config, "REFRESH_SCHEDULER_ENABLED", True)
+    scheduler = _CountingScheduler()
+    monkeypatch.setattr(refresh_scheduler, "build_refresh_scheduler", lambda: scheduler)
+    app = importlib.reload(importlib.import_module("app"))
+    assert scheduler.starts == 0                      # importar no arranca nada
+
+    monkeypatch.delenv("WERKZEUG_RUN_MAIN", raising=False)
+    app.start_refresh_scheduler(reloader=True)        # proceso vigilante del recargador
+    assert scheduler.starts == 0
+
+    monkeypatch.setenv("WERKZEUG_RUN_MAIN", "true")
+    app.start_refresh_scheduler(reloader=True)        # proceso hijo que sirve
+    assert scheduler.starts == 1
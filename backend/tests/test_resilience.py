@@ -0,0 +1,101 @@
+import time
+
+from modules import cache, data_merger
+from modules.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, circuit_breaker
+from modules.spotrac_scraper import get_contract_info
+
+
+def _expire(source, player_name):
+    # Vuelve a guardar el valor ya caducado (como si su TTL hubiera pasado hace un minuto)
+    value = cache.player_cache.get(source, player_name)
+    cache.player_cache.set(source, player_name, value, ttl=-60)
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    # Una única llamada de prueba; si falla, vuelve a abrirse
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failing_source_serves_last_good_value(replay, monkeypatch):
+    monkeypatch.setattr(circuit_breaker("contract_info"), "failure_threshold", 2)
+    contract = get_contract_info("Kevin Durant")
+    _expire("contract_info", "Kevin Durant")
+    replay.failure_rate = {"spotrac": 1.0}
+
+    value, meta = get_contract_info.with_meta("Kevin Durant")
+    assert value == contract
+    assert meta["status"] == "stale" and meta["age_seconds"] >= 0
+
+    get_contract_info("Kevin Durant")
+    assert circuit_breaker("contract_info").state == OPEN
+
+    # Circuito abierto: ni una petición más a Spotrac, y sin esperar a timeouts ni reintentos
+    requests_before = len(replay.requests_to("spotrac"))
+    started = time.monotonic()
+    assert get_contract_info.with_meta("kevin durant")[0] == contract
+    assert time.monotonic() - started < 0.05
+    assert len(replay.requests_to("spotrac")) == requests_before
+
+
+def test_half_open_probe_refreshes_in_background(replay, monkeypatch):
+    breaker = circuit_breaker("contract_info")
+    monkeypatch.setattr(breaker, "failure_threshold", 1)
+    monkeypatch.setattr(breaker, "reset_timeout", 0.05)
+    contract = get_contract_info("Kevin Durant")
+    _expire("contract_info", "Kevin Durant")
+    replay.failure_rate = {"spotrac": 1.0}
+    get_contract_info("Kevin Durant")
+    assert breaker.state == OPEN
+
+    # La fuente se recupera: la consulta no espera a la prueba, que refresca la caché por detrás
+    replay.failure_rate = {}
+    time.sleep(0.06)
+    value, meta = get_contract_info.with_meta("Kevin Durant")
+    assert value == contract and meta["status"] == "stale"
+
+    for _ in range(100):
+        if breaker.state == CLOSED:
+            break
+        time.sleep(0.01)
+    assert breaker.state == CLOSED
+    assert get_contract_info.with_meta("Kevin Durant")[1]["status"] == "cached"
+
+
+def test_unknown_player_does_not_trip_the_breaker(replay, monkeypatch):
+    monkeypatch.setattr(circuit_breaker("historical_stats"), "failure_threshold", 1)
+
+    assert data_merger.get_historical_stats("Nobody Here") is None
+    assert circuit_breaker("historical_stats").state == CLOSED
+
+
+def test_merge_reports_freshness_and_uses_stale_value_on_deadline(replay, monkeypatch):
+    first = data_merger.merge_player_data("Kevin Durant", include_analysis=False)
+    assert {source: meta["status"] for source, meta in first.freshness.items()} == {
+        "historical_stats": "fresh", "player_info": "fresh", "advanced_stats": "fresh", "contract_info": "fresh"}
+
+    _expire("contract_info", "Kevin Durant")
+    monkeypatch.setitem(data_merger.Config.SOURCE_DEADLINES, "contract_info", 0.2)
+    replay.latency = {"spotrac": 0.5}
+
+    merged = data_merger.merge_player_data("Kevin Durant", include_analysis=False)
+
+    assert merged.unavailable_sources == []
+    assert merged.contract.details == first.contract.details
+    assert merged.freshness["contract_info"]["status"] == "stale"
+    assert merged.freshness["historical_stats"]["status"] == "cached"
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from modules import data_merger, mistral_ai
+from modules.async_http_client import async_http_client
+from modules.balldontlie_api import get_nba_player_data, get_nba_player_data_async
+from modules.nba_stats_api import get_advanced_stats
+from modules.resilience import UpstreamError
+from modules.spotrac_scraper import get_contract_info, get_contract_info_async
+from tests.replay_server import DROP_CONNECTION, FIXTURES_DIR
+
+
+def _recorded_analysis():
+    with open(os.path.join(FIXTURES_DIR, "mistral", "chat_completion.json"), encoding="utf-8") as f:
+        return json.load(f)["choices"][0]["message"]["content"]
+
+
+def _run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await async_http_client.aclose()
+    return asyncio.run(main())
+
+
+def test_balldontlie_search_then_direct_lookup(replay):
+    first = get_nba_player_data.uncached("Kevin Durant")
+    second = get_nba_player_data.uncached("kevin durant")
+
+    assert first == second
+    assert first["id"] == 140
+    assert first["team"]["name"] == "Phoenix Suns"
+    assert first["height"] == "6 ft 10 in"
+    # La búsqueda deja el ID en el índice: la segunda consulta va directa a la ficha
+    assert [path for _, _, path, _ in replay.requests_to("balldontlie")] == [
+        "/players?search=Kevin%20Durant", "/players/140"]
+
+
+def test_nba_stats_recorded_and_templated_players(replay):
+    durant = get_advanced_stats.uncached("Kevin Durant")
+    unknown = get_advanced_stats.uncached("Jalen Brunson")
+
+    assert durant["ppg"] == 26.6
+    assert durant["team"] == "Phoenix Suns"
+    assert unknown["name"] == "Jalen Brunson"
+    assert unknown["player_id"] != durant["player_id"]
+
+
+def test_spotrac_contract_and_not_modified_profile(replay):
+    first = get_contract_info.uncached("Kevin Durant")
+    second = get_contract_info.uncached("Kevin Durant")
+
+    assert first == second
+    assert first.startswith("4 yr(s) / $194,219,320")
+    profile_requests = [headers for _, _, path, headers in replay.requests_to("spotrac") if "/player/" in path]
+    assert "If-None-Match" in profile_requests[1]
+
+
+def test_transient_failures_are_retried(replay):
+    replay.fail_next("nba_stats", 2, status=503)
+    replay.fail_next("balldontlie", 1, status=DROP_CONNECTION)
+
+    assert get_advanced_stats.uncached("Kevin Durant")["ppg"] == 26.6
+    assert get_nba_player_data.uncached("Kevin Durant")["id"] == 140
+    assert len(replay.requests_to("nba_stats")) == 3
+    assert len(replay.requests_to("balldontlie")) == 2
+
+
+def test_persistent_failure_raises_upstream_error(replay):
+    replay.failure_rate = {"spotrac": 1.0}
+
+    with pytest.raises(UpstreamError):
+        get_contract_info.uncached("Kevin Durant")
+    # A través de la caché: sin valor anterior que servir, None
+    assert get_contract_info("Kevin Durant") is None
+
+
+def test_async_fetchers_match_sync(replay):
+    assert _run(get_nba_player_data_async.uncached("Kevin Durant")) == get_nba_player_data.uncached("Kevin Durant")
+    assert _run(get_contract_info_async.uncached("Kevin Durant")) == get_contract_info.uncached("Kevin Durant")
+
+
+def test_mistral_analysis_and_stream(replay):
+    player = {"name": "Kevin Durant", "team": "PHX", "advanced_stats": {"points_per_game": 26.6}}
+
+    assert mistral_ai.generate_analysis(player) == _recorded_analysis()
+    assert "".join(mistral_ai.stream_analysis(dict(player, team="BKN"))).strip() == _recorded_analysis()
+
+
+def test_full_pipeline_offline(replay):
+    merged = data_merger.merge_player_data("Kevin Durant")
+
+    assert merged.unavailable_sources == []
+    assert merged.name == "Kevin Durant"
+    assert merged.team == "Phoenix Suns"
+    assert merged.current.ppg == 26.6
+    assert merged.seasons.seasons[0] == "2007-08"
+    assert merged.contract.details.startswith("4 yr(s)")
+    assert merged.ai_analysis == _recorded_analysis()
+
+
+def test_slow_source_misses_its_deadline(replay, monkeypatch):
+    monkeypatch.setitem(data_merger.Config.SOURCE_DEADLINES, "contract_info", 0.2)
+    replay.latency = {"spotrac": 0.5}
+    # La consulta a Spotrac sigue en su hilo tras vencer el plazo: se espera a que termine
+    # antes de deshacer los parches, o acabaría usando la configuración y los almacenes reales
+    finished = threading.Event()
+
+    def contract_with_meta(player_name):
+        try:
+            return get_contract_info.with_meta(player_name)
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(data_merger, "get_contract_info", SimpleNamespace(with_meta=contract_with_meta))
+
+    merged = data_merger.merge_player_data("Stephen Curry", include_analysis=False)
+
+    assert merged.unavailable_sources == ["contract_info"]
+    assert len(merged.seasons)
+    assert finished.wait(timeout=5)
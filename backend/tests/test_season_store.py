@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from modules.bref_parser import parse_per_game_stats
+from modules.season_store import SeasonStore
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "basketball_reference")
+
+LEAGUE_CSV = """Rk,Player,Age,Team,Pos,G,GS,MP,FG%,3P%,FT%,TRB,AST,STL,BLK,TOV,PTS,Player-additional
+1,Luka Dončić,24,DAL,PG,70,70,37.5,.487,.382,.786,9.2,9.8,1.4,0.5,4.0,33.9,doncilu01
+2,Giannis Antetokounmpo,29,MIL,PF,73,73,35.2,.611,.274,.657,11.5,6.5,1.2,1.1,3.4,30.4,antetgi01
+3,Dennis Schröder,30,2TM,PG,80,51,28.7,.426,.350,.853,2.6,5.6,0.8,0.2,2.1,13.6,schrode01
+4,Dennis Schröder,30,TOR,PG,51,33,31.0,.436,.347,.840,3.0,6.1,0.8,0.2,2.3,14.6,schrode01
+5,Dennis Schröder,30,BRK,PG,29,18,24.6,.400,.358,.885,1.9,4.8,0.8,0.2,1.7,11.9,schrode01
+,League Average,26.4,,,,,,.474,.366,.784,4.2,2.6,0.8,0.5,1.3,11.4,
+"""
+
+
+def _store(tmp_path):
+    return SeasonStore(str(tmp_path / "seasons.sqlite3"))
+
+
+def test_scraped_history_is_stored_typed(tmp_path):
+    with open(os.path.join(FIXTURES, "kevin_durant.html"), encoding="utf-8") as f:
+        _, stats = parse_per_game_stats(f.read())
+    store = _store(tmp_path)
+
+    assert store.ingest_player_seasons("duranke01", "Kevin Durant", stats) == len(stats)
+    # Volver a cargar la misma página actualiza las filas, no las duplica
+    store.ingest_player_seasons("duranke01", "Kevin Durant", stats)
+
+    seasons = store.player_seasons("kevin  durant")
+    assert len(seasons) == len(stats)
+    assert isinstance(seasons[0]["points_per_game"], float)
+    assert isinstance(seasons[0]["games"], int)
+    assert store.get_stats() == {"players": 1, "season_rows": len(stats)}
+
+
+def test_league_query_over_csv_dump(tmp_path):
+    path = tmp_path / "2023-24.csv"
+    path.write_text(LEAGUE_CSV, encoding="utf-8")
+    store = _store(tmp_path)
+
+    assert store.ingest_csv(str(path), season="2023-24") == 5
+
+    guards = store.query(position="G", min_ppg=20, since=2015)
+    assert [season["player_name"] for season in guards] == ["Luka Dončić"]
+    assert guards[0]["season"] == "2023-24"
+
+    # En temporadas con traspaso solo cuenta la fila combinada, salvo que se pidan las parciales
+    assert [s["team"] for s in store.query(position="PG", min_ppg=10) if s["player_id"] == "schrode01"] == ["2TM"]
+    partial = store.query(position="PG", min_ppg=10, include_partial=True, order_by="games")
+    assert [s["team"] for s in partial if s["player_id"] == "schrode01"] == ["2TM", "TOR", "BRK"]
+
+    # Por jugador, la fila combinada va delante de las parciales de su temporada
+    seasons = store.player_seasons("Dennis Schröder")
+    assert [(s["team"], s["full_season"]) for s in seasons] == [("2TM", 1), ("BRK", 0), ("TOR", 0)]
+
+    assert store.query(since=2024) == []
+    with pytest.raises(ValueError):
+        store.query(order_by="points_per_game; DROP TABLE player_seasons")
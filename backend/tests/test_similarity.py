@@ -0,0 +1,61 @@
+import numpy as np
+
+from modules.season_store import SeasonStore
+from modules.similarity import SimilarityIndex
+
+
+def _season(player_id, season, ppg, rpg, apg, team="AAA", games=70, age=27):
+    return {"player_id": player_id, "player_name": player_id.title(), "season": season, "team": team,
+            "games": games, "age": age, "points_per_game": ppg, "rebounds_per_game": rpg, "assists_per_game": apg}
+
+
+def _index(tmp_path, rows):
+    store = SeasonStore(str(tmp_path / "seasons.sqlite3"))
+    store.ingest_rows(rows)
+    index = SimilarityIndex(store, min_games=20)
+    store.add_listener(index.on_ingest)
+    return store, index
+
+
+LEAGUE = [
+    _season("scorer", "2022-23", 30.0, 6.0, 5.0),
+    _season("scorer", "2021-22", 29.0, 6.5, 4.5),
+    _season("wing", "2022-23", 28.5, 6.2, 4.8),
+    _season("wing", "2019-20", 12.0, 3.0, 2.0),
+    _season("big", "2022-23", 14.0, 12.0, 2.0),
+    _season("point", "2022-23", 18.0, 4.0, 10.0),
+    _season("cameo", "2022-23", 29.5, 6.1, 5.1, games=5),
+]
+
+
+def test_top_k_excludes_player_and_small_samples(tmp_path):
+    store, index = _index(tmp_path, LEAGUE)
+    target = store.player_seasons("scorer")[-1]
+
+    similar = index.similar(target, k=3)
+
+    assert [s["player_id"] for s in similar] == ["wing", "point", "big"]
+    assert similar[0]["season"] == "2022-23"
+    assert similar[0]["stats"]["points_per_game"] == 28.5
+    assert 0 < similar[0]["similarity"] <= 1
+
+
+def test_ingest_updates_index_incrementally(tmp_path):
+    store, index = _index(tmp_path, LEAGUE)
+    target = store.player_seasons("scorer")[-1]
+    assert index.similar(target, k=1)[0]["player_id"] == "wing"
+
+    # Nueva temporada casi idéntica: aparece sin reconstruir la matriz
+    store.ingest_rows([_season("twin", "2023-24", 30.0, 6.0, 5.0)])
+    assert index.similar(target, k=1)[0]["player_id"] == "twin"
+
+    # Traspaso: la fila del equipo pasa a ser parcial y deja de ser comparable
+    store.ingest_rows([_season("twin", "2023-24", 30.0, 6.0, 5.0, team="2TM"),
+                       _season("twin", "2023-24", 30.0, 6.0, 5.0, team="AAA")])
+    assert [s["player_id"] for s in index.similar(target, k=2)] == ["twin", "wing"]
+
+    # Mismo resultado que un índice construido desde cero
+    rebuilt = SimilarityIndex(store, min_games=20)
+    expected = rebuilt.similar(target, k=5)
+    assert index.similar(target, k=5) == expected
+    assert np.isclose(index._sum, rebuilt._sum).all()
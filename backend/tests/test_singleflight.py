@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules import cache
+from modules.cache import TieredCache, cached
+from modules.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight("test")
+    calls = []
+
+    def fetch(name):
+        calls.append(name)
+        time.sleep(0.2)
+        return {"name": name}
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(lambda _: flights.do("kevin durant", fetch, "Kevin Durant"), range(10)))
+
+    assert calls == ["Kevin Durant"]
+    assert all(result is results[0] for result in results)
+    assert flights.in_flight() == 0
+
+    # Terminada la llamada, la clave queda libre
+    flights.do("kevin durant", fetch, "Kevin Durant")
+    assert len(calls) == 2
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight("test")
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise TimeoutError("Spotrac no responde")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flights.do, "spotrac", fail)
+        started.wait()
+        follower = pool.submit(flights.do, "spotrac", fail)
+        for future in (leader, follower):
+            with pytest.raises(TimeoutError):
+                future.result()
+
+
+def test_async_calls_share_one_task_even_if_leader_is_cancelled():
+    flights = AsyncSingleFlight("test")
+    calls = []
+
+    async def fetch(name):
+        calls.append(name)
+        await asyncio.sleep(0.1)
+        return name.upper()
+
+    async def main():
+        leader = asyncio.create_task(flights.do("kd", fetch, "kd"))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flights.do("kd", fetch, "kd")) for _ in range(5)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == ["KD"] * 5
+    assert calls == ["kd"]
+
+
+def test_cached_coalesces_concurrent_misses(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "player_cache", TieredCache(str(tmp_path / "cache.sqlite3"), 10, {"contract_info": 60}))
+    calls = []
+
+    @cached("contract_info")
+    def get_contract_info(player_name):
+        calls.append(player_name)
+        time.sleep(0.2)
+        return "4 años / 194M"
+
+    names = ["Kevin Durant", "kevin  durant", "KEVIN DURANT"] * 3
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        results = list(pool.map(get_contract_info, names))
+
+    assert len(calls) == 1
+    assert results == ["4 años / 194M"] * len(names)
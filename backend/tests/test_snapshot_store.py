@@ -0,0 +1,85 @@
+import os
+
+from modules import basketball_reference, conditional_fetch, reparse
+from modules.basketball_reference import get_historical_stats
+from modules.snapshot_store import SnapshotStore
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "replay", "spotrac")
+
+
+def _pages(count):
+    with open(os.path.join(FIXTURES, "player_template.html"), encoding="utf-8") as f:
+        template = f.read()
+    names = [f"Player {chr(65 + i % 26)}{i}" for i in range(count)]
+    return [template.replace("{{name}}", name).replace("{{slug}}", name.lower().replace(" ", "-")).encode("utf-8")
+            for name in names]
+
+
+def test_round_trip_dedupe_and_shared_dictionary(tmp_path):
+    pages = _pages(12)
+    plain = SnapshotStore(str(tmp_path / "plain.sqlite3"), dict_samples=1000)
+    store = SnapshotStore(str(tmp_path / "dict.sqlite3"), dict_samples=4)
+    for i, page in enumerate(pages):
+        plain.record(f"https://www.spotrac.com/nba/player/_/id/{i}/p", page, "text/html")
+        store.record(f"https://www.spotrac.com/nba/player/_/id/{i}/p", page, "text/html")
+
+    # Misma página descargada otra vez: no se guarda de nuevo
+    store.record("https://www.spotrac.com/nba/player/_/id/0/p", pages[0], "text/html")
+    stats = store.get_stats()
+    assert (stats["blobs"], stats["urls"], stats["deduplicated"]) == (12, 12, 1)
+
+    assert store.latest("https://www.spotrac.com/nba/player/_/id/3/p") == pages[3]
+    assert all(store.read(sha256) is not None for _, sha256 in store.latest_snapshots())
+    # Las páginas de un mismo sitio comparten el marcado: con diccionario ocupan bastante menos
+    assert stats["stored_bytes"] < 0.7 * plain.get_stats()["stored_bytes"]
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    pages = [os.urandom(4000) for _ in range(5)]
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite3"), max_bytes=13000, dict_samples=1000)
+    urls = [f"https://api.example.com/players/{i}" for i in range(5)]
+    for url, page in zip(urls[:3], pages):
+        store.record(url, page, "application/json")
+    store.latest(urls[0])    # Leída hace poco: no se desaloja
+
+    store.record(urls[3], pages[3], "application/json")
+
+    assert store.get_stats()["stored_bytes"] <= 13000
+    assert store.latest(urls[1]) is None
+    assert store.latest(urls[0]) == pages[0] and store.latest(urls[3]) == pages[3]
+
+
+def test_submit_writes_in_background(tmp_path):
+    page = _pages(1)[0]
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite3"))
+    url = "https://www.spotrac.com/nba/player/_/id/1/p"
+
+    # Con el almacén ocupado, encolar no espera a la escritura
+    with store._lock:
+        store.submit(url, page, "text/html")
+    store.flush()
+
+    assert store.latest(url) == page
+    store.close()
+
+
+def test_reparse_rebuilds_data_without_network(replay, snapshots, monkeypatch):
+    seasons = basketball_reference.season_store
+    monkeypatch.setattr(reparse, "season_store", seasons)
+    monkeypatch.setattr(reparse, "page_validators", conditional_fetch.page_validators)
+    stats = get_historical_stats("Kevin Durant")
+    snapshots.flush()
+    player_url = next(url for url, _ in snapshots.latest_snapshots() if url.endswith("duranke01.html"))
+
+    # Datos derivados perdidos o parseados mal (p. ej. con un ID de tabla que ya no existe)
+    conditional_fetch.page_validators.update_parsed(player_url, [None, []])
+    with seasons._lock:
+        seasons._connection().execute("DELETE FROM player_seasons")
+    requests_before = len(replay.requests)
+
+    counts = reparse.reparse_snapshots(workers=2, store=snapshots)
+
+    assert counts["basketball_reference"] == 1
+    assert len(replay.requests) == requests_before
+    assert conditional_fetch.page_validators.get(player_url)["parsed"][1] == stats
+    assert len(seasons.player_seasons("Kevin Durant")) == len(stats)
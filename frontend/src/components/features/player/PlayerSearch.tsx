@@ -1,5 +1,7 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Search } from 'lucide-react';
+import { PlayerService } from '../../../services/api';
+import { PlayerSuggestion } from '../../../types';
 
 interface PlayerSearchProps {
   onSearch: (query: string) => void;
@@ -9,6 +11,27 @@ interface PlayerSearchProps {
 export const PlayerSearch: React.FC<PlayerSearchProps> = ({ onSearch, isLoading }) => {
   const [query, setQuery] = useState('');
   const [isFocused, setIsFocused] = useState(false);
+  const [suggestions, setSuggestions] = useState<PlayerSuggestion[]>([]);
+
+  useEffect(() => {
+    const trimmed = query.trim();
+    if (trimmed.length < 2) {
+      setSuggestions([]);
+      return;
+    }
+    // Aborted on every keystroke so a slow response for an older query never overwrites a newer one
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      const results = await PlayerService.suggestPlayers(trimmed, 8, controller.signal);
+      if (!controller.signal.aborted) {
+        setSuggestions(results);
+      }
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query]);
 
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
@@ -26,12 +49,18 @@ export const PlayerSearch: React.FC<PlayerSearchProps> = ({ onSearch, isLoading
           onChange={(e) => setQuery(e.target.value)}
           onFocus={() => setIsFocused(true)}
           onBlur={() => setIsFocused(false)}
+          list="player-suggestions"
           placeholder="Enter player name..."
           className="w-full px-6 py-4 rounded-xl border-2 border-transparent bg-white/80 backdrop-blur-lg
                    shadow-lg focus:shadow-blue-500/20 focus:border-blue-500 outline-none
                    transition-all duration-300 text-lg"
           disabled={isLoading}
         />
+        <datalist id="player-suggestions">
+          {suggestions.map((suggestion) => (
+            <option key={suggestion.name} value={suggestion.name} />
+          ))}
+        </datalist>
         <button
           type="submit"
           disabled={isLoading}
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { ApiResponse } from '../types';
+import { ApiResponse, PlayerSuggestion } from '../types';
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
@@ -29,5 +29,18 @@ export const PlayerService = {
         error: 'An unexpected error occurred'
       };
     }
+  },
+
+  // Served from the backend's local player index, so it never waits on upstream sites
+  async suggestPlayers(query: string, limit = 8, signal?: AbortSignal): Promise<PlayerSuggestion[]> {
+    try {
+      const response = await apiClient.get<{ suggestions: PlayerSuggestion[] }>('/players/autocomplete', {
+        params: { q: query, limit },
+        signal
+      });
+      return response.data.suggestions;
+    } catch {
+      return [];
+    }
   }
 };
\ No newline at end of file
@@ -28,4 +28,9 @@ export interface ApiResponse {
   success: boolean;
   data?: PlayerData;
   error?: string;
-}
\ No newline at end of file
+}
+
+export interface PlayerSuggestion {
+  name: string;
+  sources: string[];
+}